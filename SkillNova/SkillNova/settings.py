@@ -10,11 +10,20 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
+import sys
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+# Modules shared with the Flask app (profiling, ...) live at the repository root.
+REPO_DIR = BASE_DIR.parent
+if str(REPO_DIR) not in sys.path:
+    sys.path.append(str(REPO_DIR))
+
+from core.db import database_settings  # noqa: E402
+
 
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/5.2/howto/deployment/checklist/
@@ -53,6 +62,8 @@ MIDDLEWARE = [
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'allauth.account.middleware.AccountMiddleware',  # Add this for Allauth
+    'core.db.ReplicaPinMiddleware',  # Read-your-writes when a replica is configured
+    'core.middleware.ProfilingMiddleware',  # Opt-in, see profiling.py
 ]
 
 ROOT_URLCONF = 'SkillNova.urls'
@@ -80,12 +91,10 @@ WSGI_APPLICATION = 'SkillNova.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
-}
+# SQLite with WAL/busy_timeout pragmas by default, DJANGO_DATABASE_URL for
+# Postgres and DJANGO_REPLICA_DATABASE_URL for a read replica (see core/db.py).
+DATABASES = database_settings(BASE_DIR)
+DATABASE_ROUTERS = ['core.db.ReplicaRouter']
 
 
 # Password validation
@@ -123,6 +132,12 @@ RAZORPAY_KEY_SECRET = '2kdZrVnkNpA2AKgGufltDJJ'
 
 STATIC_URL = '/static/'
 STATICFILES_DIRS = [BASE_DIR/'static']
+# `manage.py collectstatic` minifies, fingerprints and precompresses into STATIC_ROOT.
+STATIC_ROOT = BASE_DIR/'staticfiles'
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'core.storage.CompressedManifestStaticFilesStorage'},
+}
 
 LANGUAGE_CODE = 'en-us'
 TIME_ZONE = 'UTC'
@@ -130,3 +145,9 @@ USE_I18N = True
 USE_TZ = True
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# JSON logs through a background queue listener, shared with the Flask app
+# (see logging_setup.py at the repository root).
+# Django only calls LOGGING_CONFIG for a non-empty LOGGING, so keep the key.
+LOGGING_CONFIG = 'logging_setup.configure_django_logging'
+LOGGING = {'level': os.getenv('LOG_LEVEL', 'INFO').upper()}
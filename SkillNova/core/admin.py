@@ -1,6 +1,21 @@
 # Register your models here.
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.contrib.admin.options import IncorrectLookupParameters
+from django.contrib.admin.views.main import ORDER_VAR, ChangeList
+from django.core.exceptions import PermissionDenied
+from django.shortcuts import get_object_or_404, redirect
+from django.template.response import TemplateResponse
+from django.urls import path, reverse
+from django.utils import timezone
+
+from . import bulk, reporting
+from .forms import BulkEnrollForm
 from .models import Training, Project, Assignment, Enrollment, ProjectCompletion
+from .pagination import EstimatedCountPaginator, keyset_page, stream_csv
+
+CURSOR_VAR = 'after'
+EXPORT_CHUNK_SIZE = 2000
+
 
 class ProjectInline(admin.TabularInline):
     model = Project
@@ -9,6 +24,54 @@ class ProjectInline(admin.TabularInline):
 
 class TrainingAdmin(admin.ModelAdmin):
     inlines = [ProjectInline]
+    change_form_template = 'admin/core/training/change_form.html'
+
+    change_list_template = 'admin/core/training/change_list.html'
+
+    def get_urls(self):
+        return [
+            path('analytics/', self.admin_site.admin_view(self.analytics_view),
+                 name='core_training_analytics'),
+            path('<path:object_id>/enroll/', self.admin_site.admin_view(self.bulk_enroll_view),
+                 name='core_training_bulk_enroll'),
+        ] + super().get_urls()
+
+    def analytics_view(self, request):
+        """Enrollment and completion analytics, served from the summary tables."""
+        if not self.has_view_permission(request):
+            raise PermissionDenied
+        reporting.refresh_if_stale()
+        context = {
+            **self.admin_site.each_context(request),
+            'title': "Training analytics",
+            'opts': self.opts,
+            'report': reporting.training_report(),
+        }
+        return TemplateResponse(request, 'admin/core/training/analytics.html', context)
+
+    def bulk_enroll_view(self, request, object_id):
+        """Enroll a pasted list of users in one training (see core/bulk.py)."""
+        if not self.has_change_permission(request):
+            raise PermissionDenied
+        training = get_object_or_404(Training, pk=object_id)
+        form = BulkEnrollForm(request.POST or None)
+        if request.method == 'POST' and form.is_valid():
+            user_ids, unknown = bulk.resolve_users(form.cleaned_data['users'])
+            created = bulk.bulk_enroll(training, user_ids, paid=form.cleaned_data['paid'])
+            self.message_user(request, f"Enrolled {created} new users in {training} "
+                                       f"({len(user_ids) - created} already enrolled).")
+            if unknown:
+                shown = ', '.join(unknown[:20]) + (' ...' if len(unknown) > 20 else '')
+                self.message_user(request, f"{len(unknown)} users not found: {shown}", messages.WARNING)
+            return redirect(reverse('admin:core_enrollment_changelist') + f'?training__id__exact={training.pk}')
+        context = {
+            **self.admin_site.each_context(request),
+            'title': f"Enroll users in {training}",
+            'opts': self.opts,
+            'original': training,
+            'form': form,
+        }
+        return TemplateResponse(request, 'admin/core/training/bulk_enroll.html', context)
 
 class ProjectAdmin(admin.ModelAdmin):
     list_filter = ('is_approved',)
@@ -18,8 +81,112 @@ class ProjectAdmin(admin.ModelAdmin):
         queryset.update(is_approved=True)
     approve_projects.short_description = "Approve selected projects"
 
+
+class KeysetChangeList(ChangeList):
+    """
+    Pages newest-first with ``?after=<id>`` instead of ``?p=<n>`` (OFFSET),
+    unless the user sorts by a column, which falls back to page numbers.
+    """
+
+    def __init__(self, request, *args, **kwargs):
+        try:
+            self.cursor = int(request.GET[CURSOR_VAR]) if CURSOR_VAR in request.GET else None
+        except ValueError:
+            raise IncorrectLookupParameters
+        self.keyset = ORDER_VAR not in request.GET
+        self.next_cursor = None
+        super().__init__(request, *args, **kwargs)
+
+    def get_filters_params(self, params=None):
+        lookup_params = super().get_filters_params(params)
+        lookup_params.pop(CURSOR_VAR, None)
+        return lookup_params
+
+    def get_results(self, request):
+        if not self.keyset:
+            return super().get_results(request)
+        self.paginator = self.model_admin.get_paginator(request, self.queryset, self.list_per_page)
+        self.result_count = self.paginator.count
+        self.result_list, self.next_cursor = keyset_page(self.queryset, self.cursor, self.list_per_page)
+        self.full_result_count = None
+        self.show_full_result_count = False
+        self.show_admin_actions = True
+        self.can_show_all = False
+        self.multi_page = False
+
+    def first_page_url(self):
+        return self.get_query_string(remove=[CURSOR_VAR])
+
+    def next_page_url(self):
+        return self.get_query_string({CURSOR_VAR: self.next_cursor}) if self.next_cursor else None
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """Changelist for tables that grow with every student: no COUNT(*), no OFFSET."""
+
+    change_list_template = 'admin/core/keyset_change_list.html'
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    ordering = ('-pk',)
+
+    def get_changelist(self, request, **kwargs):
+        return KeysetChangeList
+
+
+class EnrollmentAdmin(LargeTableAdmin):
+    list_display = ('id', 'user', 'training', 'is_paid', 'progress', 'enrolled_at')
+    list_select_related = ('user', 'training')
+    list_filter = ('is_paid', 'training')
+    search_fields = ('user__username', 'user__email')
+    raw_id_fields = ('user', 'training')
+    actions = ['mark_paid', 'recompute_progress']
+
+    @admin.action(description="Mark selected enrollments as paid")
+    def mark_paid(self, request, queryset):
+        self.message_user(request, f"Marked {bulk.mark_paid(queryset)} enrollments as paid.")
+
+    @admin.action(description="Recompute progress of selected enrollments")
+    def recompute_progress(self, request, queryset):
+        self.message_user(request, f"Recomputed progress of {bulk.recompute_progress(queryset)} enrollments.")
+
+
+class ProjectCompletionAdmin(LargeTableAdmin):
+    change_list_template = 'admin/core/projectcompletion/change_list.html'
+    list_display = ('id', 'student', 'training', 'project', 'github_link', 'linkedin_link', 'completed_at')
+    list_select_related = ('enrollment__user', 'enrollment__training', 'project')
+    list_filter = ('enrollment__training',)
+    search_fields = ('enrollment__user__username', 'enrollment__user__email')
+    raw_id_fields = ('enrollment', 'project')
+
+    @admin.display(description='Student', ordering='enrollment__user__username')
+    def student(self, obj):
+        return obj.enrollment.user.username
+
+    @admin.display(description='Training', ordering='enrollment__training__title')
+    def training(self, obj):
+        return obj.enrollment.training.title
+
+    def get_urls(self):
+        return [
+            path('export/', self.admin_site.admin_view(self.export_csv),
+                 name='core_projectcompletion_export'),
+        ] + super().get_urls()
+
+    def export_csv(self, request):
+        """Every completion matching the changelist filters, streamed as CSV."""
+        if not self.has_view_permission(request):
+            raise PermissionDenied
+        queryset = self.get_changelist_instance(request).queryset
+        rows = queryset.order_by('pk').values_list(
+            'pk', 'enrollment__user__username', 'enrollment__user__email', 'enrollment__training__title',
+            'project__title', 'github_link', 'linkedin_link', 'completed_at',
+        ).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+        header = ['id', 'username', 'email', 'training', 'project', 'github_link', 'linkedin_link', 'completed_at']
+        return stream_csv(rows, header, f"project_completions_{timezone.now():%Y%m%d}.csv")
+
+
 admin.site.register(Training, TrainingAdmin)
 admin.site.register(Project, ProjectAdmin)
 admin.site.register(Assignment)
-admin.site.register(Enrollment)
-admin.site.register(ProjectCompletion)
\ No newline at end of file
+admin.site.register(Enrollment, EnrollmentAdmin)
+admin.site.register(ProjectCompletion, ProjectCompletionAdmin)
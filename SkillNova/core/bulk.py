@@ -0,0 +1,100 @@
+"""
+Set-based enrollment operations for whole cohorts.
+
+The ``enroll`` / ``create_order`` views do ``get_or_create`` + ``save`` per
+student, which is fine for one click but takes minutes for a cohort. The
+admin actions and the ``enroll_users`` / ``mark_paid`` /
+``recompute_progress`` management commands use these helpers instead:
+
+- ``bulk_enroll`` inserts in batches with ``bulk_create(ignore_conflicts=True)``
+  (existing enrollments are skipped by the unique (user, training) index).
+- ``mark_paid`` is one ``UPDATE``.
+- ``recompute_progress`` is one ``UPDATE`` whose new value comes from
+  correlated COUNT subqueries, with the same rounding as the views.
+"""
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Count, IntegerField, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from .models import Enrollment, Project, ProjectCompletion
+
+BATCH_SIZE = 2000
+
+
+def _batches(items, size):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def resolve_users(identifiers, batch_size=BATCH_SIZE):
+    """
+    Map usernames or email addresses to user ids.
+    Returns ``(user_ids, unknown_identifiers)``.
+    """
+    wanted = {i.strip() for i in identifiers if i.strip()}
+    user_ids, found = set(), set()
+    for batch in _batches(sorted(wanted), batch_size):
+        rows = User.objects.filter(Q(username__in=batch) | Q(email__in=batch)).values_list('id', 'username', 'email')
+        for user_id, username, email in rows:
+            user_ids.add(user_id)
+            found.update((username, email))
+    return sorted(user_ids), sorted(wanted - found)
+
+
+def bulk_enroll(training, user_ids, paid=False, batch_size=BATCH_SIZE):
+    """
+    Enroll ``user_ids`` in ``training``; with ``paid`` also marks existing
+    enrollments of those users as paid (as the enroll view does).
+    Returns the number of enrollments created.
+    """
+    enrollments = Enrollment.objects.filter(training=training)
+    with transaction.atomic():
+        before = enrollments.count()
+        for batch in _batches(user_ids, batch_size):
+            existing = enrollments.filter(user_id__in=batch)
+            if paid:
+                existing.filter(is_paid=False).update(is_paid=True)
+            # Skipping known rows keeps re-runs cheap; ignore_conflicts covers
+            # enrollments created concurrently by the views.
+            known = set(existing.values_list('user_id', flat=True))
+            Enrollment.objects.bulk_create(
+                [Enrollment(user_id=user_id, training=training, is_paid=paid)
+                 for user_id in batch if user_id not in known],
+                ignore_conflicts=True,
+            )
+        return enrollments.count() - before
+
+
+def mark_paid(queryset):
+    """Mark every enrollment in ``queryset`` as paid; returns the rows changed."""
+    return queryset.filter(is_paid=False).update(is_paid=True)
+
+
+def recompute_progress(queryset):
+    """
+    Set ``progress`` = completed projects * 100 // projects in the training
+    for every enrollment in ``queryset``, in a single UPDATE.
+    """
+    completed = (
+        ProjectCompletion.objects.filter(enrollment=OuterRef('pk'))
+        .order_by().values('enrollment').annotate(n=Count('pk')).values('n')
+    )
+    total = (
+        Project.objects.filter(training=OuterRef('training'))
+        .order_by().values('training').annotate(n=Count('pk')).values('n')
+    )
+    zero = Value(0, output_field=IntegerField())
+    # Integer division, like int(completed / total * 100) in the views;
+    # a training without projects divides by NULL and falls back to 0.
+    return queryset.update(progress=Coalesce(
+        Coalesce(Subquery(completed, output_field=IntegerField()), zero) * 100
+        / Subquery(total, output_field=IntegerField()),
+        zero,
+    ))
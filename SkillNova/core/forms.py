@@ -21,3 +21,13 @@ class ProjectCompletionForm(forms.ModelForm):
     class Meta:
         model = ProjectCompletion
         fields = ['github_link', 'linkedin_link']
+
+class BulkEnrollForm(forms.Form):
+    users = forms.CharField(
+        widget=forms.Textarea(attrs={'rows': 12, 'cols': 60}),
+        help_text="One username or email address per line.",
+    )
+    paid = forms.BooleanField(required=False, initial=True, label="Mark as paid")
+
+    def clean_users(self):
+        return self.cleaned_data['users'].splitlines()
@@ -0,0 +1,34 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.bulk import bulk_enroll, resolve_users
+from core.models import Training
+
+
+class Command(BaseCommand):
+    help = "Enroll users (usernames or emails, one per line) in a training with batched inserts."
+
+    def add_arguments(self, parser):
+        parser.add_argument('training_id', type=int)
+        parser.add_argument('users_file', nargs='?', default='-', help="file with one user per line (default: stdin)")
+        parser.add_argument('--paid', action='store_true', help="mark the enrollments as paid")
+
+    def handle(self, training_id, users_file, paid, **options):
+        try:
+            training = Training.objects.get(pk=training_id)
+        except Training.DoesNotExist:
+            raise CommandError(f"Training {training_id} does not exist")
+        if users_file == '-':
+            identifiers = sys.stdin.read().splitlines()
+        else:
+            with open(users_file, encoding='utf-8') as f:
+                identifiers = f.read().splitlines()
+
+        user_ids, unknown = resolve_users(identifiers)
+        created = bulk_enroll(training, user_ids, paid=paid)
+        self.stdout.write(self.style.SUCCESS(
+            f"Enrolled {created} new users in {training} ({len(user_ids) - created} already enrolled)"
+        ))
+        if unknown:
+            self.stderr.write(f"{len(unknown)} users not found: {', '.join(unknown[:20])}")
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from core.bulk import mark_paid
+from core.models import Enrollment
+
+
+class Command(BaseCommand):
+    help = "Mark the enrollments of a training (or all enrollments) as paid in one UPDATE."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--training', type=int, help="only this training id")
+
+    def handle(self, training, **options):
+        enrollments = Enrollment.objects.all()
+        if training is not None:
+            enrollments = enrollments.filter(training_id=training)
+        self.stdout.write(self.style.SUCCESS(f"Marked {mark_paid(enrollments)} enrollments as paid"))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from core.reporting import refresh
+
+
+class Command(BaseCommand):
+    help = "Fold new enrollments and completions into the analytics summaries (run from cron)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help="rebuild the summaries from scratch")
+
+    def handle(self, full, **options):
+        folded = refresh(full=full)
+        self.stdout.write(self.style.SUCCESS(f"Folded {folded} rows into the analytics summaries"))
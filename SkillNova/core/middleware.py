@@ -0,0 +1,21 @@
+import os
+
+from profiling import PROFILE_HEADER, profile, request_enabled
+
+
+class ProfilingMiddleware:
+    """
+    Samples the view when the request carries ``X-Profile: <PROFILE_SECRET>``
+    and writes a collapsed-stack file (see profiling.py at the repository root).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not request_enabled(request.headers.get(PROFILE_HEADER)):
+            return self.get_response(request)
+        with profile("django", request.path) as session:
+            response = self.get_response(request)
+        response["X-Profile-File"] = os.path.basename(session.path)
+        return response
@@ -0,0 +1,41 @@
+from django.db import migrations
+from django.db.models import Count, Max, Min
+
+
+def merge_duplicate_enrollments(apps, schema_editor):
+    """Keep the oldest enrollment per (user, training) and fold the others into it."""
+    Enrollment = apps.get_model('core', 'Enrollment')
+    ProjectCompletion = apps.get_model('core', 'ProjectCompletion')
+    duplicates = (
+        Enrollment.objects.values('user_id', 'training_id')
+        .annotate(n=Count('id'), keep=Min('id'), progress=Max('progress'))
+        .filter(n__gt=1)
+    )
+    for group in duplicates:
+        rows = Enrollment.objects.filter(user_id=group['user_id'], training_id=group['training_id'])
+        extra = rows.exclude(id=group['keep'])
+        Enrollment.objects.filter(id=group['keep']).update(
+            is_paid=rows.filter(is_paid=True).exists(),
+            progress=group['progress'],
+        )
+        done = ProjectCompletion.objects.filter(enrollment_id=group['keep']).values('project_id')
+        for enrollment_id in extra.values_list('id', flat=True):
+            ProjectCompletion.objects.filter(enrollment_id=enrollment_id).exclude(project_id__in=done).update(
+                enrollment_id=group['keep'],
+            )
+        extra.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_projectcompletion_github_link_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_enrollments, migrations.RunPython.noop),
+        migrations.AlterUniqueTogether(
+            name='enrollment',
+            unique_together={('user', 'training')},
+        ),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 5.2.18 on 2026-10-19 16:50
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_enrollment_unique_user_training'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReportWatermark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('last_id', models.BigIntegerField(default=0)),
+                ('refreshed_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='TrainingSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('enrollments', models.PositiveIntegerField(default=0)),
+                ('paid_enrollments', models.PositiveIntegerField(default=0)),
+                ('completed_enrollments', models.PositiveIntegerField(default=0)),
+                ('average_progress', models.FloatField(default=0.0)),
+                ('refreshed_at', models.DateTimeField(auto_now=True)),
+                ('training', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='summary', to='core.training')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='DailyCompletionStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('completions', models.PositiveIntegerField(default=0)),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_completions', to='core.project')),
+            ],
+            options={
+                'unique_together': {('project', 'day')},
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyEnrollmentStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('enrollments', models.PositiveIntegerField(default=0)),
+                ('training', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_enrollments', to='core.training')),
+            ],
+            options={
+                'unique_together': {('training', 'day')},
+            },
+        ),
+    ]
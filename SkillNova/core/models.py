@@ -42,6 +42,10 @@ class Enrollment(models.Model):
     enrolled_at = models.DateTimeField(auto_now_add=True)
     progress = models.PositiveIntegerField(default=0)
 
+    class Meta:
+        # Lets bulk enrollment skip existing rows with ignore_conflicts.
+        unique_together = ('user', 'training')
+
     def __str__(self):
         return f"{self.user.username} - {self.training.title}"
 
@@ -54,3 +58,35 @@ class ProjectCompletion(models.Model):
 
     class Meta:
         unique_together = ('enrollment', 'project')
+
+
+# Materialized analytics, maintained by core/reporting.py -- never edit by hand.
+class DailyEnrollmentStats(models.Model):
+    training = models.ForeignKey(Training, on_delete=models.CASCADE, related_name='daily_enrollments')
+    day = models.DateField()
+    enrollments = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('training', 'day')
+
+class DailyCompletionStats(models.Model):
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='daily_completions')
+    day = models.DateField()
+    completions = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('project', 'day')
+
+class TrainingSummary(models.Model):
+    training = models.OneToOneField(Training, on_delete=models.CASCADE, related_name='summary')
+    enrollments = models.PositiveIntegerField(default=0)
+    paid_enrollments = models.PositiveIntegerField(default=0)
+    completed_enrollments = models.PositiveIntegerField(default=0)
+    average_progress = models.FloatField(default=0.0)
+    refreshed_at = models.DateTimeField(auto_now=True)
+
+class ReportWatermark(models.Model):
+    """Highest source row id already folded into the summaries."""
+    name = models.CharField(max_length=50, unique=True)
+    last_id = models.BigIntegerField(default=0)
+    refreshed_at = models.DateTimeField(auto_now=True)
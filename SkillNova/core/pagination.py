@@ -0,0 +1,84 @@
+"""
+Listing helpers for large tables: cheap counts, keyset pages and CSV streams.
+
+- ``EstimatedCountPaginator`` counts exactly only up to ``exact_threshold``
+  rows (a ``COUNT(*)`` over a ``LIMIT`` subquery). Past that an unfiltered
+  table is estimated from the planner statistics (Postgres) or the highest
+  primary key, and a filtered one is reported as "at least the threshold".
+- ``keyset_page`` pages by primary key (``WHERE id < cursor ORDER BY id DESC
+  LIMIT n``), which costs the same on the last page as on the first, unlike
+  OFFSET.
+- ``stream_csv`` writes rows to a StreamingHttpResponse as they are fetched.
+"""
+import csv
+
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Max
+from django.http import StreamingHttpResponse
+from django.utils.functional import cached_property
+
+
+def estimated_table_count(model, using="default"):
+    connection = connections[using]
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+                           [model._meta.db_table])
+            row = cursor.fetchone()
+        if row and row[0] > 0:
+            return row[0]
+    return model._default_manager.using(using).aggregate(n=Max("pk"))["n"] or 0
+
+
+class EstimatedCountPaginator(Paginator):
+    exact_threshold = 10000
+    # How ``count`` was obtained: "exact", "estimate" or "at_least".
+    count_kind = "exact"
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        capped = queryset.order_by()[: self.exact_threshold + 1].count()
+        if capped <= self.exact_threshold:
+            return capped
+        if not queryset.query.where:
+            self.count_kind = "estimate"
+            return max(capped, estimated_table_count(queryset.model, queryset.db))
+        self.count_kind = "at_least"
+        return self.exact_threshold
+
+
+def keyset_page(queryset, after=None, size=100):
+    """
+    One page of ``queryset`` in descending primary-key order, starting below
+    the ``after`` key. Returns ``(rows, next_cursor)``; ``next_cursor`` is
+    None on the last page.
+    """
+    if after is not None:
+        queryset = queryset.filter(pk__lt=after)
+    rows = list(queryset.order_by("-pk")[: size + 1])
+    if len(rows) > size:
+        rows = rows[:size]
+        return rows, rows[-1].pk
+    return rows, None
+
+
+class _Echo:
+    """File-like object whose write() returns the line, for csv.writer."""
+
+    def write(self, value):
+        return value
+
+
+def stream_csv(rows, header, filename):
+    writer = csv.writer(_Echo())
+
+    def lines():
+        yield writer.writerow(header)
+        for row in rows:
+            yield writer.writerow(row)
+
+    response = StreamingHttpResponse(lines(), content_type="text/csv")
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
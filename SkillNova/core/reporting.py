@@ -0,0 +1,192 @@
+"""
+Materialized training analytics.
+
+Dashboards read small summary tables instead of scanning Enrollment and
+ProjectCompletion:
+
+- ``DailyEnrollmentStats``  new enrollments per training per day
+- ``DailyCompletionStats``  project completions per project per day (the funnel)
+- ``TrainingSummary``       enrollments, paid, finished and average progress per training
+
+``refresh()`` is incremental. ``ReportWatermark`` remembers the highest
+Enrollment / ProjectCompletion id already counted; each run folds in only
+the rows above it (grouped per day and added to the daily counters) and
+recomputes ``TrainingSummary`` for the trainings those rows belong to. Rows
+younger than ``REPORTING_SETTLE_SECONDS`` wait for the next run, so a
+transaction that took a lower id but commits late is not skipped. Progress
+or payment changes made without a new row (admin edits, ``mark_paid``,
+``recompute_progress``) reach ``TrainingSummary`` the next time the
+training gets a new row, or with ``refresh(full=True)``, which rebuilds
+everything.
+
+Run ``manage.py refresh_analytics`` from cron; the admin analytics page
+also refreshes when the summaries are older than ``ANALYTICS_MAX_AGE``.
+
+Environment:
+    REPORTING_SETTLE_SECONDS  ignore rows newer than this (default 5)
+    ANALYTICS_MAX_AGE         seconds before the analytics page refreshes first (default 300)
+"""
+import logging
+import os
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Avg, Count, Max, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import (
+    DailyCompletionStats, DailyEnrollmentStats, Enrollment, Project, ProjectCompletion, ReportWatermark,
+    Training, TrainingSummary,
+)
+
+logger = logging.getLogger(__name__)
+
+REPORTING_SETTLE_SECONDS = int(os.getenv("REPORTING_SETTLE_SECONDS", 5))
+ANALYTICS_MAX_AGE = int(os.getenv("ANALYTICS_MAX_AGE", 300))
+
+
+def _watermark(name):
+    watermark, _ = ReportWatermark.objects.get_or_create(name=name)
+    # Serializes concurrent refreshes, which would otherwise count a row twice.
+    return ReportWatermark.objects.select_for_update().get(pk=watermark.pk)
+
+
+def _new_rows(queryset, watermark, timestamp_field, cutoff):
+    """Rows above the watermark that are older than ``cutoff``, and the new watermark."""
+    settled = queryset.filter(pk__gt=watermark.last_id, **{f"{timestamp_field}__lte": cutoff})
+    upper = settled.aggregate(n=Max("pk"))["n"]
+    if upper is None:
+        return None, watermark.last_id
+    return queryset.filter(pk__gt=watermark.last_id, pk__lte=upper), upper
+
+
+def _add_daily(model, key, counter, deltas):
+    """Add ``{(key_id, day): n}`` onto the daily counter rows."""
+    if not deltas:
+        return
+    existing = {
+        (getattr(row, f"{key}_id"), row.day): row
+        for row in model.objects.filter(
+            **{f"{key}_id__in": {k for k, _ in deltas}, "day__in": {d for _, d in deltas}}
+        )
+    }
+    changed, created = [], []
+    for (key_id, day), n in deltas.items():
+        row = existing.get((key_id, day))
+        if row is None:
+            created.append(model(**{f"{key}_id": key_id, "day": day, counter: n}))
+        else:
+            setattr(row, counter, getattr(row, counter) + n)
+            changed.append(row)
+    model.objects.bulk_update(changed, [counter])
+    model.objects.bulk_create(created)
+
+
+def _summarize(training_ids=None):
+    """Recompute TrainingSummary rows (for ``training_ids``, or every training)."""
+    enrollments = Enrollment.objects.all()
+    if training_ids is not None:
+        enrollments = enrollments.filter(training_id__in=training_ids)
+    rows = {
+        row["training_id"]: row
+        for row in enrollments.order_by().values("training_id").annotate(
+            n=Count("pk"),
+            paid=Count("pk", filter=Q(is_paid=True)),
+            finished=Count("pk", filter=Q(progress__gte=100)),
+            average=Avg("progress"),
+        )
+    }
+    ids = training_ids if training_ids is not None else Training.objects.values_list("pk", flat=True)
+    for training_id in ids:
+        row = rows.get(training_id, {})
+        TrainingSummary.objects.update_or_create(training_id=training_id, defaults={
+            "enrollments": row.get("n", 0),
+            "paid_enrollments": row.get("paid", 0),
+            "completed_enrollments": row.get("finished", 0),
+            "average_progress": row.get("average") or 0.0,
+        })
+
+
+def refresh(full=False):
+    """Fold new enrollments / completions into the summaries. Returns rows folded in."""
+    cutoff = timezone.now() - timedelta(seconds=REPORTING_SETTLE_SECONDS)
+    with transaction.atomic():
+        enrollment_mark = _watermark("enrollments")
+        completion_mark = _watermark("completions")
+        if full:
+            DailyEnrollmentStats.objects.all().delete()
+            DailyCompletionStats.objects.all().delete()
+            enrollment_mark.last_id = completion_mark.last_id = 0
+
+        new_enrollments, enrollment_mark.last_id = _new_rows(
+            Enrollment.objects.all(), enrollment_mark, "enrolled_at", cutoff)
+        new_completions, completion_mark.last_id = _new_rows(
+            ProjectCompletion.objects.all(), completion_mark, "completed_at", cutoff)
+
+        folded, touched = 0, set()
+        if new_enrollments is not None:
+            deltas = {
+                (row["training_id"], row["day"]): row["n"]
+                for row in new_enrollments.annotate(day=TruncDate("enrolled_at"))
+                .order_by().values("training_id", "day").annotate(n=Count("pk"))
+            }
+            _add_daily(DailyEnrollmentStats, "training", "enrollments", deltas)
+            touched.update(training_id for training_id, _ in deltas)
+            folded += sum(deltas.values())
+        if new_completions is not None:
+            deltas = {
+                (row["project_id"], row["day"]): row["n"]
+                for row in new_completions.annotate(day=TruncDate("completed_at"))
+                .order_by().values("project_id", "day").annotate(n=Count("pk"))
+            }
+            _add_daily(DailyCompletionStats, "project", "completions", deltas)
+            touched.update(
+                Project.objects.filter(pk__in={project_id for project_id, _ in deltas})
+                .values_list("training_id", flat=True)
+            )
+            folded += sum(deltas.values())
+
+        _summarize(None if full else touched)
+        enrollment_mark.save()
+        completion_mark.save()
+    logger.info(f"Analytics refresh: {folded} rows folded in, {len(touched)} trainings resummarized")
+    return folded
+
+
+def refresh_if_stale(max_age=ANALYTICS_MAX_AGE):
+    mark = ReportWatermark.objects.filter(name="enrollments").values_list("refreshed_at", flat=True).first()
+    if mark is None or timezone.now() - mark > timedelta(seconds=max_age):
+        refresh()
+
+
+def training_report(days=30):
+    """Everything the analytics page shows, read from the summary tables only."""
+    since = timezone.now().date() - timedelta(days=days - 1)
+    summaries = {s.training_id: s for s in TrainingSummary.objects.all()}
+    completions = dict(
+        DailyCompletionStats.objects.order_by().values("project_id").annotate(n=Sum("completions"))
+        .values_list("project_id", "n")
+    )
+    daily = {}
+    for row in DailyEnrollmentStats.objects.filter(day__gte=since).values("training_id", "day", "enrollments"):
+        daily.setdefault(row["training_id"], {})[row["day"]] = row["enrollments"]
+    days_shown = [since + timedelta(days=i) for i in range(days)]
+
+    report = []
+    for training in Training.objects.order_by("title").prefetch_related("projects"):
+        summary = summaries.get(training.pk) or TrainingSummary(training=training)
+        funnel = [
+            {"project": project, "completions": completions.get(project.pk, 0),
+             "share": completions.get(project.pk, 0) / summary.enrollments if summary.enrollments else 0.0}
+            for project in sorted(training.projects.all(), key=lambda p: p.order)
+        ]
+        per_day = daily.get(training.pk, {})
+        report.append({
+            "training": training,
+            "summary": summary,
+            "funnel": funnel,
+            "daily": [(day, per_day.get(day, 0)) for day in days_shown],
+            "recent_enrollments": sum(per_day.values()),
+        })
+    return report
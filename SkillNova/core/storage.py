@@ -0,0 +1,38 @@
+import os
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+from static_pipeline import MINIFIERS, precompress
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """
+    ``collectstatic`` storage that minifies CSS/JS, writes content-hashed
+    copies (Django's manifest storage) and precompresses them to ``.gz``/``.br``
+    with the same helpers as the Flask build (static_pipeline.py).
+    """
+
+    # Templates reference a few assets that are not shipped (og-image.png);
+    # fall back to the plain name instead of failing the whole page.
+    manifest_strict = False
+
+    def _save(self, name, content):
+        minify = MINIFIERS.get(os.path.splitext(name)[1].lower())
+        if minify is not None:
+            text = b"".join(content.chunks()).decode("utf-8")
+            content = ContentFile(minify(text).encode("utf-8"))
+        return super()._save(name, content)
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if not dry_run:
+            # CSS is re-hashed over several passes; compress the final names only.
+            for hashed_name in set(self.hashed_files.values()):
+                precompress(self.path(hashed_name))
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            return name
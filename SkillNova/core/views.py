@@ -3,6 +3,7 @@ from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
 from django.http import HttpResponse
 from weasyprint import HTML
+from .db import use_replica
 from .models import Training, Project, Assignment, Enrollment, ProjectCompletion
 from .forms import AssignmentForm,ProjectCompletionForm
 
@@ -116,6 +117,7 @@ def create_order(request):
     return redirect('training_list')
 
 @login_required
+@use_replica
 def dashboard(request):
     enrollments = Enrollment.objects.filter(user=request.user).select_related('training')
     dashboard_data = []
@@ -136,7 +138,6 @@ def dashboard(request):
                 'linkedin': completion.linkedin_link if completion else None
             })
 
-        print(enrollment.progress)
         dashboard_data.append({
             'training': training,
             'progress': enrollment.progress,
@@ -1,52 +1,50 @@
 import os
 import logging
 import atexit
-import time  # For sleep in retry loops
+import math
+import time
+from contextlib import nullcontext
 from datetime import datetime, timedelta, timezone
-from dotenv import load_dotenv
-from flask import Flask, jsonify, render_template, request, session
+from flask import Flask, has_app_context, jsonify, render_template, request, session
 from flask_sqlalchemy import SQLAlchemy
-from apscheduler.schedulers.background import BackgroundScheduler
-# import razorpay
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
+from sqlalchemy.exc import IntegrityError, OperationalError
+
+import certificates
+import lifecycle
+import metrics
+import profiling
+import static_pipeline
+import student_export
+import throttling
+from dispatcher import DueDispatcher
+from idempotency import REGISTERED, REPLAY_HEADER, recent_payments
+from page_cache import PageCache
+from retrying import breaker, retry_scheduler
+from logging_setup import BatchLog, configure_logging
+
+# Heavy or rarely needed modules (dotenv, APScheduler, PIL via certificate_gen,
+# smtplib/email.mime) are imported inside the functions that use them so that
+# importing this module -- i.e. booting a gunicorn worker -- stays cheap.
+# Run benchmarks/startup_importtime.py to track the cold start cost.
 
-from certificate_gen import generate_internship_offer, generate_certificate
 BASE_DIR = os.path.abspath(os.path.dirname(__file__))
-# ------------------------------------------------------------------------------
-# Load environment variables from .env
-# ------------------------------------------------------------------------------
-load_dotenv()
 
 # ------------------------------------------------------------------------------
-# Configure logging
+# Configure logging (JSON lines written by a background queue listener)
 # ------------------------------------------------------------------------------
-logging.basicConfig(level=logging.INFO)
+configure_logging()
 logger = logging.getLogger(__name__)
 
 # ------------------------------------------------------------------------------
-# Initialize SQLAlchemy globally
-# ------------------------------------------------------------------------------
-app = Flask(__name__, static_folder="public_html", template_folder="public_html")
-app.config.update(
-    SECRET_KEY=os.getenv("SECRET_KEY", "fallback-secret"),
-    SQLALCHEMY_DATABASE_URI=os.getenv(
-        "DATABASE_URL", f"sqlite:///{os.path.join(BASE_DIR, 'instance/students.db')}"
-    ),
-    SQLALCHEMY_TRACK_MODIFICATIONS=False,
-    PERMANENT_SESSION_LIFETIME=timedelta(minutes=15),
-    SCHEDULER_API_ENABLED=False,
-    SCHEDULER_ENABLED=True,
-)
-appliction=app
-db = SQLAlchemy(app)
-# ------------------------------------------------------------------------------
-# Production-ready configuration class
+# Initialize SQLAlchemy globally (bound to the app in create_app)
 # ------------------------------------------------------------------------------
+db = SQLAlchemy()
+
+# Rendered bytes of the static template pages (home, form)
+pages = PageCache()
 
 # ------------------------------------------------------------------------------
-# Database model remains unchanged
+# Database model
 # ------------------------------------------------------------------------------
 class Student(db.Model):
     __tablename__ = 'students'
@@ -58,40 +56,65 @@ class Student(db.Model):
     telegram_contact = db.Column(db.String(50))
     whatsapp = db.Column(db.String(50))
     payment_status = db.Column(db.String(20), default='pending')
-    payment_id = db.Column(db.String(100), nullable=False)
+    payment_id = db.Column(db.String(100), nullable=False, unique=True, index=True)  # migration 0004
     created_at = db.Column(db.DateTime, default=datetime.now, index=True)
     internship_start_date = db.Column(db.DateTime)
     internship_duration = db.Column(db.Integer)
     internship_week = db.Column(db.Integer, default=1)
-    last_email_sent = db.Column(db.DateTime, nullable=True)  # NEW FIELD
+    last_email_sent = db.Column(db.DateTime, nullable=True)  # migration 0002
     completion_email_sent = db.Column(db.Boolean, default=False)
     internship_details_email_sent = db.Column(db.Boolean, default=False)
     internship_loi_email_sent = db.Column(db.Boolean, default=False)
+    # Next scheduled email and when it is due (see lifecycle.py); migration 0005
+    lifecycle_state = db.Column(db.String(20), default=lifecycle.PENDING, index=True)
+    next_action_at = db.Column(db.DateTime, nullable=True)  # partial index WHERE next_action_at IS NOT NULL
 
     def __repr__(self):
         return f'<Student {self.email}>'
 
-# ------------------------------------------------------------------------------
-# Flask Application Factory
-# ------------------------------------------------------------------------------
 
-# Initialize database
-with app.app_context():
-    db.create_all()
-    logger.info("Database tables created or verified")
+class Certificate(db.Model):
+    """Issued completion certificates, looked up by /verify (see certificates.py); migration 0006."""
+    __tablename__ = 'certificates'
+
+    id = db.Column(db.Integer, primary_key=True)
+    certificate_id = db.Column(db.String(32), nullable=False, unique=True, index=True)
+    # No foreign key: certificates outlive the students cleanup_old_entries removes.
+    student_id = db.Column(db.Integer, unique=True, index=True)
+    name = db.Column(db.String(100), nullable=False)
+    internship = db.Column(db.String(100), nullable=False)
+    issued_at = db.Column(db.DateTime, nullable=False, default=datetime.now)
 
 # Flask Routes
-@app.route('/')
 def home():
-    logger.info("Home page accessed")
-    return render_template('index.html')
+    logger.debug("Home page accessed")
+    return pages.response('index.html')
 
-@app.route('/form')
 def form():
-    logger.info("Form page accessed")
-    return render_template('form.html')
+    logger.debug("Form page accessed")
+    return pages.response('form.html')
+
+def replayed_registration(payment_id):
+    logger.info(f"Duplicate submission for payment {payment_id}; returning the original result")
+    response = jsonify(REGISTERED)
+    response.headers[REPLAY_HEADER] = "true"
+    return response
+
+def replay_registration(payment_id):
+    """Response for a payment that is already registered (LRU hit or indexed lookup), else None."""
+    if recent_payments.get(payment_id) is None:
+        if db.session.query(Student.id).filter_by(payment_id=payment_id).first() is None:
+            return None
+        recent_payments.put(payment_id, REGISTERED)
+    return replayed_registration(payment_id)
+
+def database_unavailable(db_breaker):
+    """503 + Retry-After; the client can retry safely because /submit is idempotent."""
+    response = jsonify({"status": "error", "message": "Database unavailable, please retry shortly"})
+    response.status_code = 503
+    response.headers["Retry-After"] = str(max(1, math.ceil(db_breaker.retry_after())))
+    return response
 
-@app.route('/submit', methods=['POST'])
 def submit():
     try:
         data = request.json
@@ -103,6 +126,33 @@ def submit():
         email = data.get("email")
         internship_function = data.get("domain")
 
+        from mail_templates import recipient_address
+        try:
+            recipient_address(email)
+        except ValueError:
+            return jsonify({"status": "error", "message": "Invalid email address"}), 400
+
+        # A payment this process has already registered needs no database at all.
+        if payment_id and recent_payments.get(payment_id) is not None:
+            return replayed_registration(payment_id)
+
+        # Fail fast while the database is known to be down.
+        db_breaker = breaker("db")
+        if not db_breaker.allow():
+            return database_unavailable(db_breaker)
+
+        if payment_id:
+            try:
+                replay = replay_registration(payment_id)
+            except OperationalError as e:
+                db.session.rollback()
+                db_breaker.record_failure()
+                logger.error(f"Payment lookup failed: {str(e)}")
+                return database_unavailable(db_breaker)
+            if replay is not None:
+                db_breaker.record_success()
+                return replay
+
         form_data = {
             "name": name,
             "email": email,
@@ -114,281 +164,486 @@ def submit():
             "internship_start_date": datetime.now(),
             "internship_duration": 1
         }
+        form_data.update(lifecycle.initial(form_data["payment_status"], form_data["internship_start_date"]))
 
-        # Save to database with retry logic
-        for attempt in range(3):
+        # One immediate retry on a fresh pooled connection instead of sleeping.
+        for attempt in range(2):
             try:
-                db.session.begin()
                 new_student = Student(**form_data)
                 db.session.add(new_student)
                 db.session.commit()
+                db_breaker.record_success()
                 break
-            except Exception as e:
+            except IntegrityError:
+                # A concurrent request registered the same payment first.
+                db.session.rollback()
+                db_breaker.record_success()
+                replay = replay_registration(payment_id) if payment_id else None
+                if replay is None:
+                    raise
+                return replay
+            except Exception:
                 db.session.rollback()
-                if attempt == 2:
+                db_breaker.record_failure()
+                if attempt == 1:
                     logger.error("Database commit failed after multiple attempts.")
-                    raise e
-                time.sleep(1)
+                    raise
 
+        recent_payments.put(payment_id, REGISTERED)
+        if dispatcher.running:
+            dispatcher.schedule(new_student.id, form_data["next_action_at"])
         send_confirmation_email(email, name, internship_function)
         session.pop('form_data', None)
 
-        return jsonify({"status": "success", "redirect_url": "/thank-you"})
+        return jsonify(REGISTERED)
 
     except Exception as e:
         db.session.rollback()
         logger.error(f"Error processing payment/registration: {str(e)}")
-        return jsonify({"status": "error", "message": str(e)}), 500
+        return jsonify({"status": "error", "message": "Registration failed, please try again"}), 500
 
-@app.route('/thank-you')
 def thank_you():
     return render_template('success.html')
 
-@app.errorhandler(404)
 def page_not_found(error):
     return render_template('404.html'), 404
 
-@app.errorhandler(500)
 def internal_server_error(error):
     return render_template('500.html'), 500
 
 
+# ------------------------------------------------------------------------------
+# Flask Application Factory
+# ------------------------------------------------------------------------------
+def db_upgrade():
+    """Apply pending schema migrations."""
+    from db_migrations import upgrade
+    applied = upgrade(db.engine)
+    logger.info(f"Applied migrations: {applied or 'none'}")
+
+
+def create_app():
+    """
+    Build and configure the Flask application.
+
+    No database DDL happens here; the schema is managed by db_migrations
+    (run `flask --app app db-upgrade` on deploy).
+    """
+    # python-dotenv is only needed for local development; production sets real env vars.
+    dotenv_path = os.path.join(BASE_DIR, ".env")
+    if os.path.isfile(dotenv_path):
+        from dotenv import load_dotenv
+        load_dotenv(dotenv_path)
+
+    app = Flask(__name__, static_folder="public_html", template_folder="public_html")
+    app.config.update(
+        SECRET_KEY=os.getenv("SECRET_KEY", "fallback-secret"),
+        SQLALCHEMY_DATABASE_URI=os.getenv(
+            "DATABASE_URL", f"sqlite:///{os.path.join(BASE_DIR, 'instance/students.db')}"
+        ),
+        SQLALCHEMY_TRACK_MODIFICATIONS=False,
+        PERMANENT_SESSION_LIFETIME=timedelta(minutes=15),
+        SCHEDULER_API_ENABLED=False,
+        SCHEDULER_ENABLED=True,
+    )
+    db.init_app(app)
+
+    app.add_url_rule('/', 'home', home)
+    app.add_url_rule('/form', 'form', form)
+    app.add_url_rule('/submit', 'submit', submit, methods=['POST'])
+    app.add_url_rule('/thank-you', 'thank_you', thank_you)
+    app.register_error_handler(404, page_not_found)
+    app.register_error_handler(500, internal_server_error)
+    throttling.init_app(app, db)
+
+    app.cli.command("db-upgrade")(db_upgrade)
+    metrics.init_app(app)
+    profiling.init_app(app)
+    static_pipeline.init_app(app)
+    student_export.init_app(app, db, Student)
+    certificates.registry.init_app(app, db, Certificate)
+    return app
+
+
+app = create_app()
+appliction = app
+
+
 # ------------------------------------------------------------------------------
 # Email sending with improved reliability (retry logic)
 # ------------------------------------------------------------------------------
-def send_email(to_email, subject, body, attachment_paths=None):
+def build_message(sender_email, to_email, subject, body, attachment_paths=None):
+    """
+    Builds the MIME message for an ad-hoc email. Templated emails use
+    mail_templates.MessageBuilder instead.
+    """
+    from email.mime.text import MIMEText
+    from email.mime.multipart import MIMEMultipart
+    from mail_templates import recipient_address
+
+    message = MIMEMultipart()
+    message["From"] = sender_email
+    message["To"] = recipient_address(to_email)
+    message["Subject"] = subject
+    message.attach(MIMEText(body, "plain"))
+
+    # Handle attachments (supports single path or list of paths)
+    if attachment_paths:
+        attachments = attachment_paths if isinstance(attachment_paths, list) else [attachment_paths]
+        for attachment_path in attachments:
+            if attachment_path and os.path.isfile(attachment_path):
+                with open(attachment_path, "rb") as f:
+                    file_data = f.read()
+                attachment = MIMEText(file_data, "base64", _charset="utf-8")
+                attachment.add_header('Content-Disposition', 'attachment', filename=os.path.basename(attachment_path))
+                message.attach(attachment)
+    return message
+
+def smtp_credentials():
+    sender_email = os.getenv("EMAIL_USER")
+    password = os.getenv("EMAIL_PASSWORD")
+
+    if not sender_email or not password:
+        raise ValueError("Missing email credentials (EMAIL_USER, EMAIL_PASSWORD)")
+    return sender_email, password
+
+def smtp_target():
+    return os.getenv("SMTP_SERVER", "smtp.gmail.com"), int(os.getenv("SMTP_PORT", 587))
+
+def smtp_transient(exc):
+    """Connection problems and 4xx replies are worth retrying; 5xx (e.g. a rejected address) are not."""
+    import smtplib
+
+    if isinstance(exc, smtplib.SMTPRecipientsRefused):
+        return all(400 <= code < 500 for code, _ in exc.recipients.values())
+    if isinstance(exc, smtplib.SMTPResponseException):
+        return 400 <= exc.smtp_code < 500
+    if isinstance(exc, smtplib.SMTPException):
+        return isinstance(exc, smtplib.SMTPServerDisconnected)
+    return isinstance(exc, OSError)
+
+def send_smtp(to_email, message):
     """
-    Sends an email via SMTP with a retry loop.
+    One SMTP delivery attempt of a prepared message (an email.message.Message
+    or raw bytes from mail_templates.MessageBuilder).
     """
+    import smtplib
+
+    sender_email, password = smtp_credentials()
+    smtp_server, smtp_port = smtp_target()
+    # Only disabled for the local SMTP sink (smtp_sink.py) used in benchmarks.
+    use_starttls = os.getenv("SMTP_STARTTLS", "true").lower() != "false"
+
     try:
-        sender_email = os.getenv("EMAIL_USER")
-        password = os.getenv("EMAIL_PASSWORD")
-
-        if not sender_email or not password:
-            raise ValueError("Missing email credentials (EMAIL_USER, EMAIL_PASSWORD)")
-
-        # Construct message
-        message = MIMEMultipart()
-        message["From"] = sender_email
-        message["To"] = to_email
-        message["Subject"] = subject
-        message.attach(MIMEText(body, "plain"))
-
-        # Handle attachments (supports single path or list of paths)
-        if attachment_paths:
-            attachments = attachment_paths if isinstance(attachment_paths, list) else [attachment_paths]
-            for attachment_path in attachments:
-                if attachment_path and os.path.isfile(attachment_path):
-                    with open(attachment_path, "rb") as f:
-                        file_data = f.read()
-                    attachment = MIMEText(file_data, "base64", _charset="utf-8")
-                    attachment.add_header('Content-Disposition', 'attachment', filename=os.path.basename(attachment_path))
-                    message.attach(attachment)
-
-        smtp_server = os.getenv("SMTP_SERVER", "smtp.gmail.com")
-        smtp_port = int(os.getenv("SMTP_PORT", 587))
-
-        max_attempts = 3
-        for attempt in range(max_attempts):
-            try:
-                with smtplib.SMTP(smtp_server, smtp_port) as server:
-                    server.starttls()
-                    server.login(sender_email, password)
+        connect_start = time.perf_counter()
+        with throttling.smtp_inflight, smtplib.SMTP(smtp_server, smtp_port) as server:
+            if use_starttls:
+                server.starttls()
+            server.login(sender_email, password)
+            metrics.smtp_connect_duration.observe(time.perf_counter() - connect_start)
+            with metrics.smtp_send_duration.time():
+                if isinstance(message, bytes):
+                    server.sendmail(sender_email, [to_email], message)
+                else:
                     server.send_message(message)
-                logger.info(f"Email sent to {to_email}")
-                break  # Break out of loop on success
-            except Exception as e:
-                logger.error(f"Attempt {attempt + 1}: Email failed to {to_email}: {str(e)}")
-                if attempt == max_attempts - 1:
-                    raise
-                time.sleep(2)
-    except Exception as e:
-        logger.error(f"Final failure sending email to {to_email}: {str(e)}")
+    except Exception:
+        metrics.smtp_retries.inc()
         raise
+    logger.debug(f"Email sent to {to_email}")
+    metrics.emails.inc(result="sent")
 
-def send_confirmation_email(email, name, internship_function):
+def deliver_email(to_email, message, on_sent=None, key=None):
     """
-    Sends a registration confirmation email.
+    Delivers a prepared message via SMTP without blocking on retries.
+
+    One attempt is made inline. Transient failures are retried in the
+    background by retrying.retry_scheduler (exponential backoff, circuit
+    breaker per SMTP server) instead of sleeping here. Returns True if the
+    message went out now, False if it was deferred; ``on_sent()`` runs once
+    it is actually sent either way. Permanent failures raise.
     """
-    subject = "Internship Registration Successful."
-    body = f""" 
-    Dear {name},
+    smtp_server, smtp_port = smtp_target()
+    delivered = retry_scheduler.run(
+        lambda: send_smtp(to_email, message),
+        key=key,
+        target=f"smtp:{smtp_server}:{smtp_port}",
+        is_transient=smtp_transient,
+        on_success=lambda _: on_sent() if on_sent is not None else None,
+        on_giveup=lambda exc: metrics.emails.inc(result="failed"),
+    )
+    if not delivered:
+        logger.info(f"Email to {to_email} deferred for retry")
+        metrics.emails.inc(result="deferred")
+    return delivered
 
-    Congratulations! Your registration for the {internship_function} at SkillNova has been successfully received.
+def student_update(student_id, **changes):
+    """
+    ``on_sent`` callback for deliver_email: apply ``changes`` to a student once
+    the email has gone out (possibly later, from a retry thread).
+    """
+    def apply():
+        with (nullcontext() if has_app_context() else app.app_context()):
+            db.session.query(Student).filter_by(id=student_id).update(changes, synchronize_session="fetch")
+            db.session.commit()
+        if "next_action_at" in changes:
+            dispatcher.schedule(student_id, changes["next_action_at"])
+    return apply
 
-    Our team will review your application, and we will get back to you shortly with the next steps. 
-    Please keep an eye on your inbox for further updates.
+def send_email(to_email, subject, body, attachment_paths=None):
+    """
+    Sends an email via SMTP (see deliver_email for retries).
+    """
+    try:
+        sender_email, _ = smtp_credentials()
+        message = build_message(sender_email, to_email, subject, body, attachment_paths)
+        return deliver_email(to_email, message)
+    except Exception as e:
+        logger.error(f"Final failure sending email to {to_email}: {str(e)}")
+        raise
 
-    If you have any questions in the meantime, feel free to reach out to us at contact.skillnova@gmail.com.
+def send_templated_email(template, to_email, shared_attachments=None, attachment_paths=None,
+                         on_sent=None, key=None, **context):
+    """
+    Renders an email_templates/ template for one recipient and sends it.
 
-    Looking forward to having you on board!
+    ``shared_attachments`` are the same for every recipient of the template and
+    are encoded once per process; ``attachment_paths`` are per-recipient.
+    """
+    from mail_templates import get_builder
 
-    Best regards,
-    SkillNova
-    contact.skillnova@gmail.com 
-"""
-    send_email(email, subject, body)
+    try:
+        sender_email, _ = smtp_credentials()
+        builder = get_builder(template, sender_email, shared_attachments)
+        message = builder.build(to_email, attachment_paths=attachment_paths, **context)
+        return deliver_email(to_email, message, on_sent=on_sent, key=key)
+    except Exception as e:
+        logger.error(f"Final failure sending email to {to_email}: {str(e)}")
+        raise
 
-def send_internship_details_email(email, name, internship_function):
+def send_confirmation_email(email, name, internship_function):
+    """
+    Sends a registration confirmation email.
+    """
+    return send_templated_email("confirmation", email, name=name, internship_function=internship_function)
+
+INTERNSHIP_PDFS = {
+    "Web Development": "web-dev.pdf",
+    "Android App Development": "",
+    "Data Science": "data-science.pdf",
+    "Java Programming": "java-prog.pdf",
+    "Python Programming": "Python.pdf",
+    "C++ Programming": "c++prog.pdf",
+    "UI/UX Design": "ui-ux.pdf",
+    "Artificial Intelligence": "ai.pdf",
+    "Machine Learning": "ML.pdf"
+}
+
+def send_internship_details_email(email, name, internship_function, on_sent=None, key=None):
     """
     Sends internship details email (with attached PDF) after a delay.
     """
-    pdf_path_dir = {
-        "Web Development": "web-dev.pdf",
-        "Android App Development": "",
-        "Data Science": "data-science.pdf",
-        "Java Programming": "java-prog.pdf",
-        "Python Programming": "Python.pdf",
-        "C++ Programming": "c++prog.pdf",
-        "UI/UX Design": "ui-ux.pdf",
-        "Artificial Intelligence": "ai.pdf",
-        "Machine Learning": "ML.pdf"
-    }
-    
-    subject = "SkillNova Virtual Internship - Detailed Instructions"
-    body = f"""Dear {name},
-
-        Congratulations! 🎉 Your registration for the SkillNova Virtual Internship Program has been successfully confirmed. We are excited to have you on board and look forward to helping you gain hands-on experience in your chosen domain.
-
-        Internship Details:
-        ✅ Internship Mode: 100% Virtual
-        ✅ Duration: 4 Week
-        ✅ Domain: {internship_function}
-        ✅ Work Structure: Weekly Assignments & Real-World Projects
-        ✅ Guidance & Mentorship: Support from industry professionals
-        ✅ Certificate of Completion: Upon successful completion of the program
-
-        Your Learning Experience:
-        During this internship, you will:
-        🔹 Work on structured assignments tailored to {internship_function}
-        🔹 Gain hands-on experience with real-world projects
-        🔹 Develop industry-relevant skills to enhance your career prospects
-        🔹 Receive guidance from experienced mentors
-
-        Project & Assignment Details:
-        Attached to this email, you will find a PDF containing details of the projects and assignments you will be working on during the internship.
-
-        📌 Weekly Tasks:
-        Every week, you will receive a new assignment along with project submission links.
-        Assignments and projects must be completed within the given deadlines.
-        Submission links will be shared with you via email on a weekly basis.
-
-        Please download and review the attached project document carefully. 
-        If you have any queries, feel free to reach out to us at contact.skillnova@gmail.com or reply to this email.
-
-        We look forward to seeing you grow and succeed in this program! 🚀
-
-        Best Regards,
-        SkillNova Team
-        www.skillnovatech.in
-        contact.skillnova@gmail.com
-        """
-
-    internship = pdf_path_dir.get(internship_function, "")
+    internship = INTERNSHIP_PDFS.get(internship_function, "")
     pdf_path = os.path.join(BASE_DIR, 'Task_pdf', internship) if internship else None
-    send_email(
-        to_email=email,
-        subject=subject,
-        body=body,
-        attachment_paths=pdf_path
+    return send_templated_email(
+        "internship_details", email,
+        shared_attachments=pdf_path, on_sent=on_sent, key=key,
+        name=name, internship_function=internship_function
     )
 
-def send_internship_loi_email(email, name, internship_function):
+def send_internship_loi_email(email, name, internship_function, on_sent=None, key=None):
     """
     Sends an internship offer letter email.
     """
-    subject = "SkillNova Virtual Internship - Offer Letter"
-    body = f"""Dear {name},
-
-        Congratulations on your registration for the SkillNova Virtual Internship Program.
-        Please find attached your Offer Letter for the internship in {internship_function}.
+    from certificate_gen import generate_internship_offer
 
-        Best Regards,
-        SkillNova Team
-        contact.skillnova@gmail.com
-"""
     generate_internship_offer(name=name, internship=internship_function)
     attachment_path = os.path.join(BASE_DIR, 'gen_certificate/generated_Internship_Offer_Letter.jpg')
-    send_email(
-        to_email=email,
-        subject=subject,
-        body=body,
-        attachment_paths=attachment_path
+    return send_templated_email(
+        "internship_loi", email,
+        attachment_paths=attachment_path, on_sent=on_sent, key=key,
+        name=name, internship_function=internship_function
     )
 
 # ------------------------------------------------------------------------------
 # Scheduled Tasks
 # ------------------------------------------------------------------------------
 
-def send_weekly_emails():
-    """Send weekly internship emails to students with a paid status, ensuring a one-week gap."""
-    
-    week_tasks = {
-        "Web Development": ["https://docs.google.com/forms/d/e/1FAIpQLScheF-rGdySwRWrg-ARZoxUi1ncwrYnLdWtua3nx9U3TfNocg/viewform","","",""],
-        "Android App Development": ["https://docs.google.com/forms/d/e/1FAIpQLSeojl8IdBaergAV62-sEYboyDssugt86WvjOJZGZUdPkhKT7A/viewform","","",""],
-        "Data Science": ["https://docs.google.com/forms/d/e/1FAIpQLSeMHIkZ1MDPsGSgHyA6waUw4xvnnNj9C-rb1qAcUhdjboeubA/viewform","","",""],
-        "Java Programming": ["","","",""],
-        "Python Programming": ["https://docs.google.com/forms/d/e/1FAIpQLSc0POGnXXdgBoJwry0c5zMT3cHJ5NFaZQB2pi4Iv3n55kS-jA/viewform","","",""],
-        "C++ Programming": ["https://docs.google.com/forms/d/e/1FAIpQLSdoIrEig_S3hcppQcLn1DJe2BN7n7JTzTyJMLDmZYQOlmE5oA/viewform","","",""],
-        "UI/UX Design": ["","","",""],
-        "Artificial Intelligence": ["https://docs.google.com/forms/d/e/1FAIpQLSexkJ8XfsKvrDs3RIhAU0T6Om-urNKLERXSPUBKiN3YoNbMDg/viewform","","",""],
-        "Machine Learning": ["https://docs.google.com/forms/d/e/1FAIpQLSeImUGzaT735c9aDF6g_XYEz35kVf8KGk2CCzDXYWIBeOgFqA/viewform","","",""]
-    }
-    
-    with app.app_context():
-        try:
-            students = Student.query.filter_by(payment_status="paid").all()
-            now = datetime.now()
-
-            for student in students:
-                if student.internship_week > 4:  # Prevent sending emails beyond week 4
-                    logger.info(f"Skipping {student.email}: Internship completed.")
-                    continue  
+def due_students(now, student_ids=None):
+    """Students whose next lifecycle step is due: a range scan of ix_students_next_action_at."""
+    query = Student.query.filter(Student.next_action_at <= now)
+    if student_ids is not None:
+        query = query.filter(Student.id.in_(student_ids))
+    return query.order_by(Student.next_action_at).all()
 
-                # Check if at least 7 days have passed since the last email
-                if student.last_email_sent and (now - student.last_email_sent).days < 6:
-                    logger.info(f"Skipping {student.email}: Less than 7 days since the last email.")
-                    continue  
 
-                subject = "Weekly Internship Update"
-                task_details = week_tasks[student.internship_function][student.internship_week-1]
-
-                body = f"Hi {student.name},\n\nHere are your tasks for {task_details}."
-
-                send_email(student.email, subject, body)
-                logger.info(f"Sent email to {student.email} for {task_details}")
-
-                # Update internship week and last email timestamp
-                student.internship_week += 1
-                student.last_email_sent = now
-                db.session.commit()
+def load_due_students(until):
+    """(id, next_action_at) of students due before ``until``, for the dispatcher."""
+    with app.app_context():
+        return [tuple(row) for row in db.session.query(Student.id, Student.next_action_at)
+                .filter(Student.next_action_at < until).all()]
 
-        except Exception as e:
-            logger.error(f"Error in send_weekly_emails: {str(e)}", exc_info=True)
 
+def postpone_student(student_id, state, now):
+    """
+    Try a step that is due but was not sent (skipped, failed or waiting on SMTP
+    retries) again after lifecycle.STALLED_RETRY -- unless the student moved
+    on meanwhile, e.g. a deferred email that has gone out since.
 
-def send_completion_emails():
-    with app.app_context():
+    The guard is "still in ``state`` and still due", not equality with the
+    due time that was read: a timestamp written by SQL (migration backfills)
+    is not stored in the text form SQLAlchemy binds on SQLite.
+    """
+    retry_at = now + lifecycle.STALLED_RETRY
+    moved = db.session.query(Student).filter(
+        Student.id == student_id,
+        Student.lifecycle_state == state,
+        Student.next_action_at <= now,
+    ).update({"next_action_at": retry_at}, synchronize_session=False)
+    db.session.commit()
+    if moved:
+        dispatcher.schedule(student_id, retry_at)
+
+
+def send_offer_letter_step(student, now, batch):
+    sent = send_internship_loi_email(
+        student.email, student.name, student.internship_function, key=f"loi:{student.id}",
+        on_sent=student_update(student.id, **lifecycle.after_offer_letter(student.internship_start_date)))
+    if sent:
+        batch.record("sent", f"Sent offer letter to {student.email}")
+    else:
+        batch.record("deferred", f"Offer letter to {student.email} deferred for retry")
+    return sent
+
+
+def send_details_step(student, now, batch):
+    sent = send_internship_details_email(
+        student.email, student.name, student.internship_function, key=f"details:{student.id}",
+        on_sent=student_update(student.id, **lifecycle.after_details(student.internship_start_date)))
+    if sent:
+        batch.record("sent", f"Sent internship details to {student.email}")
+    else:
+        batch.record("deferred", f"Internship details to {student.email} deferred for retry")
+    return sent
+
+
+def send_weekly_step(student, now, batch):
+    """Send this week's task to a student, ensuring a gap of at least six days."""
+    from mail_templates import get_builder
+    from task_catalog import weekly_tasks
+
+    catalog = weekly_tasks.refresh()
+    total_weeks = catalog.weeks(student.internship_function)
+    if not total_weeks:
+        batch.record("skipped_unknown_domain",
+                     f"Skipping {student.email}: no weekly tasks for '{student.internship_function}'.",
+                     logging.WARNING)
+        return False
+
+    if student.internship_week > total_weeks:  # The catalog lost weeks: nothing left to send
+        student_update(student.id, **lifecycle.weeks_finished(student.internship_start_date,
+                                                              student.internship_duration))()
+        batch.record("skipped_completed", f"Skipping {student.email}: Internship completed.")
+        return False
+
+    task_details = catalog.get(student.internship_function, student.internship_week)
+    if task_details is None:
+        batch.record("skipped_missing_task",
+                     f"Skipping {student.email}: no task for week {student.internship_week}.",
+                     logging.WARNING)
+        return False
+
+    # One shared template/MIME skeleton for the whole batch.
+    builder = get_builder("weekly", smtp_credentials()[0])
+    message = builder.build(student.email, name=student.name, task_details=task_details)
+    # Week, timestamp and state advance only once the email is actually sent.
+    sent = deliver_email(student.email, message, key=f"weekly:{student.id}", on_sent=student_update(
+        student.id, internship_week=Student.internship_week + 1, last_email_sent=now,
+        **lifecycle.after_weekly(student.internship_start_date, student.internship_duration,
+                                 student.internship_week, total_weeks, now)))
+    if sent:
+        batch.record("sent", f"Sent email to {student.email} for {task_details}")
+    else:
+        batch.record("deferred", f"Email to {student.email} deferred for retry")
+    return sent
+
+
+def send_completion_step(student, now, batch):
+    from certificate_gen import generate_certificate
+    from mail_templates import get_builder
+
+    builder = get_builder("completion", smtp_credentials()[0])
+    certificate_id = certificates.registry.issue(student)
+    generate_certificate(name=student.name, internship=student.internship_function, certificate_id=certificate_id)
+    certificate_path = os.path.join(BASE_DIR, 'gen_certificate/generated_certificate.jpg')
+    message = builder.build(student.email, attachment_paths=certificate_path, name=student.name)
+    sent = deliver_email(student.email, message, key=f"completion:{student.id}",
+                         on_sent=student_update(student.id, **lifecycle.after_completion()))
+    if sent:
+        batch.record("sent", f"Sent completion email to {student.email}")
+    else:
+        batch.record("deferred", f"Completion email to {student.email} deferred for retry")
+    return sent
+
+
+# lifecycle state -> (retry key prefix, step)
+LIFECYCLE_STEPS = {
+    lifecycle.OFFER_LETTER: ("loi", send_offer_letter_step),
+    lifecycle.DETAILS: ("details", send_details_step),
+    lifecycle.WEEKLY: ("weekly", send_weekly_step),
+    lifecycle.COMPLETION: ("completion", send_completion_step),
+}
+
+
+@metrics.track_job("due_emails")
+def send_due_emails(student_ids=None):
+    """
+    Send every lifecycle email that is due (offer letter, details, weekly task,
+    completion), found with one indexed range query instead of a table scan
+    per email type. The dispatcher passes the ``student_ids`` it woke up for.
+
+    A step sent right away can make the next one due immediately (a student
+    registered yesterday gets the offer letter, the details and the first
+    weekly task in the same run), so the query is repeated until a pass finds
+    no (student, state) it has not already handled.
+    """
+    with app.app_context(), BatchLog(logger, "due_emails") as batch:
         try:
-            now = datetime.now()
-            students = Student.query.filter_by(payment_status='paid', completion_email_sent=False).all()
-            for student in students:
-                if student.internship_start_date:
-                    end_date = student.internship_start_date + timedelta(days=28 * student.internship_duration)
-                    if now >= end_date:
-                        subject = "Internship Completion Certificate"
-                        body = f"Congratulations {student.name}!\n\nYou've successfully completed your internship."
-                        generate_certificate(name=student.name, internship=student.internship_function)
-                        send_email(
-                            student.email, subject, body,
-                            attachment_paths= os.path.join(BASE_DIR, 'gen_certificate/generated_certificate.jpg')
-                        )
-                        student.completion_email_sent = True
-                        db.session.commit()
+            handled = set()
+            while True:
+                now = datetime.now()
+                students = [s for s in due_students(now, student_ids) if (s.id, s.lifecycle_state) not in handled]
+                if not students:
+                    break
+                for student in students:
+                    student_id, state = student.id, student.lifecycle_state
+                    handled.add((student_id, state))
+                    sent = False
+                    step = LIFECYCLE_STEPS.get(state)
+                    if step is None:
+                        batch.record("skipped_unknown_state",
+                                     f"Skipping {student.email}: nothing to send in state '{state}'.",
+                                     logging.WARNING)
+                    elif retry_scheduler.pending(f"{step[0]}:{student_id}"):
+                        batch.record("skipped_retry_pending",
+                                     f"Skipping {student.email}: previous email still retrying.")
+                    else:
+                        try:
+                            sent = step[1](student, now, batch)
+                        except Exception as e:
+                            # One bad recipient must not abort the rest of the batch.
+                            db.session.rollback()
+                            batch.record("failed", f"{state} email failed for {student.email}: {str(e)}",
+                                         logging.ERROR)
+                    if not sent:
+                        postpone_student(student_id, state, now)
         except Exception as e:
-            logger.error(f"Completion emails failed: {str(e)}")
+            logger.error(f"Error in send_due_emails: {str(e)}", exc_info=True)
+    return batch.counts["sent"]
+
 
+@metrics.track_job("cleanup")
 def cleanup_old_entries():
+    processed = 0
     with app.app_context():
         try:
             two_months_ago = datetime.now(timezone.utc) - timedelta(days=60)
@@ -396,85 +651,42 @@ def cleanup_old_entries():
             for student in old_students:
                 db.session.delete(student)
             db.session.commit()
-            logger.info("Old student entries have been cleaned up.")
+            processed = len(old_students)
+            logger.info("Old student entries have been cleaned up.", extra={"deleted": processed})
         except Exception as e:
             logger.error(f"Cleanup failed: {str(e)}")
             db.session.rollback()
+    return processed
 
-def send_internship_details_if_due():
-    with app.app_context():
-        try:
-            now = datetime.now()
-            students = Student.query.filter_by(payment_status='paid', internship_details_email_sent=False).all()
-            for student in students:
-                if student.internship_start_date:
-                    due_time = student.internship_start_date + timedelta(hours=10)
-                    if now >= due_time:
-                        send_internship_details_email(student.email, student.name, student.internship_function)
-                        student.internship_details_email_sent = True
-                        db.session.commit()
-        except Exception as e:
-            logger.error(f"Error in send_internship_details_if_due: {str(e)}")
-
-def send_internship_loi_if_due():
-    with app.app_context():
-        try:
-            now = datetime.now()
-            students = Student.query.filter_by(payment_status='paid', internship_loi_email_sent=False).all()
-            for student in students:
-                if student.internship_start_date:
-                    due_time = student.internship_start_date + timedelta(seconds=40)
-                    if now >= due_time:
-                        send_internship_loi_email(student.email, student.name, student.internship_function)
-                        student.internship_loi_email_sent = True
-                        db.session.commit()
-        except Exception as e:
-            logger.error(f"Error in send_internship_loi_if_due: {str(e)}")
 
+scheduler = None
+dispatcher = DueDispatcher(load_due_students, profiling.wrap_job('due_emails', send_due_emails))
 
 
 def start_scheduler():
     """
-    Purpose: 
+    Start the due-work dispatcher, then create the background scheduler,
+    register the cron jobs and start it.
     """
+    global scheduler
+    from apscheduler.schedulers.background import BackgroundScheduler
+
+    scheduler = BackgroundScheduler()
     if app.config["SCHEDULER_ENABLED"]:
-        scheduler.add_job(
-            id='send_internship_details_if_due',
-            func=send_internship_details_if_due,
-            trigger='cron',
-            hour=18,  # 6:30 PM UTC = Midnight IST
-            minute=30
-        )
-        scheduler.add_job(
-            id='send_internship_loi_if_due',
-            func=send_internship_loi_if_due,
-            trigger='cron',
-            hour=18,
-            minute=30
-        )
-        scheduler.add_job(
-            id='weekly_emails',
-            func=send_weekly_emails,
-            trigger='cron',
-            hour=18,
-            minute=30
-        )
+        # Lifecycle emails go out at their due time, not in a daily sweep.
+        dispatcher.start()
+        atexit.register(dispatcher.stop)
         scheduler.add_job(
             id='cleanup',
-            func=cleanup_old_entries,
+            func=profiling.wrap_job('cleanup', cleanup_old_entries),
             trigger='cron',
             day=1,
-            hour=18,
-            minute=30
-        )
-        scheduler.add_job(
-            id='completion_emails',
-            func=send_completion_emails,
-            trigger='cron',
-            hour=18,
+            hour=18,  # 6:30 PM UTC = Midnight IST
             minute=30
         )
         scheduler.start()
+        atexit.register(lambda: scheduler.shutdown())
+    return scheduler
 # end def
 
 
@@ -482,10 +694,13 @@ def start_scheduler():
 # Main Entry Point
 # ------------------------------------------------------------------------------
 if __name__ == '__main__':
-    scheduler = BackgroundScheduler()
-    if app.config["SCHEDULER_ENABLED"]:
+    from db_migrations import upgrade
+    with app.app_context():
+        upgrade(db.engine)
+
+    # With debug=True the reloader runs this block in a watcher process and in
+    # the serving child; only the child (WERKZEUG_RUN_MAIN) may start the
+    # dispatcher, since two dispatchers would send every due email twice.
+    if app.config["SCHEDULER_ENABLED"] and os.environ.get("WERKZEUG_RUN_MAIN") == "true":
         start_scheduler()  # Function to add jobs and start scheduler
     app.run(debug=True)
-    atexit.register(lambda: scheduler.shutdown())
-
-
@@ -0,0 +1,376 @@
+"""
+Async variant of the registration API (ASGI).
+
+Serves ``POST /submit`` with the same request/response contract as the Flask
+view in ``app.py``, but every slow step is a non-blocking await:
+
+- the ``students`` insert goes through SQLAlchemy's asyncio engine
+  (aiosqlite for SQLite, asyncpg for PostgreSQL);
+- the confirmation email is put on an in-process outbox queue and delivered by
+  a small pool of aiosmtplib workers, so the response never waits on SMTP.
+  Transient SMTP failures are retried like the sync path's (retrying.py): the
+  same exponential ``Backoff`` and per-SMTP-server ``CircuitBreaker``, with
+  the retry scheduled on the event loop instead of sleeping in a worker.
+
+One event loop can therefore hold thousands of in-flight registrations; the DB
+pool and outbox size bound how much work is actually in progress. The same
+limits as the Flask app apply (throttling.py): per-IP (the client address
+resolved with TRUSTED_PROXY_HOPS) and global rate limits answer 429, and a
+full outbox or DB pool answers 503 with Retry-After instead of queueing more
+work.
+
+Run with:
+    uvicorn async_app:app --workers 2
+
+Compare against the sync path with benchmarks/registration_load.py.
+"""
+import asyncio
+import json
+import logging
+import os
+import time
+from datetime import datetime
+
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import create_async_engine
+
+import lifecycle
+import metrics
+import throttling
+from app import BASE_DIR, Student, smtp_credentials, smtp_target
+from idempotency import REGISTERED, REPLAY_HEADER, recent_payments
+from mail_templates import get_builder, recipient_address
+from retrying import Backoff, CircuitOpenError, breaker
+
+logger = logging.getLogger(__name__)
+
+# ------------------------------------------------------------------------------
+# Configuration
+# ------------------------------------------------------------------------------
+DB_POOL_SIZE = int(os.getenv("ASYNC_DB_POOL_SIZE", 20))
+OUTBOX_MAXSIZE = int(os.getenv("ASYNC_OUTBOX_MAXSIZE", 10000))
+OUTBOX_WORKERS = int(os.getenv("ASYNC_OUTBOX_WORKERS", 8))
+
+# Same body as the Flask view's 500: never echo driver or SQL errors to clients.
+REGISTRATION_FAILED = {"status": "error", "message": "Registration failed, please try again"}
+
+
+def async_database_url(url):
+    """Map the sync DATABASE_URL used by app.py onto its asyncio driver."""
+    if url.startswith("sqlite:"):
+        return url.replace("sqlite:", "sqlite+aiosqlite:", 1)
+    if url.startswith(("postgres://", "postgresql://", "postgresql+psycopg2://")):
+        return "postgresql+asyncpg://" + url.split("://", 1)[1]
+    return url
+
+
+# ------------------------------------------------------------------------------
+# Email outbox (asyncio queue drained by aiosmtplib workers)
+# ------------------------------------------------------------------------------
+def smtp_transient(exc):
+    """aiosmtplib counterpart of app.smtp_transient: connection problems and 4xx replies."""
+    import aiosmtplib
+
+    if isinstance(exc, aiosmtplib.SMTPRecipientsRefused):
+        return all(400 <= refused.code < 500 for refused in exc.recipients)
+    if isinstance(exc, aiosmtplib.SMTPResponseException):
+        return 400 <= exc.code < 500
+    # Connect, disconnect and timeout errors are OSErrors too.
+    return isinstance(exc, OSError)
+
+
+class OutboxMail:
+    def __init__(self, to_email, template, context):
+        self.to_email = to_email
+        self.template = template
+        self.context = context
+        self.attempt = 0
+
+
+class MailOutbox:
+    def __init__(self, workers=OUTBOX_WORKERS, maxsize=OUTBOX_MAXSIZE, backoff=None):
+        self.queue = asyncio.Queue(maxsize=maxsize)
+        self.workers = workers
+        self.backoff = backoff or Backoff()
+        self._tasks = []
+        self._retries = set()
+
+    async def start(self):
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        # Deliver what is already queued before shutting down.
+        await self.queue.join()
+        if self._retries:
+            logger.warning(f"Shutting down with {len(self._retries)} emails waiting for a retry")
+        for task in (*self._tasks, *self._retries):
+            task.cancel()
+        await asyncio.gather(*self._tasks, *self._retries, return_exceptions=True)
+
+    async def enqueue(self, to_email, template, **context):
+        """Queue a templated email; only waits if the outbox is full (backpressure)."""
+        await self.queue.put(OutboxMail(to_email, template, context))
+
+    async def _worker(self):
+        while True:
+            mail = await self.queue.get()
+            try:
+                await self._attempt(mail)
+            except Exception as e:
+                logger.error(f"Final failure sending email to {mail.to_email}: {str(e)}")
+                metrics.emails.inc(result="failed")
+            finally:
+                self.queue.task_done()
+
+    async def _attempt(self, mail):
+        """
+        One delivery attempt. A transient failure schedules the next attempt
+        after the backoff delay (or until the breaker lets a probe through)
+        and frees the worker; permanent failures and the last attempt raise.
+        """
+        smtp_server, smtp_port = smtp_target()
+        target = f"smtp:{smtp_server}:{smtp_port}"
+        circuit = breaker(target)
+        mail.attempt += 1
+        try:
+            if not circuit.allow():
+                raise CircuitOpenError(f"circuit {target} is open")
+            await self._send(mail, smtp_server, smtp_port)
+        except Exception as exc:
+            open_circuit = isinstance(exc, CircuitOpenError)
+            transient = open_circuit or smtp_transient(exc)
+            if transient and not open_circuit:
+                circuit.record_failure()
+            elif not open_circuit:
+                circuit.release_probe()
+            if not transient or mail.attempt >= self.backoff.max_attempts:
+                raise
+            delay = max(self.backoff.delay(mail.attempt), circuit.retry_after())
+            if not open_circuit:
+                logger.warning(f"Attempt {mail.attempt}: email to {mail.to_email} failed: {exc}; "
+                               f"retrying in {delay:.1f}s")
+            metrics.retries_scheduled.inc(target=target)
+            task = asyncio.create_task(self._retry_later(mail, delay))
+            self._retries.add(task)
+            task.add_done_callback(self._retries.discard)
+            return
+        circuit.record_success()
+        metrics.emails.inc(result="sent")
+
+    async def _retry_later(self, mail, delay):
+        await asyncio.sleep(delay)
+        await self.queue.put(mail)
+
+    async def _send(self, mail, smtp_server, smtp_port):
+        import aiosmtplib
+
+        sender_email, password = smtp_credentials()
+        message = get_builder(mail.template, sender_email).build(mail.to_email, **mail.context)
+        await aiosmtplib.send(
+            message,
+            sender=sender_email,
+            recipients=[mail.to_email],
+            hostname=smtp_server,
+            port=smtp_port,
+            start_tls=os.getenv("SMTP_STARTTLS", "true").lower() != "false",
+            username=sender_email,
+            password=password,
+        )
+        logger.info(f"Email sent to {mail.to_email}")
+
+
+# ------------------------------------------------------------------------------
+# Application state
+# ------------------------------------------------------------------------------
+engine = None
+outbox = None
+rate_limiter = None
+submit_limits = ()
+
+
+async def startup():
+    global engine, outbox, rate_limiter, submit_limits
+    from limits import parse
+    from limits.storage import storage_from_string
+    from limits.strategies import FixedWindowRateLimiter
+
+    url = os.getenv("DATABASE_URL", f"sqlite:///{os.path.join(BASE_DIR, 'instance/students.db')}")
+    options = {} if url.startswith("sqlite:") else {"pool_size": DB_POOL_SIZE, "pool_pre_ping": True}
+    engine = create_async_engine(async_database_url(url), **options)
+    outbox = MailOutbox()
+    await outbox.start()
+    # memory:// by default; the sqlite store works too but blocks the loop briefly per check.
+    rate_limiter = FixedWindowRateLimiter(storage_from_string(throttling.storage_uri()))
+    submit_limits = (
+        (parse(throttling.SUBMIT_RATE_LIMIT), None),
+        (parse(throttling.SUBMIT_GLOBAL_RATE_LIMIT), "global"),
+    )
+    logger.info("Async registration API started")
+
+
+async def shutdown():
+    await outbox.stop()
+    await engine.dispose()
+
+
+# ------------------------------------------------------------------------------
+# Handlers
+# ------------------------------------------------------------------------------
+def rejection(client_ip):
+    """(status, payload, retry_after) if the request must be refused, else None."""
+    for item, key in submit_limits:
+        if not rate_limiter.hit(item, "submit", key or client_ip):
+            metrics.rate_limited.inc(limit=str(item))
+            reset_at = rate_limiter.get_window_stats(item, "submit", key or client_ip).reset_time
+            return 429, {"status": "error", "message": "Too many requests, please retry later"}, \
+                max(1, int(reset_at - time.time()))
+
+    if outbox.queue.full():
+        reason = "outbox"
+    elif throttling.pool_saturated(engine.sync_engine.pool):
+        reason = "db_pool"
+    else:
+        return None
+    metrics.load_shed.inc(reason=reason)
+    logger.warning(f"Shedding submit request: {reason} saturated")
+    return 503, {"status": "error", "message": "Server busy, please retry shortly"}, throttling.SHED_RETRY_AFTER
+
+
+async def is_registered(payment_id):
+    """LRU hit, else one lookup on the unique payment_id index."""
+    if recent_payments.get(payment_id) is not None:
+        return True
+    students = Student.__table__
+    async with engine.connect() as conn:
+        row = (await conn.execute(
+            select(students.c.id).where(students.c.payment_id == payment_id).limit(1)
+        )).first()
+    if row is None:
+        return False
+    recent_payments.put(payment_id, REGISTERED)
+    return True
+
+
+def replayed(payment_id):
+    logger.info(f"Duplicate submission for payment {payment_id}; returning the original result")
+    return 200, REGISTERED, {REPLAY_HEADER: "true"}
+
+
+async def submit(data):
+    """(status, payload, extra headers) for one registration, as the Flask view answers it."""
+    if not data:
+        return 400, {"status": "error", "message": "No data received"}, {}
+
+    name = data.get("name")
+    email = data.get("email")
+    internship_function = data.get("domain")
+    payment_id = data.get("razorpay_payment_id")
+
+    try:
+        recipient_address(email)
+    except ValueError:
+        return 400, {"status": "error", "message": "Invalid email address"}, {}
+
+    if payment_id and await is_registered(payment_id):
+        return replayed(payment_id)
+
+    form_data = {
+        "name": name,
+        "email": email,
+        "internship_function": internship_function,
+        "whatsapp": data.get("whatsapp"),
+        "telegram_contact": data.get("telegram_contact"),
+        "payment_id": payment_id,
+        "payment_status": "paid",
+        "internship_start_date": datetime.now(),
+        "internship_duration": 1
+    }
+    form_data.update(lifecycle.initial(form_data["payment_status"], form_data["internship_start_date"]))
+
+    try:
+        async with engine.begin() as conn:
+            await conn.execute(insert(Student.__table__).values(**form_data))
+    except IntegrityError as e:
+        # A concurrent request registered the same payment first.
+        if payment_id and await is_registered(payment_id):
+            return replayed(payment_id)
+        logger.error(f"Error processing payment/registration: {str(e)}")
+        return 500, REGISTRATION_FAILED, {}
+    except Exception as e:
+        logger.error(f"Error processing payment/registration: {str(e)}")
+        return 500, REGISTRATION_FAILED, {}
+
+    recent_payments.put(payment_id, REGISTERED)
+    await outbox.enqueue(email, "confirmation", name=name, internship_function=internship_function)
+    return 200, REGISTERED, {}
+
+
+# ------------------------------------------------------------------------------
+# ASGI plumbing
+# ------------------------------------------------------------------------------
+async def _read_body(receive):
+    body = b""
+    while True:
+        message = await receive()
+        body += message.get("body", b"")
+        if not message.get("more_body"):
+            return body
+
+
+async def _send_json(send, status, payload, retry_after=None, extra_headers=None):
+    body = json.dumps(payload).encode()
+    headers = [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]
+    if retry_after is not None:
+        headers.append((b"retry-after", str(retry_after).encode()))
+    for name, value in (extra_headers or {}).items():
+        headers.append((name.lower().encode("latin-1"), value.encode("latin-1")))
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": headers,
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+async def _lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            await startup()
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            await shutdown()
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def app(scope, receive, send):
+    if scope["type"] == "lifespan":
+        await _lifespan(receive, send)
+        return
+    if scope["type"] != "http":
+        return
+
+    if scope["path"] == "/submit":
+        if scope["method"] != "POST":
+            await _send_json(send, 405, {"status": "error", "message": "Method not allowed"})
+            return
+        forwarded_for = b",".join(value for name, value in scope["headers"] if name == b"x-forwarded-for")
+        rejected = rejection(throttling.client_address(
+            (scope.get("client") or ("unknown",))[0], forwarded_for.decode("latin-1")))
+        if rejected is not None:
+            await _send_json(send, *rejected)
+            return
+        try:
+            data = json.loads(await _read_body(receive) or b"null")
+        except ValueError:
+            await _send_json(send, 400, {"status": "error", "message": "Invalid JSON"})
+            return
+        status, payload, headers = await submit(data)
+        await _send_json(send, status, payload, extra_headers=headers)
+    else:
+        await _send_json(send, 404, {"status": "error", "message": "Not found"})
+
+
+application = app
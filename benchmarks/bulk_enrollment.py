@@ -0,0 +1,152 @@
+"""
+Cohort operations at scale: per-row ORM (what the enroll / create_order /
+submit views do) vs the set-based helpers in SkillNova/core/bulk.py.
+
+Creates ``--users`` users in a scratch SQLite database (with the project's
+tuned settings), then times, for each operation, the row-by-row loop on a
+``--sample`` of users (extrapolated to the full cohort) and the bulk version
+on the full cohort:
+
+- enroll:     get_or_create + is_paid=True + save   vs  bulk_enroll(paid=True)
+- re-enroll:  the same again (every row exists)      vs  bulk_enroll again
+- mark paid:  fetch + is_paid=True + save            vs  one UPDATE
+- progress:   two COUNTs + save per enrollment       vs  one UPDATE with subqueries
+
+Usage:
+    python benchmarks/bulk_enrollment.py [--users 100000] [--sample 2000]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT_DIR)
+
+from django_db_concurrency import setup_django  # noqa: E402
+
+
+def timed(func):
+    started = time.perf_counter()
+    result = func()
+    return time.perf_counter() - started, result
+
+
+def seed(users, seed_value):
+    from django.contrib.auth.models import User
+
+    from core.models import Project, Training
+
+    User.objects.bulk_create(
+        (User(username=f"student{i}", email=f"student{i}@example.com", password="!") for i in range(users)),
+        batch_size=5000,
+    )
+    trainings = []
+    for name in ("rowwise", "bulk"):
+        training = Training.objects.create(title=f"Bench {name}", description="-", is_paid=True)
+        Project.objects.bulk_create(
+            Project(training=training, title=f"Project {i}", description="-", instructions="-", order=i)
+            for i in range(1, 5)
+        )
+        trainings.append(training)
+    user_ids = list(User.objects.order_by("pk").values_list("pk", flat=True))
+    random.Random(seed_value).shuffle(user_ids)
+    return trainings, user_ids
+
+
+def add_completions(training, share, seed_value):
+    """Complete a random number of projects for ``share`` of the enrollments."""
+    from core.models import Enrollment, ProjectCompletion
+
+    rng = random.Random(seed_value)
+    projects = list(training.projects.all())
+    completions = []
+    for enrollment_id in Enrollment.objects.filter(training=training).values_list("pk", flat=True):
+        if rng.random() < share:
+            for project in projects[: rng.randint(1, len(projects))]:
+                completions.append(ProjectCompletion(enrollment_id=enrollment_id, project=project))
+    ProjectCompletion.objects.bulk_create(completions, batch_size=5000)
+
+
+def rowwise_enroll(training, user_ids):
+    from core.models import Enrollment
+
+    for user_id in user_ids:
+        enrollment, _ = Enrollment.objects.get_or_create(user_id=user_id, training=training)
+        enrollment.is_paid = True
+        enrollment.save()
+
+
+def rowwise_mark_paid(training, user_ids):
+    from core.models import Enrollment
+
+    for enrollment in Enrollment.objects.filter(training=training, user_id__in=user_ids):
+        enrollment.is_paid = True
+        enrollment.save()
+
+
+def rowwise_progress(training, user_ids):
+    from core.models import Enrollment, ProjectCompletion
+
+    for enrollment in Enrollment.objects.filter(training=training, user_id__in=user_ids).select_related("training"):
+        completed = ProjectCompletion.objects.filter(enrollment=enrollment).count()
+        total = enrollment.training.projects.count()
+        enrollment.progress = int((completed / total) * 100)
+        enrollment.save()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--sample", type=int, default=2000, help="users timed in the row-by-row loops")
+    parser.add_argument("--completed-share", type=float, default=0.6)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        setup_django("tuned", os.path.join(tmp, "bench.sqlite3"))
+        from django.db import transaction
+
+        from core import bulk
+        from core.models import Enrollment
+
+        (rowwise_training, bulk_training), user_ids = seed(args.users, args.seed)
+        sample = user_ids[: min(args.sample, len(user_ids))]
+        scale = len(user_ids) / len(sample)
+
+        def rowwise(func):
+            # One transaction, as a management command would use; per-request
+            # autocommit in the views is slower still.
+            with transaction.atomic():
+                return timed(lambda: func(rowwise_training, sample))[0] * scale
+
+        results = []
+        rowwise_s = rowwise(rowwise_enroll)
+        bulk_s, created = timed(lambda: bulk.bulk_enroll(bulk_training, user_ids, paid=True))
+        results.append(("enroll", created, rowwise_s, bulk_s))
+
+        rowwise_s = rowwise(rowwise_enroll)
+        bulk_s, created = timed(lambda: bulk.bulk_enroll(bulk_training, user_ids, paid=True))
+        results.append(("re-enroll", len(user_ids) - created, rowwise_s, bulk_s))
+
+        Enrollment.objects.update(is_paid=False)
+        rowwise_s = rowwise(rowwise_mark_paid)
+        bulk_s, updated = timed(lambda: bulk.mark_paid(Enrollment.objects.filter(training=bulk_training)))
+        results.append(("mark paid", updated, rowwise_s, bulk_s))
+
+        add_completions(rowwise_training, args.completed_share, args.seed)
+        add_completions(bulk_training, args.completed_share, args.seed)
+        rowwise_s = rowwise(rowwise_progress)
+        bulk_s, updated = timed(lambda: bulk.recompute_progress(Enrollment.objects.filter(training=bulk_training)))
+        results.append(("progress", updated, rowwise_s, bulk_s))
+
+    print(f"users={args.users} row-by-row sample={len(sample)} (extrapolated)\n")
+    print(f"{'operation':<10} {'rows':>8} {'row-by-row s':>13} {'bulk s':>8} {'speedup':>8}")
+    for name, rows, rowwise_s, bulk_s in results:
+        print(f"{name:<10} {rows:>8} {rowwise_s:>13.1f} {bulk_s:>8.2f} {rowwise_s / bulk_s:>7.0f}x")
+
+
+if __name__ == "__main__":
+    main()
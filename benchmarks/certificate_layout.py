@@ -0,0 +1,108 @@
+"""
+Name fitting for certificates: trial-and-error ``textbbox`` vs text_layout.
+
+For ``--names`` random names (2-6 words, so a good share is too long for the
+50pt default) finds the largest size that fits the certificate's name box:
+
+- textbbox:  try 50pt, 49pt, ... with ``draw.textbbox`` until the name fits
+- advances:  ``name_fit.sizes`` (cached glyph advances, one estimate + check)
+
+and reports names/s for each and how many sizes differ (textbbox measures the
+inked box, the advance tables the pen advance that ``font.getlength`` also
+reports, so a few names land one point apart). Then renders ``--render``
+certificates with the template JPEG decoded per certificate (as before the
+template registry) and as one batch from the memory-mapped template
+(``generate_certificates``).
+
+Usage:
+    python benchmarks/certificate_layout.py [--names 5000] [--render 50]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT_DIR)
+
+PARTS = ["Jane", "Doe", "Venkata", "Lakshmi", "Narasimha", "Subrahmanyam", "Nguyễn", "Thị", "Ölçer",
+         "Wolfgang", "Amadeus", "O'Brien", "María", "José", "Fernández", "Al-Rashid", "Chakravarthy", "Li"]
+
+
+def random_names(count, seed_value):
+    rng = random.Random(seed_value)
+    return [" ".join(rng.choice(PARTS) for _ in range(rng.randint(2, 6))) for _ in range(count)]
+
+
+def textbbox_size(draw, name, fit):
+    from PIL import ImageFont
+
+    size = fit.max_size
+    while size > fit.min_size:
+        left, _, right, _ = draw.textbbox((0, 0), name, font=ImageFont.truetype(fit.path, size))
+        if right - left <= fit.max_width:
+            break
+        size -= 1
+    return size
+
+
+def timed(func):
+    started = time.perf_counter()
+    result = func()
+    return time.perf_counter() - started, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--names", type=int, default=5000)
+    parser.add_argument("--render", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    from PIL import Image, ImageDraw
+
+    import certificate_gen
+    from image_pipeline import save_for_email
+    from template_registry import Template, templates
+
+    names = random_names(args.names, args.seed)
+    template = templates.get("certificate")
+    fit = template.fields["name"].fit
+    draw = ImageDraw.Draw(Image.new("RGB", (1, 1)))
+
+    naive_s, naive = timed(lambda: [textbbox_size(draw, name, fit) for name in names])
+    fit_s, fitted = timed(lambda: fit.sizes(names))
+    differ = sum(a != b for a, b in zip(naive, fitted))
+    shrunk = sum(size < fit.max_size for size in fitted)
+    print(f"names={len(names)} shrunk={shrunk}\n")
+    print(f"{'textbbox':<10} {len(names) / naive_s:>10,.0f} names/s")
+    print(f"{'advances':<10} {len(names) / fit_s:>10,.0f} names/s  ({naive_s / fit_s:.0f}x, {differ} sizes differ)")
+
+    entries = [(name, "Web Development", f"SN-BENCH{i:04d}-AAAAAAAA") for i, name in enumerate(names[:args.render])]
+    issue_date = time.strftime("%d-%m-%Y")
+    class DecodedPerRender(Template):
+        def base(self):
+            with Image.open(self.image_path) as source:
+                return source.convert("RGBX")
+
+    decoding = DecodedPerRender(template.name, {
+        "kind": template.kind, "image": os.path.basename(template.image_path), "fields": {}, "qr": template.qr})
+    decoding.fields = template.fields
+    with tempfile.TemporaryDirectory() as tmp:
+        def one_by_one():
+            for name, internship, certificate_id in entries:
+                img = decoding.render({"name": name, "internship": internship, "issue_date": issue_date},
+                                      certificate_id)
+                save_for_email(img, os.path.join(tmp, f"{certificate_id}.jpg"))
+
+        template.base()  # decoded and mapped once per process
+        single_s, _ = timed(one_by_one)
+        batch_s, _ = timed(lambda: list(certificate_gen.generate_certificates(entries, tmp)))
+    print(f"\nrender {len(entries)}: decoded per certificate {len(entries) / single_s:.1f}/s, "
+          f"mapped batch {len(entries) / batch_s:.1f}/s")
+
+
+if __name__ == "__main__":
+    main()
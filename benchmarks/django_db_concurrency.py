@@ -0,0 +1,168 @@
+"""
+Concurrent writes against the Django project's SQLite database: stock
+settings vs the WAL / busy_timeout / BEGIN IMMEDIATE configuration in
+SkillNova/core/db.py.
+
+Each worker thread repeats what ``submit_project_links`` and
+``project_assignments`` do for one enrollment (``get_or_create`` a
+ProjectCompletion, save the links, recount completions, save progress)
+inside a transaction, interleaved with catalog reads like ``training_list``.
+Every mode runs in its own process against a fresh database file and
+reports throughput, latency percentiles and how many operations failed with
+"database is locked".
+
+Usage:
+    python benchmarks/django_db_concurrency.py [--threads 16] [--ops 50] [--reads-per-write 3]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+DJANGO_DIR = os.path.join(ROOT_DIR, "SkillNova")
+sys.path.insert(0, ROOT_DIR)
+
+from registration_load import percentile  # noqa: E402
+
+MODES = ("stock", "tuned")
+
+
+def setup_django(mode, db_path):
+    sys.path.insert(0, DJANGO_DIR)
+    os.environ["DJANGO_SETTINGS_MODULE"] = "SkillNova.settings"
+    os.environ["DJANGO_DATABASE_URL"] = f"sqlite:///{db_path}"
+    from django.conf import settings
+
+    if mode == "stock":
+        settings.DATABASES["default"]["OPTIONS"] = {}
+    settings.LOGGING = {"level": "WARNING"}
+
+    import django
+    from django.core.management import call_command
+
+    django.setup()
+    call_command("migrate", verbosity=0)
+
+
+def seed(users):
+    from django.contrib.auth.models import User
+
+    from core.models import Enrollment, Project, Training
+
+    training = Training.objects.create(title="Bench Training", description="-", is_paid=False)
+    projects = Project.objects.bulk_create(
+        Project(training=training, title=f"Project {i}", description="-", instructions="-", order=i)
+        for i in range(1, 5)
+    )
+    enrollments = []
+    for i in range(users):
+        user = User.objects.create(username=f"bench{i}")
+        enrollments.append(Enrollment.objects.create(user=user, training=training, is_paid=True))
+    return training, projects, enrollments
+
+
+def submit_links(enrollment, project, n):
+    """The write path of submit_project_links / project_assignments."""
+    from django.db import transaction
+
+    from core.models import ProjectCompletion
+
+    with transaction.atomic():
+        completion, _ = ProjectCompletion.objects.get_or_create(enrollment=enrollment, project=project)
+        completion.github_link = f"https://github.com/bench/{enrollment.pk}/{n}"
+        completion.save()
+        completed = ProjectCompletion.objects.filter(enrollment=enrollment).count()
+        total = project.training.projects.count()
+        enrollment.progress = int(completed / total * 100)
+        enrollment.save()
+
+
+def browse(training):
+    from core.models import Training
+
+    list(Training.objects.all())
+    list(training.projects.all().order_by("order"))
+
+
+def run_mode(mode, threads, ops, reads_per_write):
+    from django.db import OperationalError, connection
+
+    with tempfile.TemporaryDirectory() as tmp:
+        setup_django(mode, os.path.join(tmp, "bench.sqlite3"))
+        training, projects, enrollments = seed(threads)
+
+        latencies, errors = [], []
+        lock = threading.Lock()
+        start_gate = threading.Barrier(threads)
+
+        def worker(index):
+            enrollment = enrollments[index]
+            start_gate.wait()
+            try:
+                for n in range(ops):
+                    started = time.perf_counter()
+                    try:
+                        submit_links(enrollment, projects[n % len(projects)], n)
+                        for _ in range(reads_per_write):
+                            browse(training)
+                    except OperationalError as exc:
+                        with lock:
+                            errors.append(str(exc))
+                        continue
+                    with lock:
+                        latencies.append((time.perf_counter() - started) * 1000)
+            finally:
+                connection.close()
+
+        workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+        started = time.perf_counter()
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+    return {
+        "mode": mode,
+        "ok": len(latencies),
+        "locked": sum("locked" in e for e in errors),
+        "errors": len(errors),
+        "ops_per_s": len(latencies) / elapsed,
+        "p50": percentile(latencies, 50),
+        "p99": percentile(latencies, 99),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--ops", type=int, default=50, help="write operations per thread")
+    parser.add_argument("--reads-per-write", type=int, default=3)
+    parser.add_argument("--mode", choices=MODES, help=argparse.SUPPRESS)  # child process
+    args = parser.parse_args()
+
+    if args.mode:
+        print(json.dumps(run_mode(args.mode, args.threads, args.ops, args.reads_per_write)))
+        return
+
+    print(f"threads={args.threads} ops/thread={args.ops} reads/write={args.reads_per_write}\n")
+    print(f"{'settings':<8} {'ok':>6} {'locked':>7} {'errors':>7} {'ops/s':>9} {'p50 ms':>9} {'p99 ms':>9}")
+    for mode in MODES:
+        # Django settings are per process, so every mode gets a fresh interpreter.
+        output = subprocess.run(
+            [sys.executable, __file__, "--mode", mode, "--threads", str(args.threads),
+             "--ops", str(args.ops), "--reads-per-write", str(args.reads_per_write)],
+            check=True, capture_output=True, text=True,
+        ).stdout
+        r = json.loads(output.strip().splitlines()[-1])
+        print(f"{r['mode']:<8} {r['ok']:>6} {r['locked']:>7} {r['errors']:>7} {r['ops_per_s']:>9.1f} "
+              f"{r['p50']:>9.1f} {r['p99']:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
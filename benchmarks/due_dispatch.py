@@ -0,0 +1,122 @@
+"""
+Cost of finding due lifecycle work: daily sweep vs the due-work dispatcher.
+
+Seeds ``--rows`` paid students into a scratch SQLite database with
+``next_action_at`` spread over the next 30 days (a quarter of them already
+done), then ``--events`` students due during the next ``--seconds``, and
+reports:
+
+- sweep:    loading every paid student through the ORM, which each of the
+            old per-email cron jobs did once a day before deciding who was due
+- scan:     one dispatcher window scan (``next_action_at < now + window`` on
+            ix_students_next_action_at)
+- dispatch: the dispatcher running for ``--seconds`` with a stand-in ``fire``:
+            CPU seconds used, events fired and their lag behind next_action_at
+
+Usage:
+    python benchmarks/due_dispatch.py [--rows 200000] [--events 200] [--seconds 10]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT_DIR)
+
+from registration_load import percentile  # noqa: E402
+
+
+def seed(app_module, first, count, due_at, seed_value):
+    """Insert ``count`` paid students; ``due_at(rng, i)`` gives (state, next_action_at)."""
+    rng = random.Random(seed_value)
+    now = datetime.now()
+    table = app_module.Student.__table__
+    with app_module.db.engine.begin() as conn:
+        for offset in range(first, first + count, 10000):
+            batch = []
+            for i in range(offset, min(first + count, offset + 10000)):
+                state, due = due_at(rng, i)
+                batch.append({
+                    "name": f"Student {i}", "email": f"student{i}@example.com",
+                    "internship_function": "Web Development", "payment_status": "paid",
+                    "payment_id": f"pay_{i:010d}", "created_at": now, "internship_start_date": now,
+                    "internship_duration": 1, "internship_week": 1,
+                    "lifecycle_state": state, "next_action_at": due,
+                })
+            conn.execute(table.insert(), batch)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--events", type=int, default=200)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--window", type=int, default=2, help="DISPATCH_WINDOW for the run")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="dispatch-bench-")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+    import logging
+
+    import app as app_module
+    import lifecycle
+    from db_migrations import upgrade
+    from dispatcher import DueDispatcher
+    from sqlalchemy import select, update
+
+    logging.getLogger().setLevel(logging.WARNING)
+    with app_module.app.app_context():
+        upgrade(app_module.db.engine)
+        seed(app_module, 0, args.rows, lambda rng, i: (
+            (lifecycle.DONE, None) if i % 4 == 0 else
+            (lifecycle.WEEKLY, datetime.now() + timedelta(days=1 + rng.random() * 29))
+        ), args.seed)
+
+        started = time.perf_counter()
+        swept = len(app_module.Student.query.filter_by(payment_status="paid").all())
+        sweep_s = time.perf_counter() - started
+        app_module.db.session.remove()
+
+    # Due while the dispatcher runs.
+    with app_module.app.app_context():
+        now = datetime.now()
+        seed(app_module, args.rows, args.events, lambda rng, i: (
+            lifecycle.OFFER_LETTER, now + timedelta(seconds=1 + rng.random() * (args.seconds - 2))
+        ), args.seed)
+
+    started = time.perf_counter()
+    scanned = len(app_module.load_due_students(datetime.now() + timedelta(seconds=args.window)))
+    scan_s = time.perf_counter() - started
+
+    lags = []
+    table = app_module.Student.__table__
+
+    def fire(ids):
+        # Stand-in for send_due_emails: note the lag and clear next_action_at.
+        fired_at = datetime.now()
+        with app_module.app.app_context(), app_module.db.engine.begin() as conn:
+            due = conn.execute(select(table.c.next_action_at).where(table.c.id.in_(ids))).scalars().all()
+            conn.execute(update(table).where(table.c.id.in_(ids)).values(next_action_at=None))
+        lags.extend((fired_at - d).total_seconds() * 1000 for d in due)
+
+    dispatcher = DueDispatcher(app_module.load_due_students, fire, window=args.window)
+    cpu = time.process_time()
+    dispatcher.start()
+    time.sleep(args.seconds)
+    dispatcher.stop()
+    cpu = time.process_time() - cpu
+
+    print(f"rows={args.rows} events={args.events} window={args.window}s\n")
+    print(f"sweep     {swept:>8} students loaded in {sweep_s * 1000:>8.1f} ms (per job per run)")
+    print(f"scan      {scanned:>8} students loaded in {scan_s * 1000:>8.1f} ms (per window)")
+    print(f"dispatch  {len(lags):>8} events in {args.seconds:.0f}s, {cpu:.2f} CPU s, "
+          f"lag p50 {percentile(lags, 50):.0f} ms p99 {percentile(lags, 99):.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
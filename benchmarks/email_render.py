@@ -0,0 +1,72 @@
+"""
+Rendering cost of a weekly email run: per-message MIME trees vs the shared
+MessageBuilder.
+
+"legacy" builds the body with an f-string and a fresh MIMEMultipart per
+recipient, then serialises it (what send_message did). "builder" renders the
+precompiled Jinja template into the cached MIME prefix/suffix. Both are timed
+for several batch sizes; the builder's one-off setup is reported separately so
+the per-message overhead can be compared directly.
+
+Usage:
+    python benchmarks/email_render.py [--sizes 100 1000 10000] [--attachment Task_pdf/ai.pdf]
+"""
+import argparse
+import os
+import sys
+import time
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT_DIR)
+
+SENDER = "contact.skillnova@gmail.com"
+TASK = "https://docs.google.com/forms/d/e/example/viewform"
+
+
+def legacy(build_message, n, attachment):
+    for i in range(n):
+        body = f"Hi Student {i},\n\nHere are your tasks for {TASK}."
+        build_message(SENDER, f"student-{i}@example.com", "Weekly Internship Update", body, attachment).as_bytes()
+
+
+def builder_run(MessageBuilder, n, attachment):
+    start = time.perf_counter()
+    builder = MessageBuilder("weekly", SENDER, attachment)
+    setup = time.perf_counter() - start
+    for i in range(n):
+        builder.build(f"student-{i}@example.com", name=f"Student {i}", task_details=TASK)
+    return setup
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--attachment", default=None,
+                        help="optional file attached to every message (e.g. Task_pdf/ai.pdf)")
+    args = parser.parse_args()
+    attachment = os.path.join(ROOT_DIR, args.attachment) if args.attachment else None
+
+    os.environ.setdefault("DATABASE_URL", "sqlite://")
+    from app import build_message
+    from mail_templates import MessageBuilder, get_template
+
+    get_template("weekly")  # compile once, outside the timings
+
+    print(f"{'messages':>9} {'legacy ms':>11} {'us/msg':>8} {'builder ms':>11} {'us/msg':>8} "
+          f"{'setup ms':>9} {'speedup':>8}")
+    for n in args.sizes:
+        start = time.perf_counter()
+        legacy(build_message, n, attachment)
+        legacy_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        setup = builder_run(MessageBuilder, n, attachment)
+        builder_s = time.perf_counter() - start
+
+        print(f"{n:>9} {legacy_s * 1000:>11.1f} {legacy_s / n * 1e6:>8.1f} "
+              f"{builder_s * 1000:>11.1f} {(builder_s - setup) / n * 1e6:>8.1f} "
+              f"{setup * 1000:>9.2f} {legacy_s / builder_s:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""
+End-to-end email throughput benchmark against the local SMTP sink.
+
+Starts ``smtp_sink.SMTPSink`` in-process (with optional latency and failure
+injection), points ``app.deliver_email`` at it, and drives:
+
+- send_confirmation_email
+- send_internship_details_email (PDF attachment)
+- send_internship_loi_email (renders the offer letter with PIL)
+- send_due_emails over a seeded scratch database, with every student due for
+  a weekly task, then for the completion email
+
+For each workload it reports messages per second, p50/p99 latency of a single
+``deliver_email`` call (SMTP connect + send), the number of SMTP retries and what the sink accepted.
+
+Usage:
+    python benchmarks/email_throughput.py [--messages 200] [--latency-ms 20] [--failure-rate 0.0]
+"""
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT_DIR)
+
+from registration_load import percentile  # noqa: E402
+from smtp_sink import SMTPSink  # noqa: E402
+
+DOMAINS = ["Web Development", "Data Science", "Python Programming", "Machine Learning"]
+
+
+def timed_deliver_email(app_module, latencies):
+    original = app_module.deliver_email
+
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return original(*args, **kwargs)
+        finally:
+            latencies.append((time.perf_counter() - start) * 1000)
+    return original, wrapper
+
+
+def seed_students(app_module, count, state):
+    now = datetime.now()
+    Student = app_module.Student
+    with app_module.app.app_context():
+        Student.query.delete()
+        app_module.db.session.add_all([
+            Student(
+                name=f"Bench Student {i}",
+                email=f"bench-{i}@example.com",
+                internship_function=DOMAINS[i % len(DOMAINS)],
+                payment_id=f"pay_bench_{i}",
+                payment_status="paid",
+                internship_start_date=now - timedelta(days=30),
+                internship_duration=1,
+                lifecycle_state=state,
+                next_action_at=now,
+            )
+            for i in range(count)
+        ])
+        app_module.db.session.commit()
+
+
+def run_workload(label, func, app_module, sink):
+    import metrics
+    from retrying import retry_scheduler
+
+    latencies = []
+    original, wrapper = timed_deliver_email(app_module, latencies)
+    app_module.deliver_email = wrapper
+    sink.reset_stats()
+    retries_before = metrics.smtp_retries.value()
+    start = time.perf_counter()
+    try:
+        func()
+        retry_scheduler.wait_idle()  # deferred deliveries finish in the background
+    finally:
+        app_module.deliver_email = original
+    elapsed = time.perf_counter() - start
+    retries = metrics.smtp_retries.value() - retries_before
+    stats = sink.stats()
+    sent = len(latencies)
+    print(f"{label:<14} {sent:>6} {sent / elapsed if elapsed else 0:>9.1f} "
+          f"{percentile(latencies, 50):>9.1f} {percentile(latencies, 99):>9.1f} "
+          f"{retries:>8} {stats['messages']:>9} {stats['connections']:>6}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=200, help="messages (or students) per workload")
+    parser.add_argument("--latency-ms", type=float, default=20)
+    parser.add_argument("--connect-latency-ms", type=float, default=5)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    sink = SMTPSink(port=0, latency_ms=args.latency_ms, connect_latency_ms=args.connect_latency_ms,
+                    failure_rate=args.failure_rate, seed=args.seed)
+    host, port = sink.start_in_thread()
+
+    tmp = tempfile.mkdtemp(prefix="email-bench-")
+    os.environ.update(
+        DATABASE_URL=f"sqlite:///{os.path.join(tmp, 'bench.db')}",
+        EMAIL_USER="bench@skillnova.local",
+        EMAIL_PASSWORD="bench",
+        SMTP_SERVER=host,
+        SMTP_PORT=str(port),
+        SMTP_STARTTLS="false",
+        CERTIFICATE_SECRET="bench",
+    )
+
+    import app as app_module
+    import lifecycle
+    from db_migrations import upgrade
+
+    logging.getLogger().setLevel(logging.ERROR)  # retries are counted, not printed
+
+    with app_module.app.app_context():
+        upgrade(app_module.db.engine)
+
+    n = args.messages
+    print(f"sink {host}:{port} latency={args.latency_ms}ms connect={args.connect_latency_ms}ms "
+          f"failure_rate={args.failure_rate}\n")
+    print(f"{'workload':<14} {'sent':>6} {'msg/s':>9} {'p50 ms':>9} {'p99 ms':>9} "
+          f"{'retries':>8} {'accepted':>9} {'conns':>6}")
+
+    def each(send):
+        return lambda: [send(f"bench-{i}@example.com", f"Bench Student {i}", DOMAINS[i % len(DOMAINS)])
+                        for i in range(n)]
+
+    run_workload("confirmation", each(app_module.send_confirmation_email), app_module, sink)
+    run_workload("details", each(app_module.send_internship_details_email), app_module, sink)
+    run_workload("loi", each(app_module.send_internship_loi_email), app_module, sink)
+
+    seed_students(app_module, n, lifecycle.WEEKLY)
+    run_workload("weekly_job", app_module.send_due_emails, app_module, sink)
+    seed_students(app_module, n, lifecycle.COMPLETION)
+    run_workload("completion_job", app_module.send_due_emails, app_module, sink)
+
+    sink.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Byte savings of the image pipeline: web derivatives and emailed certificates.
+
+Part 1 builds the responsive derivatives of the site and certificate template
+images into a temporary directory and compares each against its source file.
+Part 2 renders the certificate / offer letter the way certificate_gen.py does
+and compares Pillow's default JPEG encoding (what was emailed before) with
+``save_for_email`` at several qualities, including the base64 size that
+actually goes over SMTP.
+
+Usage:
+    python benchmarks/image_savings.py [--qualities 90 75 60] [--max-width 0]
+"""
+import argparse
+import base64
+import os
+import sys
+import tempfile
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT_DIR)
+
+WEB_IMAGES = [
+    "public_html/image/skillnova.png",
+    "certificate_templates/certificate_templates_.jpg",
+    "certificate_templates/Internship_Offer_Letter.jpg",
+]
+CERTIFICATES = {
+    "certificate": "certificate_templates/certificate_templates_.jpg",
+    "offer_letter": "certificate_templates/Internship_Offer_Letter.jpg",
+}
+
+
+def kb(n):
+    return f"{n / 1024:.1f}"
+
+
+def web_report(tmp):
+    from image_pipeline import modern_formats, responsive_variants
+
+    print(f"Web derivatives (formats: {', '.join(modern_formats() or ['none'])} + fallback)")
+    print(f"{'image':<50} {'source KB':>10} {'width':>6} {'format':>7} {'KB':>8} {'saved':>7}")
+    for relpath in WEB_IMAGES:
+        source = os.path.join(ROOT_DIR, relpath)
+        source_bytes = os.path.getsize(source)
+        stem = os.path.splitext(os.path.basename(relpath))[0]
+        for v in responsive_variants(source, tmp, stem):
+            print(f"{relpath:<50} {kb(source_bytes):>10} {v['width']:>6} {v['format']:>7} "
+                  f"{kb(v['bytes']):>8} {1 - v['bytes'] / source_bytes:>7.0%}")
+
+
+def email_report(tmp, qualities, max_width):
+    from PIL import Image
+
+    from image_pipeline import save_for_email
+
+    print(f"\nEmailed certificates (max width {max_width or 'unchanged'})")
+    print(f"{'image':<14} {'encoding':<18} {'KB':>8} {'base64 KB':>10} {'saved':>7}")
+    for label, relpath in CERTIFICATES.items():
+        with Image.open(os.path.join(ROOT_DIR, relpath)) as img:
+            img.load()
+            baseline_path = os.path.join(tmp, f"{label}-default.jpg")
+            img.save(baseline_path)  # what certificate_gen.py did before
+            baseline = os.path.getsize(baseline_path)
+            rows = [("pillow default", baseline)]
+            for quality in qualities:
+                path = os.path.join(tmp, f"{label}-q{quality}.jpg")
+                rows.append((f"q={quality} optimised", save_for_email(img, path, quality, max_width)))
+        for encoding, size in rows:
+            encoded = len(base64.encodebytes(b"\0" * size))
+            print(f"{label:<14} {encoding:<18} {kb(size):>8} {kb(encoded):>10} {1 - size / baseline:>7.0%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--qualities", type=int, nargs="+", default=[90, 75, 60])
+    parser.add_argument("--max-width", type=int, default=0, help="downscale emailed images to this width")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        web_report(tmp)
+        email_report(tmp, args.qualities, args.max_width)
+
+
+if __name__ == "__main__":
+    main()
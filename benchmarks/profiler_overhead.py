@@ -0,0 +1,69 @@
+"""
+Overhead of the sampling profiler on a CPU-bound workload.
+
+Runs the same workload (rendering weekly emails through MessageBuilder plus a
+recursive pure-Python function, so stacks are realistically deep) with
+profiling off and at several sample rates, and reports the slowdown.
+
+Usage:
+    python benchmarks/profiler_overhead.py [--rates 19 97 499] [--repeat 5]
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT_DIR)
+
+from mail_templates import MessageBuilder  # noqa: E402
+import profiling  # noqa: E402
+
+
+def fib(n):
+    return n if n < 2 else fib(n - 1) + fib(n - 2)
+
+
+def workload():
+    builder = MessageBuilder("weekly", "bench@skillnova.local")
+    for i in range(20000):
+        builder.build(f"student-{i}@example.com", name=f"Student {i}", task_details="https://example.com")
+    fib(25)
+
+
+def timed(repeat, hz=None):
+    if hz:
+        profiling.profiler = profiling.SamplingProfiler(hz)
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        if hz:
+            with profiling.profile("bench", f"overhead-{hz}hz"):
+                workload()
+        else:
+            workload()
+        runs.append(time.perf_counter() - start)
+    return statistics.median(runs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rates", type=int, nargs="+", default=[19, 97, 499])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    os.environ["PROFILE_DIR"] = tempfile.mkdtemp(prefix="profiles-")
+    workload()  # warm up template compilation and caches
+    baseline = timed(args.repeat)
+    print(f"{'rate':>8} {'median ms':>10} {'overhead':>9}")
+    print(f"{'off':>8} {baseline * 1000:>10.1f} {'-':>9}")
+    for hz in args.rates:
+        elapsed = timed(args.repeat, hz)
+        print(f"{hz:>6}Hz {elapsed * 1000:>10.1f} {(elapsed / baseline - 1) * 100:>8.2f}%")
+    print(f"\nprofiles written to {os.environ['PROFILE_DIR']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Load test for the registration endpoint: sync Flask vs async ASGI.
+
+Fires ``--requests`` POST /submit calls with up to ``--concurrency`` in flight
+against each target URL and reports throughput, latency percentiles and errors.
+Uses only the standard library (raw HTTP/1.1 over asyncio streams) so the client
+itself is never the bottleneck being measured.
+
+Start both servers against a scratch database and the local SMTP sink first,
+for example:
+
+    python smtp_sink.py --port 2525 --latency-ms 50 &
+    export DATABASE_URL=sqlite:////tmp/load.db EMAIL_USER=bench@example.com EMAIL_PASSWORD=x
+    export SMTP_SERVER=127.0.0.1 SMTP_PORT=2525 SMTP_STARTTLS=false
+    flask --app app db-upgrade
+    gunicorn -w 4 -b 127.0.0.1:8000 app:app
+    uvicorn async_app:app --port 8001
+
+    python benchmarks/registration_load.py \
+        --target sync=http://127.0.0.1:8000/submit \
+        --target async=http://127.0.0.1:8001/submit \
+        --requests 2000 --concurrency 500
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+import uuid
+from urllib.parse import urlsplit
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def post_json(host, port, path, payload, timeout):
+    body = json.dumps(payload).encode()
+    reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+    try:
+        writer.write(
+            f"POST {path} HTTP/1.1\r\nHost: {host}:{port}\r\n"
+            f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n"
+            f"Connection: close\r\n\r\n".encode() + body
+        )
+        await writer.drain()
+        response = await asyncio.wait_for(reader.read(), timeout)
+    finally:
+        writer.close()
+    status_line = response.split(b"\r\n", 1)[0]
+    return int(status_line.split()[1])
+
+
+async def run_target(url, total, concurrency, timeout):
+    parts = urlsplit(url)
+    host, port, path = parts.hostname, parts.port or 80, parts.path or "/"
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, statuses, errors = [], {}, []
+
+    async def one(i):
+        payload = {
+            "name": f"Load Test {i}",
+            "email": f"load-{i}@example.com",
+            "domain": "Web Development",
+            "razorpay_payment_id": f"pay_load_{uuid.uuid4().hex[:16]}",
+        }
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                status = await post_json(host, port, path, payload, timeout)
+                statuses[status] = statuses.get(status, 0) + 1
+            except Exception as e:
+                errors.append(type(e).__name__)
+                return
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(total)))
+    elapsed = time.perf_counter() - start
+    return {
+        "elapsed_s": elapsed,
+        "throughput": total / elapsed,
+        "p50_ms": percentile(latencies, 50),
+        "p99_ms": percentile(latencies, 99),
+        "mean_ms": statistics.fmean(latencies) if latencies else 0.0,
+        "statuses": statuses,
+        "errors": len(errors),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", action="append", required=True,
+                        help="label=url of a /submit endpoint (repeatable)")
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    args = parser.parse_args()
+
+    print(f"{'target':<10} {'req/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'errors':>7}  statuses")
+    for target in args.target:
+        label, url = target.split("=", 1)
+        result = asyncio.run(run_target(url, args.requests, args.concurrency, args.timeout))
+        print(f"{label:<10} {result['throughput']:>9.1f} {result['p50_ms']:>9.1f} "
+              f"{result['p99_ms']:>9.1f} {result['errors']:>7}  {result['statuses']}")
+
+
+if __name__ == "__main__":
+    main()
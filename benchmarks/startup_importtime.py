@@ -0,0 +1,126 @@
+"""
+Cold start benchmark for the Flask app.
+
+Spawns fresh interpreters with ``python -X importtime -c "import app"`` and
+reports the cumulative import time of ``app``, the slowest imported modules and
+whether any of the deferred heavy modules (PIL, APScheduler, smtplib,
+email.mime, dotenv) were pulled in at import. dotenv is expected only when a
+local ``.env`` file exists.
+
+Each run is appended to ``benchmarks/results/startup.jsonl`` so regressions show
+up against earlier runs.
+
+Usage:
+    python benchmarks/startup_importtime.py [--runs 5] [--top 15] [--budget-ms 400]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+RESULTS_PATH = os.path.join(ROOT_DIR, "benchmarks", "results", "startup.jsonl")
+
+# Modules that must only be imported on first use, never at worker boot.
+DEFERRED_MODULES = ("PIL", "apscheduler", "smtplib", "email.mime", "dotenv")
+
+
+def parse_importtime(stderr):
+    """
+    Parse ``-X importtime`` output into {module: (self_us, cumulative_us)}.
+
+    Lines look like ``import time:       123 |       4567 |   package.module``.
+    """
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue  # header line
+        name = parts[2].strip()
+        modules[name] = (int(parts[0]), int(parts[1]))
+    return modules
+
+
+def run_once(database_url):
+    env = dict(os.environ, DATABASE_URL=database_url)
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app"],
+        cwd=ROOT_DIR, env=env, capture_output=True, text=True
+    )
+    wall_ms = (time.perf_counter() - start) * 1000
+    if proc.returncode != 0:
+        raise RuntimeError(f"import app failed:\n{proc.stderr[-2000:]}")
+    return wall_ms, parse_importtime(proc.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--budget-ms", type=float, default=None,
+                        help="exit non-zero if the median import time exceeds this")
+    args = parser.parse_args()
+
+    # A throwaway database so the benchmark never touches instance/students.db.
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        run_once(database_url)  # warm the bytecode cache; we measure import, not compile
+        runs = [run_once(database_url) for _ in range(args.runs)]
+
+    wall = [w for w, _ in runs]
+    import_ms = [m.get("app", (0, 0))[1] / 1000 for _, m in runs]
+    modules = runs[-1][1]
+    loaded_deferred = sorted(
+        name for name in modules
+        if any(name == d or name.startswith(d + ".") for d in DEFERRED_MODULES)
+    )
+
+    print(f"runs: {args.runs}")
+    print(f"import app (cumulative): median {statistics.median(import_ms):.1f} ms, "
+          f"min {min(import_ms):.1f} ms, max {max(import_ms):.1f} ms")
+    print(f"process wall time:       median {statistics.median(wall):.1f} ms")
+    print(f"\ntop {args.top} modules by cumulative import time:")
+    for name, (self_us, cum_us) in sorted(modules.items(), key=lambda kv: -kv[1][1])[:args.top]:
+        print(f"  {cum_us / 1000:8.1f} ms  (self {self_us / 1000:6.1f} ms)  {name}")
+    if loaded_deferred:
+        print(f"\nWARNING: deferred modules imported at startup: {', '.join(loaded_deferred)}")
+    else:
+        print("\nno deferred modules imported at startup")
+
+    record = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "runs": args.runs,
+        "import_ms_median": round(statistics.median(import_ms), 2),
+        "wall_ms_median": round(statistics.median(wall), 2),
+        "deferred_loaded": loaded_deferred,
+    }
+    previous = None
+    if os.path.isfile(RESULTS_PATH):
+        with open(RESULTS_PATH) as f:
+            lines = [line for line in f if line.strip()]
+        if lines:
+            previous = json.loads(lines[-1])
+    if previous:
+        delta = record["import_ms_median"] - previous["import_ms_median"]
+        print(f"change vs previous run ({previous['timestamp']}): {delta:+.1f} ms")
+
+    os.makedirs(os.path.dirname(RESULTS_PATH), exist_ok=True)
+    with open(RESULTS_PATH, "a") as f:
+        f.write(json.dumps(record) + "\n")
+
+    if args.budget_ms is not None and record["import_ms_median"] > args.budget_ms:
+        print(f"FAIL: median import time exceeds budget of {args.budget_ms} ms")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
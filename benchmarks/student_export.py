@@ -0,0 +1,150 @@
+"""
+Throughput and memory of the students export (student_export.py).
+
+Seeds ``--rows`` students into a scratch SQLite database, then dumps them in
+a fresh process per mode and reports rows/s, output size and the peak RSS of
+that process:
+
+- csv / parquet: the streaming export (``yield_per`` batches)
+- orm:           ``Student.query.all()`` written with csv -- what an ad-hoc
+                 dump through the model would do, for comparison
+- csv-range:     the streaming export of a ``--since``/``--until`` window,
+                 served by the created_at index
+
+Usage:
+    python benchmarks/student_export.py [--rows 1000000] [--modes csv parquet orm csv-range]
+"""
+import argparse
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT_DIR)
+
+MODES = ("csv", "parquet", "orm", "csv-range")
+DOMAINS = ["Web Development", "Data Science", "Python Programming", "Machine Learning"]
+START = datetime(2025, 1, 1)
+SPAN_DAYS = 365
+
+
+def load_app(db_path):
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+    import logging
+
+    import app as app_module
+
+    logging.getLogger().setLevel(logging.WARNING)
+    return app_module
+
+
+def seed(db_path, rows, seed_value):
+    from db_migrations import upgrade
+
+    app_module = load_app(db_path)
+    with app_module.app.app_context():
+        engine = app_module.db.engine
+        upgrade(engine)
+        table = app_module.Student.__table__
+        rng = random.Random(seed_value)
+        with engine.begin() as conn:
+            for offset in range(0, rows, 10000):
+                conn.execute(table.insert(), [
+                    {
+                        "name": f"Student {i}",
+                        "email": f"student{i}@example.com",
+                        "internship_function": DOMAINS[i % len(DOMAINS)],
+                        "telegram_contact": f"@student{i}",
+                        "payment_status": "paid",
+                        "payment_id": f"pay_{i:010d}",
+                        "created_at": START + timedelta(seconds=rng.randrange(SPAN_DAYS * 86400)),
+                        "internship_start_date": START,
+                        "internship_duration": 1 + i % 3,
+                        "internship_week": 1,
+                        "completion_email_sent": False,
+                        "internship_details_email_sent": True,
+                        "internship_loi_email_sent": True,
+                    }
+                    for i in range(offset, min(rows, offset + 10000))
+                ])
+
+
+def run(mode, db_path, out_path):
+    import csv
+
+    import student_export
+
+    app_module = load_app(db_path)
+    table = app_module.Student.__table__
+    started = time.perf_counter()
+    with app_module.app.app_context(), open(out_path, "wb") as out:
+        if mode == "orm":
+            import io
+
+            text = io.TextIOWrapper(out, encoding="utf-8", newline="")
+            writer = csv.writer(text)
+            students = app_module.Student.query.order_by(app_module.Student.created_at).all()
+            writer.writerow([c.name for c in table.columns])
+            for student in students:
+                writer.writerow([getattr(student, c.name) for c in table.columns])
+            text.flush()
+            text.detach()
+            rows = len(students)
+        else:
+            fmt = "parquet" if mode == "parquet" else "csv"
+            since = until = None
+            if mode == "csv-range":
+                since, until = START + timedelta(days=31), START + timedelta(days=59)  # February
+            stats = student_export.ExportStats(fmt)
+            for chunk in student_export.export_chunks(app_module.db.engine, table, fmt, since, until, stats=stats):
+                out.write(chunk)
+            rows = stats.rows
+    return {
+        "mode": mode,
+        "rows": rows,
+        "seconds": time.perf_counter() - started,
+        "bytes": os.path.getsize(out_path),
+        "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--run", choices=MODES, help=argparse.SUPPRESS)  # child process
+    parser.add_argument("--db", help=argparse.SUPPRESS)
+    parser.add_argument("--out", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        print(json.dumps(run(args.run, args.db, args.out)))
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "students.db")
+        started = time.perf_counter()
+        seed(db_path, args.rows, args.seed)
+        print(f"seeded {args.rows} students in {time.perf_counter() - started:.1f}s\n")
+        print(f"{'mode':<10} {'rows':>9} {'seconds':>8} {'rows/s':>10} {'MB':>8} {'peak RSS MB':>12}")
+        for mode in args.modes:
+            # A fresh interpreter per mode so peak RSS belongs to that mode alone.
+            output = subprocess.run(
+                [sys.executable, __file__, "--run", mode, "--db", db_path,
+                 "--out", os.path.join(tmp, f"export-{mode}")],
+                check=True, capture_output=True, text=True,
+            ).stdout
+            r = json.loads(output.strip().splitlines()[-1])
+            print(f"{r['mode']:<10} {r['rows']:>9} {r['seconds']:>8.2f} {r['rows'] / r['seconds']:>10,.0f} "
+                  f"{r['bytes'] / 1e6:>8.1f} {r['max_rss_mb']:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Memory held by certificate templates across worker processes.
+
+Starts ``--workers`` processes per mode; each loads every template in the
+manifest, renders one document from each and then keeps the templates
+(as a long-lived worker would). Reports the proportional set size (PSS,
+shared pages split between the processes mapping them) each worker added:
+
+- decoded: every worker decodes the JPEGs into its own RGBX images
+- mapped:  template_registry's raw buffers, mapped read-only and shared
+
+Linux only (reads /proc/self/smaps_rollup).
+
+Usage:
+    python benchmarks/template_sharing.py [--workers 8]
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT_DIR)
+
+MODES = ("decoded", "mapped")
+
+
+def pss_kb():
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            if line.startswith("Pss:"):
+                return int(line.split()[1])
+    return 0
+
+
+def worker(mode, ready, done, results):
+    from PIL import Image
+
+    from template_registry import templates
+
+    before = pss_kb()
+    held = []
+    for name in list(templates.refresh()._templates):
+        template = templates[name]
+        if mode == "decoded":
+            with Image.open(template.image_path) as source:
+                held.append(source.convert("RGBX"))
+        else:
+            held.append(template.base())
+        template.render({"name": "Jane Doe", "internship": "Web Development", "issue_date": "01-01-2025"})
+    ready.wait()  # every worker holds its templates before anyone measures
+    results.put(pss_kb() - before)
+    done.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=8)
+    args = parser.parse_args()
+
+    from template_registry import templates
+
+    for name in list(templates.refresh()._templates):
+        templates[name].base()  # build the raw buffers up front, as the first worker would
+
+    context = multiprocessing.get_context("spawn")
+    print(f"{'mode':<8} {'workers':>8} {'MB per worker':>14} {'MB total':>9}")
+    for mode in MODES:
+        ready, done = context.Barrier(args.workers), context.Event()
+        results = context.Queue()
+        processes = [context.Process(target=worker, args=(mode, ready, done, results)) for _ in range(args.workers)]
+        for process in processes:
+            process.start()
+        added = [results.get() for _ in processes]
+        done.set()
+        for process in processes:
+            process.join()
+        total = sum(added) / 1024
+        print(f"{mode:<8} {args.workers:>8} {total / args.workers:>14.1f} {total:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+"""
+Verifiable completion certificates.
+
+Every completion certificate gets a short ID such as ``SN-7KQ2M4XD-3FJ9TB2A``,
+printed on it next to a QR code for ``CERTIFICATE_VERIFY_URL<id>``. The first
+part is random, the second a truncated HMAC-SHA256 of it keyed with
+``CERTIFICATE_SECRET``, so ``GET /verify/<id>``:
+
+- rejects forged or mistyped IDs without touching the database (a burst of
+  guesses costs one HMAC each);
+- answers a genuine ID with one lookup on the unique index of the
+  ``certificates`` issuance table (migration 0006), and hot IDs -- the same
+  certificate opened by everyone on a hiring panel -- from an in-process
+  LRU (idempotency.RecentResults).
+
+The key is dedicated and never derived from the Flask SECRET_KEY: certificates
+must stay valid for years, across session key rotations. Without
+``CERTIFICATE_SECRET`` certificates are sent as before, without an ID or QR
+code (a warning is logged once by the process sending them), and /verify only
+accepts IDs signed with the retired keys. To rotate it, move the old key to
+``CERTIFICATE_SECRET_PREVIOUS`` so the IDs it signed still verify.
+
+Issuance is idempotent per student: a resent completion email reuses the ID
+issued the first time. The issuance row copies the name and domain and has
+no foreign key, so a certificate stays verifiable after cleanup_old_entries
+has deleted the student.
+
+Environment:
+    CERTIFICATE_SECRET           HMAC key for new certificate IDs (unset: certificates carry no ID)
+    CERTIFICATE_SECRET_PREVIOUS  comma-separated retired keys still accepted by /verify
+    CERTIFICATE_VERIFY_URL       URL prefix encoded in the QR code (default https://skillnova.com/verify/)
+    CERTIFICATE_CACHE_SIZE       verified certificates remembered per process (default 10000)
+"""
+import base64
+import hashlib
+import hmac
+import logging
+import os
+from datetime import datetime
+
+import metrics
+from idempotency import RecentResults
+
+logger = logging.getLogger(__name__)
+
+PREFIX = "SN"
+ID_BYTES = 5  # 8 base32 characters each for the random part and the tag
+VERIFY_URL = os.getenv("CERTIFICATE_VERIFY_URL", "https://skillnova.com/verify/")
+
+
+def _b32(data):
+    return base64.b32encode(data).decode("ascii").rstrip("=")
+
+
+def _tag(secret, serial):
+    return _b32(hmac.new(secret, serial.encode("ascii"), hashlib.sha256).digest()[:ID_BYTES])
+
+
+def new_certificate_id(secret):
+    serial = _b32(os.urandom(ID_BYTES))
+    return f"{PREFIX}-{serial}-{_tag(secret, serial)}"
+
+
+def normalize_certificate_id(value):
+    """Canonical form of a typed or scanned ID, or None if it is not even shaped like one."""
+    parts = (value or "").strip().upper().split("-")
+    if len(parts) != 3 or parts[0] != PREFIX or not all(len(p) == 8 and p.isalnum() for p in parts[1:]):
+        return None
+    return "-".join(parts)
+
+
+def check_certificate_id(value, secrets):
+    """The canonical ID if it is signed with one of ``secrets``, else None."""
+    certificate_id = normalize_certificate_id(value)
+    if certificate_id is None:
+        return None
+    _, serial, tag = certificate_id.split("-")
+    if any(hmac.compare_digest(tag, _tag(secret, serial)) for secret in secrets):
+        return certificate_id
+    return None
+
+
+def verify_url(certificate_id):
+    return f"{VERIFY_URL}{certificate_id}"
+
+
+class CertificateRegistry:
+    def __init__(self, cache_size=None):
+        self.cache = RecentResults(cache_size if cache_size is not None
+                                   else os.getenv("CERTIFICATE_CACHE_SIZE", 10000))
+        self.db = None
+        self.model = None
+        self.secret = None
+        self.secrets = ()
+        self._warned = False
+
+    def init_app(self, app, db, model):
+        from flask import jsonify, render_template, request
+
+        self.db, self.model = db, model
+        current = os.getenv("CERTIFICATE_SECRET")
+        previous = [key.strip() for key in os.getenv("CERTIFICATE_SECRET_PREVIOUS", "").split(",") if key.strip()]
+        self.secret = current.encode("utf-8") if current else None
+        self.secrets = tuple(key.encode("utf-8") for key in ([current] if current else []) + previous)
+
+        def verify_view(certificate_id):
+            certificate = self.verify(certificate_id)
+            wants_json = request.args.get("format") == "json" or (
+                request.accept_mimetypes.best_match(["text/html", "application/json"]) == "application/json")
+            if wants_json:
+                body = {"valid": certificate is not None, "certificate": certificate}
+                response = jsonify(body)
+            else:
+                response = app.make_response(render_template(
+                    "verify.html", certificate=certificate, certificate_id=certificate_id))
+            response.status_code = 200 if certificate is not None else 404
+            # Issued certificates never change, so browsers and CDNs may keep the answer.
+            response.headers["Cache-Control"] = "public, max-age=3600" if certificate else "no-store"
+            response.headers["Vary"] = "Accept"
+            return response
+
+        app.add_url_rule("/verify/<certificate_id>", "verify_certificate", verify_view)
+
+    def issue(self, student):
+        """
+        The certificate ID for ``student``, issuing one on first use; None if
+        none was issued and no CERTIFICATE_SECRET is configured.
+        """
+        from sqlalchemy.exc import IntegrityError
+
+        model, session = self.model, self.db.session
+        existing = session.query(model.certificate_id).filter_by(student_id=student.id).scalar()
+        if existing is not None:
+            return existing
+        if self.secret is None:
+            if not self._warned:
+                self._warned = True
+                logger.warning("CERTIFICATE_SECRET is not set: certificates are sent without a verifiable ID")
+            return None
+        certificate = model(
+            certificate_id=new_certificate_id(self.secret), student_id=student.id,
+            name=student.name, internship=student.internship_function, issued_at=datetime.now(),
+        )
+        session.add(certificate)
+        try:
+            session.commit()
+        except IntegrityError:
+            # Issued concurrently (e.g. by a retried job run).
+            session.rollback()
+            return session.query(model.certificate_id).filter_by(student_id=student.id).scalar()
+        logger.info(f"Issued certificate {certificate.certificate_id} to student {student.id}")
+        return certificate.certificate_id
+
+    def verify(self, value):
+        """Public details of a genuine certificate, or None."""
+        certificate_id = check_certificate_id(value, self.secrets)
+        if certificate_id is None:
+            metrics.certificate_verifications.inc(result="bad_signature")
+            return None
+        cached = self.cache.get(certificate_id)
+        if cached is not None:
+            metrics.certificate_verifications.inc(result="cache_hit")
+            return cached
+        row = self.db.session.query(self.model).filter_by(certificate_id=certificate_id).first()
+        if row is None:
+            metrics.certificate_verifications.inc(result="not_found")
+            return None
+        details = {
+            "certificate_id": row.certificate_id,
+            "name": row.name,
+            "internship": row.internship,
+            "issued_at": row.issued_at.date().isoformat(),
+        }
+        self.cache.put(certificate_id, details)
+        metrics.certificate_verifications.inc(result="found")
+        return details
+
+
+registry = CertificateRegistry()
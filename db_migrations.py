@@ -0,0 +1,304 @@
+"""
+Schema migrations for the Flask ``students`` database.
+
+Migrations are plain functions registered in order with ``@migration``. Each
+one receives a ``MigrationContext`` that knows how to issue online-safe DDL for
+the current dialect:
+
+- ``create_index`` uses ``CREATE INDEX CONCURRENTLY`` on PostgreSQL (outside a
+  transaction, so writes to the table are never blocked) and a plain
+  ``CREATE INDEX IF NOT EXISTS`` elsewhere.
+- ``backfill`` updates rows in primary-key batches, committing after each batch
+  so no long-running transaction holds row locks.
+
+Every operation is idempotent, so a migration interrupted half way can simply
+be re-run. Applied versions are recorded in the ``schema_migrations`` table.
+
+Run with ``flask --app app db-upgrade`` (or ``python db_migrations.py``).
+"""
+import logging
+from datetime import datetime
+
+from sqlalchemy import inspect, text
+
+logger = logging.getLogger(__name__)
+
+MIGRATIONS = []
+
+
+def migration(version):
+    """Register a migration function under ``version`` (applied in definition order)."""
+    def decorator(func):
+        MIGRATIONS.append((version, func))
+        return func
+    return decorator
+
+
+# ------------------------------------------------------------------------------
+# Migration context (dialect-aware, online-safe operations)
+# ------------------------------------------------------------------------------
+class MigrationContext:
+    def __init__(self, engine):
+        self.engine = engine
+        self.dialect = engine.dialect.name
+
+    @property
+    def is_postgres(self):
+        return self.dialect == "postgresql"
+
+    def execute(self, sql, **params):
+        """Run a single statement in its own short transaction."""
+        with self.engine.begin() as conn:
+            return conn.execute(text(sql), params)
+
+    def has_table(self, table):
+        return inspect(self.engine).has_table(table)
+
+    def has_column(self, table, column):
+        return column in {c["name"] for c in inspect(self.engine).get_columns(table)}
+
+    def add_column(self, table, column, ddl):
+        """
+        Add ``column`` with the given type/default ``ddl`` if it is missing.
+        Nullable columns (or constant defaults on PG 11+) are metadata-only changes.
+        """
+        if self.has_column(table, column):
+            logger.info(f"Column {table}.{column} already exists, skipping")
+            return
+        self.execute(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}")
+        logger.info(f"Added column {table}.{column}")
+
+    def create_index(self, name, table, columns, unique=False, where=None):
+        """
+        Create an index without blocking writes.
+
+        On PostgreSQL this uses CREATE INDEX CONCURRENTLY, which cannot run inside
+        a transaction block, so the statement is issued on an AUTOCOMMIT connection.
+        A previous interrupted concurrent build leaves an INVALID index behind; it is
+        dropped and rebuilt.
+        """
+        unique_sql = "UNIQUE " if unique else ""
+        cols = ", ".join(columns)
+        where_sql = f" WHERE {where}" if where else ""
+
+        if self.is_postgres:
+            with self.engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+                invalid = conn.execute(text(
+                    "SELECT 1 FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+                    "WHERE c.relname = :name AND NOT i.indisvalid"
+                ), {"name": name}).first()
+                if invalid:
+                    logger.warning(f"Dropping invalid index {name} left by an earlier build")
+                    conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+                conn.execute(text(
+                    f"CREATE {unique_sql}INDEX CONCURRENTLY IF NOT EXISTS {name} "
+                    f"ON {table} ({cols}){where_sql}"
+                ))
+        else:
+            self.execute(f"CREATE {unique_sql}INDEX IF NOT EXISTS {name} ON {table} ({cols}){where_sql}")
+        logger.info(f"Index {name} on {table}({cols}) is in place")
+
+    def drop_index(self, name):
+        if self.is_postgres:
+            with self.engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+                conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+        else:
+            self.execute(f"DROP INDEX IF EXISTS {name}")
+
+    def plus_seconds(self, timestamp_sql, seconds_sql):
+        """
+        SQL for ``timestamp_sql`` + ``seconds_sql`` seconds in this dialect.
+
+        SQLite has no timestamp type: the result is text in the form SQLAlchemy
+        writes (``YYYY-MM-DD HH:MM:SS.ffffff``), so SQL-computed values compare
+        like ORM-written ones. ``%f`` gives milliseconds; pad to microseconds.
+        """
+        if self.is_postgres:
+            return f"({timestamp_sql} + ({seconds_sql}) * INTERVAL '1 second')"
+        return f"(strftime('%Y-%m-%d %H:%M:%f', {timestamp_sql}, '+' || ({seconds_sql}) || ' seconds') || '000')"
+
+    def backfill(self, table, assignments, where="1=1", batch_size=1000, **params):
+        """
+        Run ``UPDATE table SET assignments WHERE where`` in primary-key batches.
+
+        Each batch commits separately, keeping lock time and WAL/journal growth
+        bounded regardless of table size. Returns the number of rows updated.
+        """
+        with self.engine.connect() as conn:
+            lo, hi = conn.execute(text(f"SELECT MIN(id), MAX(id) FROM {table}")).one()
+        if lo is None:
+            return 0
+
+        updated = 0
+        for start in range(lo, hi + 1, batch_size):
+            result = self.execute(
+                f"UPDATE {table} SET {assignments} "
+                f"WHERE id >= :_lo AND id < :_hi AND ({where})",
+                _lo=start, _hi=start + batch_size, **params
+            )
+            updated += result.rowcount or 0
+        logger.info(f"Backfilled {updated} rows in {table} ({assignments})")
+        return updated
+
+
+# ------------------------------------------------------------------------------
+# Version bookkeeping
+# ------------------------------------------------------------------------------
+def _ensure_version_table(ctx):
+    ctx.execute(
+        "CREATE TABLE IF NOT EXISTS schema_migrations ("
+        "version VARCHAR(100) PRIMARY KEY, applied_at TIMESTAMP NOT NULL)"
+    )
+
+
+def applied_versions(engine):
+    ctx = MigrationContext(engine)
+    _ensure_version_table(ctx)
+    with engine.connect() as conn:
+        return {row[0] for row in conn.execute(text("SELECT version FROM schema_migrations"))}
+
+
+def pending_migrations(engine):
+    done = applied_versions(engine)
+    return [(version, func) for version, func in MIGRATIONS if version not in done]
+
+
+def upgrade(engine):
+    """Apply all pending migrations in order. Returns the list of applied versions."""
+    ctx = MigrationContext(engine)
+    applied = []
+    for version, func in pending_migrations(engine):
+        logger.info(f"Applying migration {version}")
+        func(ctx)
+        ctx.execute(
+            "INSERT INTO schema_migrations (version, applied_at) VALUES (:version, :applied_at)",
+            version=version, applied_at=datetime.now()
+        )
+        applied.append(version)
+    if not applied:
+        logger.info("Database schema is up to date")
+    return applied
+
+
+# ------------------------------------------------------------------------------
+# Migrations
+# ------------------------------------------------------------------------------
+@migration("0001_create_students")
+def create_students(ctx):
+    # Matches the table previously produced by db.create_all(); existing
+    # databases already have it and are simply stamped.
+    if not ctx.has_table("students"):
+        id_ddl = "id SERIAL PRIMARY KEY" if ctx.is_postgres else "id INTEGER NOT NULL PRIMARY KEY"
+        ctx.execute(f"""
+            CREATE TABLE students (
+                {id_ddl},
+                name VARCHAR(100) NOT NULL,
+                email VARCHAR(150) NOT NULL,
+                internship_function VARCHAR(100) NOT NULL,
+                telegram_contact VARCHAR(50),
+                whatsapp VARCHAR(50),
+                payment_status VARCHAR(20),
+                payment_id VARCHAR(100) NOT NULL,
+                created_at TIMESTAMP,
+                internship_start_date TIMESTAMP,
+                internship_duration INTEGER,
+                internship_week INTEGER,
+                completion_email_sent BOOLEAN,
+                internship_details_email_sent BOOLEAN,
+                internship_loi_email_sent BOOLEAN
+            )
+        """)
+    ctx.create_index("ix_students_email", "students", ["email"])
+    ctx.create_index("ix_students_created_at", "students", ["created_at"])
+
+
+@migration("0002_add_last_email_sent")
+def add_last_email_sent(ctx):
+    ctx.add_column("students", "last_email_sent", "TIMESTAMP NULL")
+
+
+@migration("0003_backfill_student_defaults")
+def backfill_student_defaults(ctx):
+    # Rows inserted by hand before the ORM defaults existed have NULL flags,
+    # which the filter_by(...=False) queries in the scheduled jobs never match.
+    ctx.backfill("students", "internship_week = 1", "internship_week IS NULL")
+    for flag in ("completion_email_sent", "internship_details_email_sent", "internship_loi_email_sent"):
+        ctx.backfill("students", f"{flag} = :false", f"{flag} IS NULL", false=False)
+
+
+@migration("0004_unique_payment_id")
+def unique_payment_id(ctx):
+    # Client retries used to insert the same payment twice. Keep the first row
+    # as is and tag later copies (instead of deleting them) so the unique index
+    # can be built; /submit then resolves repeats against it.
+    ctx.backfill(
+        "students",
+        "payment_id = SUBSTR(payment_id, 1, 80) || '#dup' || CAST(id AS VARCHAR(20))",
+        "id > (SELECT MIN(s2.id) FROM students s2 WHERE s2.payment_id = students.payment_id)",
+    )
+    ctx.create_index("ix_students_payment_id", "students", ["payment_id"], unique=True)
+
+
+@migration("0005_student_lifecycle")
+def student_lifecycle(ctx):
+    # One state + due time per student (lifecycle.py) replaces a table scan per
+    # email type. The old flags stay, so this is additive and safe to roll back.
+    ctx.add_column("students", "lifecycle_state", "VARCHAR(20) NULL")
+    ctx.add_column("students", "next_action_at", "TIMESTAMP NULL")
+    ctx.backfill(
+        "students",
+        "lifecycle_state = CASE"
+        " WHEN payment_status IS NULL OR payment_status <> 'paid' OR internship_start_date IS NULL THEN 'pending'"
+        " WHEN completion_email_sent = :true THEN 'done'"
+        " WHEN internship_loi_email_sent = :false THEN 'offer_letter'"
+        " WHEN internship_details_email_sent = :false THEN 'details'"
+        " ELSE 'weekly' END",
+        "lifecycle_state IS NULL",
+        true=True, false=False,
+    )
+    # Offer letter at start + 40s, details at start + 10h, next weekly task 6
+    # days after the previous one (or right away). Weekly students already past
+    # their last week move on to 'completion' the first time the scheduler sees
+    # them; the number of weeks lives in the task catalog, not the database.
+    start = "internship_start_date"
+    ctx.backfill(
+        "students",
+        "next_action_at = CASE lifecycle_state"
+        f" WHEN 'offer_letter' THEN {ctx.plus_seconds(start, 40)}"
+        f" WHEN 'details' THEN {ctx.plus_seconds(start, 10 * 3600)}"
+        f" ELSE COALESCE({ctx.plus_seconds('last_email_sent', 6 * 86400)}, {ctx.plus_seconds(start, 0)}) END",
+        "next_action_at IS NULL AND lifecycle_state IN ('offer_letter', 'details', 'weekly')",
+    )
+    ctx.create_index("ix_students_lifecycle_state", "students", ["lifecycle_state"])
+    # Only scheduled rows are indexed; finished students drop out of it.
+    ctx.create_index("ix_students_next_action_at", "students", ["next_action_at"],
+                     where="next_action_at IS NOT NULL")
+
+
+
+@migration("0006_certificates")
+def create_certificates(ctx):
+    # Issuance table behind /verify. No foreign key to students: certificates
+    # must stay verifiable after cleanup_old_entries deletes the student.
+    if not ctx.has_table("certificates"):
+        id_ddl = "id SERIAL PRIMARY KEY" if ctx.is_postgres else "id INTEGER NOT NULL PRIMARY KEY"
+        ctx.execute(f"""
+            CREATE TABLE certificates (
+                {id_ddl},
+                certificate_id VARCHAR(32) NOT NULL,
+                student_id INTEGER,
+                name VARCHAR(100) NOT NULL,
+                internship VARCHAR(100) NOT NULL,
+                issued_at TIMESTAMP NOT NULL
+            )
+        """)
+    ctx.create_index("ix_certificates_certificate_id", "certificates", ["certificate_id"], unique=True)
+    ctx.create_index("ix_certificates_student_id", "certificates", ["student_id"], unique=True)
+
+
+if __name__ == "__main__":
+    from app import app, db
+
+    logging.basicConfig(level=logging.INFO)
+    with app.app_context():
+        upgrade(db.engine)
@@ -0,0 +1,138 @@
+"""
+In-process dispatcher for due lifecycle emails.
+
+The daily 18:30 sweep sent the offer letter -- due 40 seconds after
+registration -- up to a day late, and read every scheduled student on each
+run. ``DueDispatcher`` keeps a heap of ``(next_action_at, student id)`` and a
+thread that sleeps until the earliest entry is due, then hands the due ids to
+``send_due_emails``. Work is proportional to due events, not table size:
+
+- the heap only holds students due before the end of the loaded window;
+  every ``DISPATCH_WINDOW`` seconds one range scan of
+  ``ix_students_next_action_at`` loads the next window (this is also how
+  registrations made by other processes are picked up);
+- registrations and sent emails in this process push the student's new
+  ``next_action_at`` straight onto the heap (``schedule``);
+- an entry superseded by a later ``schedule`` for the same student is
+  dropped when popped, and ``send_due_emails`` re-checks ``next_action_at``
+  in the database, so a stale entry never sends twice.
+
+Run it in one process only -- ``start_scheduler`` starts it alongside the
+APScheduler jobs; a second dispatcher would race the first one.
+
+Environment:
+    DISPATCH_WINDOW   seconds of upcoming work loaded per database scan (default 60)
+"""
+import heapq
+import logging
+import os
+import threading
+from datetime import datetime, timedelta
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class DueDispatcher:
+    def __init__(self, load_due, fire, window=None):
+        """
+        ``load_due(until)`` returns ``(student_id, next_action_at)`` pairs due
+        before ``until``; ``fire(student_ids)`` processes the due students.
+        """
+        self.load_due = load_due
+        self.fire = fire
+        self.window = timedelta(seconds=int(window or os.getenv("DISPATCH_WINDOW", 60)))
+        self._heap = []
+        self._due = {}  # student id -> due time of its live heap entry
+        self._horizon = None  # everything due before this is on the heap
+        self._cond = threading.Condition()
+        self._thread = None
+        self._stopped = False
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def schedule(self, student_id, due_at):
+        """
+        Note a student's new ``next_action_at`` (None: nothing scheduled).
+        Times past the loaded window are left to the next scan; before
+        ``start()`` this is a no-op, so web workers can call it freely.
+        """
+        with self._cond:
+            if self._horizon is None:
+                return
+            if due_at is None or due_at >= self._horizon:
+                self._due.pop(student_id, None)
+                return
+            self._push(student_id, due_at)
+            self._cond.notify()
+
+    def _push(self, student_id, due_at):
+        # Called with the condition held.
+        self._due[student_id] = due_at
+        heapq.heappush(self._heap, (due_at, student_id))
+        metrics.dispatcher_queued.set(len(self._due))
+
+    def _scan(self, now):
+        until = now + self.window
+        rows = self.load_due(until)
+        with self._cond:
+            for student_id, due_at in rows:
+                if self._due.get(student_id) != due_at:
+                    self._push(student_id, due_at)
+            self._horizon = until
+        return len(rows)
+
+    def _pop_due(self, now):
+        # Called with the condition held.
+        ids = []
+        while self._heap and self._heap[0][0] <= now:
+            due_at, student_id = heapq.heappop(self._heap)
+            if self._due.get(student_id) != due_at:
+                continue  # superseded
+            del self._due[student_id]
+            ids.append(student_id)
+            metrics.dispatch_lag.observe((now - due_at).total_seconds())
+        metrics.dispatcher_queued.set(len(self._due))
+        return ids
+
+    def _run(self):
+        next_scan = datetime.now()
+        while True:
+            if datetime.now() >= next_scan:
+                try:
+                    self._scan(datetime.now())
+                except Exception:
+                    logger.exception("Dispatcher scan failed; retrying next window")
+                next_scan = datetime.now() + self.window
+            with self._cond:
+                if self._stopped:
+                    return
+                ids = self._pop_due(datetime.now())
+                if not ids:
+                    wake = min(next_scan, self._heap[0][0]) if self._heap else next_scan
+                    self._cond.wait(max((wake - datetime.now()).total_seconds(), 0))
+                    continue
+            try:
+                self.fire(ids)
+            except Exception:
+                logger.exception(f"Dispatching {len(ids)} due students failed")
+
+    def start(self):
+        with self._cond:
+            if self.running:
+                return
+            self._stopped = False
+            self._horizon = datetime.now()  # accept schedule() until the first scan
+            self._thread = threading.Thread(target=self._run, name="due-dispatcher", daemon=True)
+            self._thread.start()
+        logger.info(f"Due-work dispatcher started (window {self.window.total_seconds():.0f}s)")
+
+    def stop(self, timeout=None):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
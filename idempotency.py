@@ -0,0 +1,48 @@
+"""
+Idempotent registration: one student row and one confirmation email per payment.
+
+Payment ids are unique in the database (migration 0004). ``RecentResults`` is
+a small in-process LRU in front of that index: a retried or double-clicked
+``POST /submit`` with a payment id seen recently is answered from memory, a
+miss costs one indexed lookup, and a race between two concurrent first
+submissions is settled by the unique index (the loser gets the same reply).
+
+Environment:
+    IDEMPOTENCY_CACHE_SIZE   payment ids remembered per process (default 10000)
+"""
+import os
+import threading
+from collections import OrderedDict
+
+REPLAY_HEADER = "Idempotent-Replayed"
+# What /submit returns for a registered payment, first time or replayed.
+REGISTERED = {"status": "success", "redirect_url": "/thank-you"}
+
+
+class RecentResults:
+    """Thread-safe LRU mapping an idempotency key to the response payload it produced."""
+
+    def __init__(self, maxsize=None):
+        self.maxsize = int(maxsize if maxsize is not None else os.getenv("IDEMPOTENCY_CACHE_SIZE", 10000))
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            result = self._items.get(key)
+            if result is not None:
+                self._items.move_to_end(key)
+            return result
+
+    def put(self, key, result):
+        with self._lock:
+            self._items[key] = result
+            self._items.move_to_end(key)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+    def __len__(self):
+        return len(self._items)
+
+
+recent_payments = RecentResults()
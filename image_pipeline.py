@@ -0,0 +1,112 @@
+"""
+Image derivatives for the web and compact encodings for email.
+
+Web: ``responsive_variants`` writes size-bucketed copies of an image (one per
+width in ``WIDTHS`` that is smaller than the original, plus the original
+width) in AVIF and WebP when Pillow supports them, and in the source format as
+fallback. static_pipeline.py runs it for ``public_html/image/`` and the
+``picture()`` template helper turns the result into ``<picture>`` markup with
+``srcset`` so browsers download the smallest file that fits.
+
+Email: ``save_for_email`` encodes generated certificates / offer letters as
+optimised progressive JPEG instead of Pillow's defaults.
+
+Environment:
+    EMAIL_JPEG_QUALITY   JPEG quality for emailed images (default 75, as Pillow)
+    EMAIL_IMAGE_MAX_WIDTH  downscale wider images to this width (default 0 = keep size)
+"""
+import io
+import os
+
+from PIL import Image, features
+
+WIDTHS = (160, 320, 640, 1280)
+WEB_QUALITY = {"avif": 55, "webp": 80, "jpeg": 82}
+MIME_TYPES = {"avif": "image/avif", "webp": "image/webp", "jpeg": "image/jpeg", "png": "image/png"}
+
+
+def modern_formats():
+    """AVIF/WebP encoders available in this Pillow build, best first."""
+    formats = []
+    # Pillow >= 11.2 ships AVIF; older builds may have the pillow-avif-plugin.
+    try:
+        has_avif = features.check_module("avif")
+    except ValueError:
+        try:
+            import pillow_avif  # noqa: F401
+            has_avif = True
+        except ImportError:
+            has_avif = False
+    if has_avif:
+        formats.append("avif")
+    if features.check("webp"):
+        formats.append("webp")
+    return formats
+
+
+def _encode(img, fmt):
+    buffer = io.BytesIO()
+    if fmt == "jpeg":
+        img.convert("RGB").save(buffer, "JPEG", quality=WEB_QUALITY["jpeg"], optimize=True, progressive=True)
+    elif fmt == "png":
+        img.save(buffer, "PNG", optimize=True)
+    elif fmt == "webp":
+        img.save(buffer, "WEBP", quality=WEB_QUALITY[fmt], method=6)
+    else:
+        img.save(buffer, fmt.upper(), quality=WEB_QUALITY[fmt])
+    return buffer.getvalue()
+
+
+def _resize(img, width):
+    if width >= img.width:
+        return img
+    height = max(1, round(img.height * width / img.width))
+    return img.resize((width, height), Image.LANCZOS)
+
+
+def responsive_variants(source, out_dir, stem, widths=WIDTHS, formats=None):
+    """
+    Write the derivatives of ``source`` to ``out_dir`` as ``<stem>-<width>w.<ext>``.
+    Returns a list of {"name", "width", "format", "bytes"} sorted by width.
+
+    Variants that do not come out smaller than the source file are dropped;
+    once that happens for the fallback format the source itself is listed
+    (with ``"name": None``) for the full width instead.
+    """
+    formats = list(formats if formats is not None else modern_formats())
+    source_bytes = os.path.getsize(source)
+    with Image.open(source) as original:
+        original.load()
+        fallback = "png" if original.format == "PNG" or original.mode in ("RGBA", "LA", "P") else "jpeg"
+        img = original if original.mode in ("RGB", "RGBA") else original.convert("RGBA")
+        bucket_widths = sorted({w for w in widths if w < img.width} | {img.width})
+
+        variants = []
+        use_source = False
+        for width in bucket_widths:
+            resized = _resize(img, width)
+            for fmt in formats + ([] if use_source else [fallback]):
+                data = _encode(resized, fmt)
+                if len(data) >= source_bytes:
+                    if fmt == fallback:
+                        use_source = True
+                        variants.append({"name": None, "width": img.width, "format": fmt, "bytes": source_bytes})
+                    continue
+                name = f"{stem}-{width}w.{'jpg' if fmt == 'jpeg' else fmt}"
+                with open(os.path.join(out_dir, name), "wb") as f:
+                    f.write(data)
+                variants.append({"name": name, "width": width, "format": fmt, "bytes": len(data)})
+    return sorted(variants, key=lambda v: v["width"])
+
+
+def save_for_email(img, path, quality=None, max_width=None):
+    """
+    Save ``img`` as an optimised progressive JPEG sized for email attachments.
+    Returns the number of bytes written.
+    """
+    quality = int(quality if quality is not None else os.getenv("EMAIL_JPEG_QUALITY", 75))
+    max_width = int(max_width if max_width is not None else os.getenv("EMAIL_IMAGE_MAX_WIDTH", 0))
+    if max_width:
+        img = _resize(img, max_width)
+    img.convert("RGB").save(path, "JPEG", quality=quality, optimize=True, progressive=True)
+    return os.path.getsize(path)
@@ -0,0 +1,82 @@
+"""
+Student lifecycle: which scheduled email a student is waiting for, and when.
+
+A paid registration walks through
+
+    offer_letter -> details -> weekly (once per catalog week) -> completion -> done
+
+``students.lifecycle_state`` holds the current step and
+``students.next_action_at`` the time it is due; it is NULL when nothing is
+scheduled (unpaid or done). ``send_due_emails`` in app.py (woken by the
+dispatcher at each due time, see dispatcher.py) finds all due work,
+whatever the email type, with one range scan of the partial index
+``ix_students_next_action_at`` (``next_action_at <= now``) and advances the
+student in the same UPDATE that records the sent email.
+
+Due times are the ones the separate jobs used to check:
+
+- offer letter   start + 40 seconds
+- details        start + 10 hours
+- weekly task    right after the details, then 6 days after the previous one
+- completion     start + 28 days per month of ``internship_duration``, once
+                 the last weekly task is out
+
+The old per-email columns (``internship_loi_email_sent``, ...,
+``internship_week``, ``last_email_sent``) are still written so exports and
+reports keep working, but scheduling no longer reads them. Migration 0005
+derives the state of existing rows from them.
+"""
+from datetime import timedelta
+
+PENDING = "pending"
+OFFER_LETTER = "offer_letter"
+DETAILS = "details"
+WEEKLY = "weekly"
+COMPLETION = "completion"
+DONE = "done"
+
+STATES = (PENDING, OFFER_LETTER, DETAILS, WEEKLY, COMPLETION, DONE)
+
+OFFER_LETTER_DELAY = timedelta(seconds=40)
+DETAILS_DELAY = timedelta(hours=10)
+WEEKLY_INTERVAL = timedelta(days=6)
+DAYS_PER_MONTH = 28
+# A due step that could not be sent is tried again this much later.
+STALLED_RETRY = timedelta(hours=1)
+
+
+def completion_due(start, duration):
+    return start + timedelta(days=DAYS_PER_MONTH * (duration or 1))
+
+
+def initial(payment_status, start):
+    """Lifecycle columns for a new registration."""
+    if payment_status != "paid" or start is None:
+        return {"lifecycle_state": PENDING, "next_action_at": None}
+    return {"lifecycle_state": OFFER_LETTER, "next_action_at": start + OFFER_LETTER_DELAY}
+
+
+def after_offer_letter(start):
+    return {"internship_loi_email_sent": True,
+            "lifecycle_state": DETAILS, "next_action_at": start + DETAILS_DELAY}
+
+
+def after_details(start):
+    # The first weekly task is due as soon as the details are out.
+    return {"internship_details_email_sent": True,
+            "lifecycle_state": WEEKLY, "next_action_at": start + DETAILS_DELAY}
+
+
+def after_weekly(start, duration, week, total_weeks, sent_at):
+    """State once the task for ``week`` went out at ``sent_at``."""
+    if week >= total_weeks:
+        return weeks_finished(start, duration)
+    return {"lifecycle_state": WEEKLY, "next_action_at": sent_at + WEEKLY_INTERVAL}
+
+
+def weeks_finished(start, duration):
+    return {"lifecycle_state": COMPLETION, "next_action_at": completion_due(start, duration)}
+
+
+def after_completion():
+    return {"completion_email_sent": True, "lifecycle_state": DONE, "next_action_at": None}
@@ -0,0 +1,142 @@
+"""
+Structured, non-blocking logging shared by the Flask and Django apps.
+
+``configure_logging`` installs a ``QueueHandler`` on the root logger: callers
+only pay for putting the record on an in-memory queue, and a ``QueueListener``
+thread formats it as one JSON object per line and does the actual I/O.
+
+``BatchLog`` keeps per-student chatter out of the hot path of scheduled jobs:
+it counts every outcome, logs only a sample of the per-student lines (the
+first few of each outcome, then every Nth) and emits one summary line with
+counts and timings when the batch ends. Errors are always logged.
+
+Environment:
+    LOG_LEVEL          root level (default INFO)
+    LOG_FORMAT         "json" (default) or "text"
+    LOG_SAMPLE_FIRST   per-outcome lines always logged in a batch (default 5)
+    LOG_SAMPLE_EVERY   afterwards log every Nth line per outcome (default 100, 0 = never)
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import time
+from collections import Counter
+from datetime import datetime, timezone
+
+# Attributes every LogRecord has; anything else was passed through ``extra=``.
+_RESERVED = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "taskName"}
+
+_listener = None
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        payload = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED and not key.startswith("_"):
+                payload[key] = value
+        if record.exc_info:
+            payload["exc"] = self.formatException(record.exc_info)
+        return json.dumps(payload, default=str)
+
+
+def _formatter():
+    if os.getenv("LOG_FORMAT", "json").lower() == "text":
+        return logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s")
+    return JsonFormatter()
+
+
+def configure_logging(level=None):
+    """
+    Route all logging through a queue drained by a background listener thread.
+    Safe to call more than once; only the first call installs the pipeline.
+    """
+    global _listener
+    root = logging.getLogger()
+    root.setLevel(level or os.getenv("LOG_LEVEL", "INFO").upper())
+    if _listener is not None:
+        return _listener
+
+    log_queue = queue.SimpleQueue()
+    output = logging.StreamHandler()
+    output.setFormatter(_formatter())
+    _listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)  # flush what is still queued on shutdown
+
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+    return _listener
+
+
+def configure_django_logging(logging_settings):
+    """
+    Used as Django's LOGGING_CONFIG. Django applies its DEFAULT_LOGGING first;
+    its console handlers are dropped so records are not written twice, and the
+    runserver request log (``django.server``) propagates to the queue like the
+    rest instead of writing to stderr synchronously.
+    """
+    configure_logging((logging_settings or {}).get("level"))
+    for name in ("django", "django.server"):
+        django_logger = logging.getLogger(name)
+        for handler in list(django_logger.handlers):
+            if type(handler) is logging.StreamHandler:
+                django_logger.removeHandler(handler)
+    logging.getLogger("django.server").propagate = True
+
+
+class BatchLog:
+    """
+    Counts per-student outcomes of a batch job and logs a sampled subset.
+
+        with BatchLog(logger, "weekly_emails") as batch:
+            for student in students:
+                batch.record("skipped_completed", f"Skipping {student.email}: Internship completed.")
+    """
+
+    def __init__(self, logger, name, sample_first=None, sample_every=None):
+        self.logger = logger
+        self.name = name
+        self.sample_first = int(sample_first if sample_first is not None else os.getenv("LOG_SAMPLE_FIRST", 5))
+        self.sample_every = int(sample_every if sample_every is not None else os.getenv("LOG_SAMPLE_EVERY", 100))
+        self.counts = Counter()
+        self.suppressed = 0
+        self.started = None
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def record(self, outcome, message=None, level=logging.INFO):
+        self.counts[outcome] += 1
+        if message is None or not self.logger.isEnabledFor(level):
+            return
+        n = self.counts[outcome]
+        sampled = (
+            level >= logging.WARNING
+            or n <= self.sample_first
+            or (self.sample_every and n % self.sample_every == 0)
+        )
+        if sampled:
+            self.logger.log(level, message, extra={"batch": self.name, "outcome": outcome})
+        else:
+            self.suppressed += 1
+
+    def __exit__(self, exc_type, exc, tb):
+        duration_ms = round((time.perf_counter() - self.started) * 1000, 1)
+        summary = ", ".join(f"{k}={v}" for k, v in sorted(self.counts.items())) or "nothing to do"
+        self.logger.info(
+            f"{self.name} finished in {duration_ms} ms: {summary}",
+            extra={"batch": self.name, "counts": dict(self.counts), "duration_ms": duration_ms,
+                   "suppressed_lines": self.suppressed},
+        )
+        return False
@@ -0,0 +1,178 @@
+"""
+Email templates and batch message rendering.
+
+Email bodies live in ``email_templates/<name>.txt`` as Jinja templates, compiled
+once per process and shared by every send.
+
+``MessageBuilder`` turns a template into ready-to-send RFC 5322 bytes. All
+parts of the MIME tree that do not depend on the recipient -- the multipart
+headers, the Subject, and every shared attachment (base64-encoded once) -- are
+precomputed as a static prefix and suffix when the builder is created, so
+building a message for one more recipient costs one template render, one
+base64 pass over the body and a byte join:
+
+    builder = get_builder("weekly", sender_email)
+    for student in students:
+        message = builder.build(student.email, name=student.name, task_details=...)
+
+Builders for a given (template, sender, shared attachments) are cached, so
+e.g. the per-domain PDF of the details email is read and encoded once per
+process rather than once per recipient.
+"""
+import base64
+import mimetypes
+import os
+import uuid
+from email.header import Header
+from email.utils import formataddr, formatdate, make_msgid, parseaddr
+from functools import lru_cache
+
+BASE_DIR = os.path.abspath(os.path.dirname(__file__))
+TEMPLATE_DIR = os.path.join(BASE_DIR, "email_templates")
+
+SUBJECTS = {
+    "confirmation": "Internship Registration Successful.",
+    "internship_details": "SkillNova Virtual Internship - Detailed Instructions",
+    "internship_loi": "SkillNova Virtual Internship - Offer Letter",
+    "weekly": "Weekly Internship Update",
+    "completion": "Internship Completion Certificate",
+}
+
+CRLF = b"\r\n"
+
+_environment = None
+
+
+def environment():
+    """Shared Jinja environment; templates are compiled on first use and cached."""
+    global _environment
+    if _environment is None:
+        from jinja2 import Environment, FileSystemLoader, StrictUndefined
+
+        _environment = Environment(
+            loader=FileSystemLoader(TEMPLATE_DIR),
+            autoescape=False,  # plain-text emails
+            keep_trailing_newline=True,
+            auto_reload=False,
+            undefined=StrictUndefined,
+            cache_size=-1,
+        )
+    return _environment
+
+
+def get_template(name):
+    return environment().get_template(f"{name}.txt")
+
+
+def render_body(name, **context):
+    return get_template(name).render(**context)
+
+
+def _header(name, value):
+    if not value.isascii():
+        value = Header(value, "utf-8").encode()
+    return f"{name}: {value}".encode("ascii") + CRLF
+
+
+def recipient_address(value):
+    """
+    ``value`` as a single address for the To: header. Raises ValueError for
+    anything else -- it comes from the registration form, and a CR/LF in it
+    would let the sender add headers (Bcc etc.).
+    """
+    if not value or "\r" in value or "\n" in value:
+        raise ValueError(f"Invalid recipient address: {value!r}")
+    name, address = parseaddr(value)
+    local, _, domain = address.rpartition("@")
+    if not local or not domain or not address.isascii() or any(c.isspace() for c in address):
+        raise ValueError(f"Invalid recipient address: {value!r}")
+    return formataddr((name, address))
+
+
+def _b64_lines(data):
+    # encodebytes wraps at 76 chars with "\n"; SMTP needs CRLF.
+    return base64.encodebytes(data).replace(b"\n", CRLF)
+
+
+def attachment_part(path):
+    """Encode one attachment as a complete MIME part (headers + base64 body)."""
+    with open(path, "rb") as f:
+        data = f.read()
+    content_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+    filename = os.path.basename(path)
+    return (
+        _header("Content-Type", content_type)
+        + _header("MIME-Version", "1.0")
+        + _header("Content-Transfer-Encoding", "base64")
+        + f'Content-Disposition: attachment; filename="{filename}"'.encode("utf-8") + CRLF
+        + CRLF
+        + _b64_lines(data)
+    )
+
+
+def _existing(paths):
+    if not paths:
+        return ()
+    paths = paths if isinstance(paths, (list, tuple)) else [paths]
+    return tuple(p for p in paths if p and os.path.isfile(p))
+
+
+class MessageBuilder:
+    def __init__(self, name, sender_email, attachment_paths=None, subject=None):
+        self.template = get_template(name)
+        self.sender_email = sender_email
+        self.boundary = f"==============={uuid.uuid4().hex}=="
+        delimiter = f"--{self.boundary}".encode("ascii")
+        self._delimiter = delimiter
+
+        self._msgid_domain = sender_email.rpartition("@")[2] or None
+        # Everything before the per-message headers (To, Date, Message-ID).
+        self._prefix = (
+            _header("Content-Type", f'multipart/mixed; boundary="{self.boundary}"')
+            + _header("MIME-Version", "1.0")
+            + _header("From", sender_email)
+        )
+        # Everything between those and the encoded body.
+        self._middle = (
+            _header("Subject", subject or SUBJECTS[name])
+            + CRLF
+            + delimiter + CRLF
+            + _header("Content-Type", 'text/plain; charset="utf-8"')
+            + _header("MIME-Version", "1.0")
+            + _header("Content-Transfer-Encoding", "base64")
+            + CRLF
+        )
+        # Shared attachments and the closing boundary.
+        self._suffix = b"".join(
+            delimiter + CRLF + attachment_part(path) for path in _existing(attachment_paths)
+        ) + delimiter + b"--" + CRLF
+
+    def build(self, to_email, attachment_paths=None, **context):
+        """
+        Render the template for one recipient and return the full message bytes.
+        ``attachment_paths`` are per-recipient extras (e.g. a generated certificate).
+        Raises ValueError if ``to_email`` is not a single valid address.
+        """
+        headers = (
+            _header("To", recipient_address(to_email))
+            + _header("Date", formatdate(localtime=True))
+            + _header("Message-ID", make_msgid(domain=self._msgid_domain))
+        )
+        body = self.template.render(**context).encode("utf-8")
+        extra = b"".join(
+            self._delimiter + CRLF + attachment_part(path) for path in _existing(attachment_paths)
+        )
+        return b"".join((
+            self._prefix, headers, self._middle,
+            _b64_lines(body), extra, self._suffix,
+        ))
+
+
+@lru_cache(maxsize=64)
+def _cached_builder(name, sender_email, attachment_paths):
+    return MessageBuilder(name, sender_email, attachment_paths)
+
+
+def get_builder(name, sender_email, attachment_paths=None):
+    """Shared builder for a template/sender and set of static attachments."""
+    return _cached_builder(name, sender_email, _existing(attachment_paths))
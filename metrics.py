@@ -0,0 +1,289 @@
+"""
+In-process metrics with a Prometheus text endpoint.
+
+Counters, gauges and histograms are kept in plain Python objects guarded by a
+lock -- no client library or external service needed. ``init_app`` wires them
+into Flask (per-route request latency, ``GET /metrics``) and SQLAlchemy (query
+counts and durations); ``deliver_email`` records SMTP timings and retries, and
+the scheduled jobs are wrapped with ``track_job``.
+
+Values are per process: with several gunicorn workers each worker exposes its
+own series, so scrape every worker (or sum them) when comparing totals.
+Set ``METRICS_TOKEN`` to require ``Authorization: Bearer <token>`` on /metrics.
+"""
+import functools
+import hmac
+import os
+import threading
+import time
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+JOB_BUCKETS = (0.1, 0.5, 1.0, 5.0, 15.0, 30.0, 60.0, 300.0, 900.0, 1800.0, 3600.0)
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labelnames, values, extra=()):
+    pairs = list(zip(labelnames, values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=(), registry=None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        (registry if registry is not None else REGISTRY).register(self)
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def header(self):
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(self._key(labels), 0)
+
+    def collect(self):
+        with self._lock:
+            items = list(self._values.items())
+        return self.header() + [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in items
+        ]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS, registry=None):
+        super().__init__(name, documentation, labelnames, registry)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                series = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+
+    def time(self, **labels):
+        """Context manager observing the elapsed seconds of its block."""
+        return _Timer(self, labels)
+
+    def count(self, **labels):
+        series = self._values.get(self._key(labels))
+        return series[2] if series else 0
+
+    def collect(self):
+        with self._lock:
+            items = [(key, (list(s[0]), s[1], s[2])) for key, s in self._values.items()]
+        lines = self.header()
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.labelnames, key, [("le", _format_value(bound))])
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class _Timer:
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed = time.perf_counter() - self.start
+        self.histogram.observe(self.elapsed, **self.labels)
+        return False
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+
+    def exposition(self):
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.collect())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+# ------------------------------------------------------------------------------
+# Application metrics
+# ------------------------------------------------------------------------------
+http_request_duration = Histogram(
+    "skillnova_http_request_duration_seconds", "HTTP request latency by route",
+    ("route", "method", "status"))
+db_query_duration = Histogram(
+    "skillnova_db_query_duration_seconds", "Database statement latency by statement type",
+    ("statement",))
+smtp_connect_duration = Histogram(
+    "skillnova_smtp_connect_duration_seconds", "SMTP connect + STARTTLS + login latency")
+smtp_send_duration = Histogram(
+    "skillnova_smtp_send_duration_seconds", "SMTP message transfer latency")
+smtp_retries = Counter(
+    "skillnova_smtp_retries_total", "Failed SMTP attempts that were retried or given up")
+emails = Counter(
+    "skillnova_emails_total", "Emails handed to SMTP by outcome", ("result",))
+retries_scheduled = Counter(
+    "skillnova_retries_scheduled_total", "Failed calls rescheduled by the retry scheduler", ("target",))
+circuit_state = Gauge(
+    "skillnova_circuit_state", "Circuit breaker state (0 closed, 1 half-open, 2 open)", ("target",))
+page_cache = Counter(
+    "skillnova_page_cache_total", "Cached template page responses by result", ("result",))
+rate_limited = Counter(
+    "skillnova_rate_limited_total", "Requests rejected with 429 by limit", ("limit",))
+load_shed = Counter(
+    "skillnova_load_shed_total", "Requests rejected with 503 by saturated resource", ("reason",))
+export_rows = Counter(
+    "skillnova_export_rows_total", "Student rows written by the CSV/Parquet export", ("format",))
+job_duration = Histogram(
+    "skillnova_job_duration_seconds", "Scheduled job run duration", ("job",), buckets=JOB_BUCKETS)
+job_students_processed = Counter(
+    "skillnova_job_students_processed_total", "Students processed by scheduled jobs", ("job",))
+job_last_students_processed = Gauge(
+    "skillnova_job_last_run_students_processed", "Students processed in the most recent run", ("job",))
+job_last_run = Gauge(
+    "skillnova_job_last_run_timestamp_seconds", "Unix time the job last finished", ("job",))
+certificate_verifications = Counter(
+    "skillnova_certificate_verifications_total", "Certificate verification lookups by result", ("result",))
+dispatch_lag = Histogram(
+    "skillnova_dispatch_lag_seconds", "Delay between a student's next_action_at and its dispatch",
+    buckets=JOB_BUCKETS)
+dispatcher_queued = Gauge(
+    "skillnova_dispatcher_queued", "Students on the due-work dispatcher heap")
+
+
+def track_job(name):
+    """
+    Decorator for scheduled jobs: records the run duration and, if the job
+    returns an int, the number of students it processed.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with job_duration.time(job=name):
+                processed = func(*args, **kwargs)
+            if isinstance(processed, int):
+                job_students_processed.inc(processed, job=name)
+                job_last_students_processed.set(processed, job=name)
+            job_last_run.set(time.time(), job=name)
+            return processed
+        return wrapper
+    return decorator
+
+
+# ------------------------------------------------------------------------------
+# Flask / SQLAlchemy integration
+# ------------------------------------------------------------------------------
+_sqlalchemy_instrumented = False
+
+
+def instrument_sqlalchemy():
+    """Time every statement on every engine (sync and asyncio alike)."""
+    global _sqlalchemy_instrumented
+    if _sqlalchemy_instrumented:
+        return
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+
+    @event.listens_for(Engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("metrics_query_start", []).append(time.perf_counter())
+
+    @event.listens_for(Engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["metrics_query_start"].pop()
+        verb = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "OTHER"
+        db_query_duration.observe(time.perf_counter() - started, statement=verb)
+
+    @event.listens_for(Engine, "handle_error")
+    def _error(context):
+        stack = context.connection.info.get("metrics_query_start") if context.connection else None
+        if stack:
+            stack.pop()
+
+    _sqlalchemy_instrumented = True
+
+
+def metrics_view():
+    from flask import Response, abort, request
+
+    token = os.getenv("METRICS_TOKEN")
+    if token:
+        supplied = request.headers.get("Authorization", "").removeprefix("Bearer ")
+        if not hmac.compare_digest(supplied.encode("utf-8"), token.encode("utf-8")):
+            abort(401)
+    return Response(REGISTRY.exposition(), mimetype="text/plain; version=0.0.4")
+
+
+def init_app(app):
+    from flask import g, request
+
+    @app.before_request
+    def _start_timer():
+        g.metrics_request_start = time.perf_counter()
+
+    @app.after_request
+    def _record_request(response):
+        started = g.pop("metrics_request_start", None)
+        if started is not None:
+            route = request.url_rule.rule if request.url_rule else "<unmatched>"
+            http_request_duration.observe(
+                time.perf_counter() - started,
+                route=route, method=request.method, status=response.status_code)
+        return response
+
+    app.add_url_rule("/metrics", "metrics", metrics_view)
+    instrument_sqlalchemy()
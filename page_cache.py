@@ -0,0 +1,82 @@
+"""
+Render cache for template routes that do not depend on the request.
+
+``PageCache.response("index.html")`` renders the template once and keeps the
+bytes, a gzip copy and a strong ETag. Later hits only negotiate the encoding
+and compare If-None-Match, answering 304 when the client already has the page.
+An entry is re-rendered when Jinja's up-to-date check for the template file
+(an mtime stat) fails, so editing a template takes effect without a restart.
+
+Only use it for pages whose output is the same for every visitor.
+"""
+import gzip
+import hashlib
+import threading
+
+import metrics
+from static_pipeline import accepted_encodings
+
+MIN_GZIP_SIZE = 1024
+
+
+class CachedPage:
+    def __init__(self, body, uptodate):
+        self.body = body
+        self.etag = hashlib.sha256(body).hexdigest()[:32]
+        self.gzip_body = gzip.compress(body, compresslevel=6, mtime=0) if len(body) >= MIN_GZIP_SIZE else None
+        self.uptodate = uptodate
+
+
+class PageCache:
+    def __init__(self, cache_control="no-cache"):
+        # no-cache: browsers keep the copy but revalidate, which costs a 304.
+        self.cache_control = cache_control
+        self._pages = {}
+        self._lock = threading.Lock()
+
+    def _render(self, app, template):
+        from flask import render_template
+
+        env = app.jinja_env
+        _, _, uptodate = env.loader.get_source(env, template)
+        # Compile this template afresh: Jinja's cache only re-checks mtimes when
+        # auto_reload is on, and clearing it would drop every other template.
+        compiled = env.loader.load(env, template, env.make_globals(None))
+        return CachedPage(render_template(compiled).encode("utf-8"), uptodate)
+
+    def page(self, template):
+        from flask import current_app
+
+        page = self._pages.get(template)
+        if page is not None and (page.uptodate is None or page.uptodate()):
+            return page, True
+        with self._lock:
+            page = self._pages.get(template)
+            if page is None or (page.uptodate is not None and not page.uptodate()):
+                page = self._pages[template] = self._render(current_app, template)
+                return page, False
+        return page, True
+
+    def clear(self):
+        with self._lock:
+            self._pages.clear()
+
+    def response(self, template, status=200):
+        from flask import Response, request
+
+        page, hit = self.page(template)
+        use_gzip = page.gzip_body is not None and "gzip" in accepted_encodings(request.headers.get("Accept-Encoding"))
+        etag = f"{page.etag}-gz" if use_gzip else page.etag
+
+        if status == 200 and request.if_none_match.contains_weak(etag):
+            metrics.page_cache.inc(result="not_modified")
+            response = Response(status=304)
+        else:
+            metrics.page_cache.inc(result="hit" if hit else "miss")
+            response = Response(page.gzip_body if use_gzip else page.body, status=status, mimetype="text/html")
+            if use_gzip:
+                response.headers["Content-Encoding"] = "gzip"
+        response.set_etag(etag)
+        response.headers["Cache-Control"] = self.cache_control
+        response.headers["Vary"] = "Accept-Encoding"
+        return response
@@ -0,0 +1,189 @@
+"""
+Opt-in sampling profiler producing collapsed-stack files for flamegraphs.
+
+A single background thread wakes ``PROFILE_HZ`` times per second (default 97)
+and records the current Python stack of every thread that is being profiled.
+Nothing is sampled -- and the thread sleeps -- while no profile is active, so
+the cost when disabled is one env lookup per request. At the default rate the
+sampler costs well under 2% of a busy thread (see
+benchmarks/profiler_overhead.py).
+
+Profiles are written to ``PROFILE_DIR`` (default ``instance/profiles``) in the
+collapsed format understood by flamegraph.pl, speedscope and inferno:
+
+    app.py:send_due_emails;app.py:send_weekly_step;app.py:deliver_email;smtplib.py:sendmail 42
+
+How to attach it:
+
+- Flask requests: set ``PROFILE_SECRET`` and send ``X-Profile: <secret>``;
+  the response carries ``X-Profile-File`` (``init_app``).
+- Scheduled jobs: ``PROFILE_JOBS=due_emails,cleanup`` (or ``*``)
+  profiles every run of those jobs (``wrap_job``).
+- Django views: ``core.middleware.ProfilingMiddleware`` honours the same header.
+"""
+import hmac
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.abspath(os.path.dirname(__file__))
+PROFILE_HEADER = "X-Profile"
+
+
+def profile_dir():
+    return os.getenv("PROFILE_DIR", os.path.join(BASE_DIR, "instance", "profiles"))
+
+
+def _safe(label):
+    return re.sub(r"[^A-Za-z0-9_.-]+", "_", label).strip("_") or "root"
+
+
+class ProfileSession:
+    def __init__(self, kind, label, thread_id):
+        self.kind = kind
+        self.label = label
+        self.thread_id = thread_id
+        self.stacks = Counter()
+        self.samples = 0
+        self.started = time.time()
+        self.path = None
+
+    def write(self, directory=None):
+        directory = directory or profile_dir()
+        os.makedirs(directory, exist_ok=True)
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(self.started))
+        self.path = os.path.join(
+            directory, f"{self.kind}-{_safe(self.label)}-{stamp}-{os.getpid()}-{self.thread_id}.collapsed")
+        with open(self.path, "w") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        return self.path
+
+
+class SamplingProfiler:
+    def __init__(self, hz=None):
+        self.interval = 1.0 / float(hz or os.getenv("PROFILE_HZ", 97))
+        self._sessions = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._thread = None
+        self._names = {}  # code object -> "file.py:function"
+
+    def _frame_name(self, code):
+        name = self._names.get(code)
+        if name is None:
+            name = self._names[code] = f"{os.path.basename(code.co_filename)}:{code.co_name}"
+        return name
+
+    def _stack(self, frame):
+        names = []
+        while frame is not None:
+            names.append(self._frame_name(frame.f_code))
+            frame = frame.f_back
+        names.reverse()
+        return ";".join(names)
+
+    def _run(self):
+        while True:
+            with self._lock:
+                while not self._sessions:
+                    self._wakeup.wait()
+                sessions = list(self._sessions.values())
+            frames = sys._current_frames()
+            samples = [(session, self._stack(frames[session.thread_id]))
+                       for session in sessions if session.thread_id in frames]
+            del frames
+            # Counted under the lock, and only for sessions still running, so
+            # stop() never writes a Counter that is being updated.
+            with self._lock:
+                for session, stack in samples:
+                    if id(session) in self._sessions:
+                        session.stacks[stack] += 1
+                        session.samples += 1
+            time.sleep(self.interval)
+
+    def start(self, kind, label, thread_id=None):
+        session = ProfileSession(kind, label, thread_id or threading.get_ident())
+        with self._lock:
+            self._sessions[id(session)] = session
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+                self._thread.start()
+            self._wakeup.notify()
+        return session
+
+    def stop(self, session, write=True):
+        with self._lock:
+            self._sessions.pop(id(session), None)
+        if write:
+            session.write()
+            logger.info(f"Profile written to {session.path} ({session.samples} samples)")
+        return session
+
+
+profiler = SamplingProfiler()
+
+
+@contextmanager
+def profile(kind, label):
+    """Profile the current thread for the duration of the block."""
+    session = profiler.start(kind, label)
+    try:
+        yield session
+    finally:
+        profiler.stop(session)
+
+
+def request_enabled(header_value):
+    """True if ``header_value`` carries the configured PROFILE_SECRET."""
+    secret = os.getenv("PROFILE_SECRET")
+    # Bytes: compare_digest rejects non-ASCII str, and header values are arbitrary.
+    return bool(secret and header_value
+                and hmac.compare_digest(header_value.encode("utf-8"), secret.encode("utf-8")))
+
+
+def job_enabled(name):
+    configured = {j.strip() for j in os.getenv("PROFILE_JOBS", "").split(",") if j.strip()}
+    return "*" in configured or name in configured
+
+
+def wrap_job(name, func):
+    """Wrap a scheduled job so it is profiled when listed in PROFILE_JOBS."""
+    def wrapper(*args, **kwargs):
+        if not job_enabled(name):
+            return func(*args, **kwargs)
+        with profile("job", name):
+            return func(*args, **kwargs)
+    wrapper.__name__ = getattr(func, "__name__", name)
+    return wrapper
+
+
+def init_app(app):
+    from flask import g, request
+
+    @app.before_request
+    def _start_profile():
+        if request_enabled(request.headers.get(PROFILE_HEADER)):
+            g.profile_session = profiler.start("flask", request.endpoint or request.path)
+
+    @app.after_request
+    def _profile_header(response):
+        session = g.get("profile_session")
+        if session is not None:
+            profiler.stop(session)
+            g.profile_session = None
+            response.headers["X-Profile-File"] = os.path.basename(session.path)
+        return response
+
+    @app.teardown_request
+    def _stop_profile(exc):
+        session = g.pop("profile_session", None)
+        if session is not None:  # request failed before after_request ran
+            profiler.stop(session)
@@ -0,0 +1,267 @@
+"""
+Non-blocking retries with exponential backoff and per-target circuit breakers.
+
+``retry_scheduler.run(func, ...)`` makes the first attempt inline. If it fails
+with a transient error the call is *not* retried by sleeping in the caller:
+it is put on a timer heap and re-run later on a small worker pool, with
+exponential backoff and jitter, and the caller gets ``False`` (deferred)
+straight away. A serial batch job therefore moves on to the next student
+while one flaky recipient waits for its retry.
+
+Every target (an SMTP server, the database) has a ``CircuitBreaker``. After
+``BREAKER_FAILURES`` consecutive transient failures it opens: calls to that
+target are deferred without being attempted until ``BREAKER_RESET`` seconds
+have passed, then one probe call decides whether it closes again. Permanent
+errors (a rejected address, bad credentials) are raised to the caller at once
+and do not count against the breaker, so one bad address never delays or
+blocks the rest of a batch.
+
+Environment:
+    RETRY_MAX_ATTEMPTS   attempts per call including the first (default 5)
+    RETRY_BASE_DELAY     seconds before the first retry (default 2)
+    RETRY_MAX_DELAY      backoff cap in seconds (default 300)
+    RETRY_WORKERS        threads running due retries (default 4)
+    BREAKER_FAILURES     consecutive failures that open a breaker (default 5)
+    BREAKER_RESET        seconds a breaker stays open before a probe (default 30)
+"""
+import heapq
+import itertools
+import logging
+import os
+import random
+import threading
+import time
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+_STATE_VALUES = {"closed": 0, "half_open": 1, "open": 2}
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a target whose breaker is open."""
+
+
+# ------------------------------------------------------------------------------
+# Circuit breakers
+# ------------------------------------------------------------------------------
+class CircuitBreaker:
+    def __init__(self, name, failure_threshold=None, reset_timeout=None):
+        self.name = name
+        self.failure_threshold = int(failure_threshold or os.getenv("BREAKER_FAILURES", 5))
+        self.reset_timeout = float(reset_timeout or os.getenv("BREAKER_RESET", 30))
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def _set_state(self, state):
+        if state != self.state:
+            logger.warning(f"Circuit {self.name} {self.state} -> {state}")
+            self.state = state
+            metrics.circuit_state.set(_STATE_VALUES[state], target=self.name)
+
+    def allow(self):
+        """True if a call may go through now (in half-open state: one probe at a time)."""
+        with self._lock:
+            if self.state == "open" and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self._set_state("half_open")
+                self._probing = False
+            if self.state == "closed":
+                return True
+            if self.state == "half_open" and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def retry_after(self):
+        """Seconds until an open breaker lets a probe through (0 if not open)."""
+        if self.state != "open":
+            return 0.0
+        return max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at))
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self._probing = False
+            self._set_state("closed")
+
+    def release_probe(self):
+        """
+        Settle a call that neither proved nor disproved the target (a permanent
+        error): a half-open breaker lets the next call probe instead.
+        """
+        with self._lock:
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._probing = False
+            if self.state == "half_open" or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+                self._set_state("open")
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def breaker(name):
+    """The process-wide breaker for ``name`` (created on first use)."""
+    with _breakers_lock:
+        if name not in _breakers:
+            _breakers[name] = CircuitBreaker(name)
+        return _breakers[name]
+
+
+# ------------------------------------------------------------------------------
+# Backoff
+# ------------------------------------------------------------------------------
+class Backoff:
+    """Exponential backoff with "equal jitter": half fixed, half random."""
+
+    def __init__(self, max_attempts=None, base=None, cap=None, factor=2.0):
+        self.max_attempts = int(max_attempts or os.getenv("RETRY_MAX_ATTEMPTS", 5))
+        self.base = float(base or os.getenv("RETRY_BASE_DELAY", 2))
+        self.cap = float(cap or os.getenv("RETRY_MAX_DELAY", 300))
+        self.factor = factor
+
+    def delay(self, attempt):
+        """Delay before attempt number ``attempt + 1`` (``attempt`` >= 1)."""
+        ceiling = min(self.cap, self.base * self.factor ** (attempt - 1))
+        return ceiling / 2 + random.uniform(0, ceiling / 2)
+
+
+# ------------------------------------------------------------------------------
+# Scheduler
+# ------------------------------------------------------------------------------
+class _Call:
+    def __init__(self, func, key, target, is_transient, backoff, on_success, on_giveup):
+        self.func = func
+        self.key = key
+        self.breaker = breaker(target) if target else None
+        self.target = target or "default"
+        self.is_transient = is_transient
+        self.backoff = backoff
+        self.on_success = on_success
+        self.on_giveup = on_giveup
+        self.attempt = 0
+
+
+class RetryScheduler:
+    def __init__(self, workers=None):
+        self.workers = int(workers or os.getenv("RETRY_WORKERS", 4))
+        self._heap = []
+        self._seq = itertools.count()
+        self._keys = set()
+        self._running = 0
+        self._cond = threading.Condition()
+        self._threads = []
+
+    def _start(self):
+        # Called with the condition held.
+        if not self._threads:
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._worker, name=f"retry-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def pending(self, key):
+        """True while a call with this key is waiting for (or running) a retry."""
+        return key in self._keys
+
+    def run(self, func, key=None, target=None, is_transient=lambda exc: False,
+            backoff=None, on_success=None, on_giveup=None):
+        """
+        Call ``func()`` now; on a transient failure schedule retries instead.
+
+        Returns True if the call succeeded inline (``on_success(result)`` has
+        run), False if it was deferred or is already pending under ``key``.
+        Permanent errors are raised. ``on_giveup(exc)`` runs once the call has
+        finally failed, inline or in the background.
+        """
+        if key is not None and key in self._keys:
+            return False
+        call = _Call(func, key, target, is_transient, backoff or Backoff(), on_success, on_giveup)
+        return self._attempt(call, inline=True)
+
+    def _attempt(self, call, inline):
+        """Run one attempt; True when finished successfully."""
+        call.attempt += 1
+        try:
+            if call.breaker is not None and not call.breaker.allow():
+                raise CircuitOpenError(f"circuit {call.target} is open")
+            result = call.func()
+        except Exception as exc:
+            open_circuit = isinstance(exc, CircuitOpenError)
+            transient = open_circuit or call.is_transient(exc)
+            if call.breaker is not None and not open_circuit:
+                if transient:
+                    call.breaker.record_failure()
+                else:
+                    call.breaker.release_probe()
+            if transient and call.attempt < call.backoff.max_attempts:
+                delay = call.backoff.delay(call.attempt)
+                if call.breaker is not None:
+                    delay = max(delay, call.breaker.retry_after())
+                if not open_circuit:
+                    logger.warning(f"Attempt {call.attempt}: {call.key or call.target} failed: {exc}; "
+                                   f"retrying in {delay:.1f}s")
+                self._schedule(call, delay)
+                return False
+            if not inline:
+                logger.error(f"Giving up on {call.key or call.target} after {call.attempt} attempts: {exc}")
+            if call.on_giveup is not None:
+                call.on_giveup(exc)
+            if inline:
+                raise
+            return False
+        if call.breaker is not None:
+            call.breaker.record_success()
+        if call.on_success is not None:
+            call.on_success(result)
+        return True
+
+    def _schedule(self, call, delay):
+        metrics.retries_scheduled.inc(target=call.target)
+        with self._cond:
+            if call.key is not None:
+                self._keys.add(call.key)
+            heapq.heappush(self._heap, (time.monotonic() + delay, next(self._seq), call))
+            self._start()
+            self._cond.notify_all()
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                while True:
+                    if self._heap:
+                        due = self._heap[0][0] - time.monotonic()
+                        if due <= 0:
+                            break
+                        self._cond.wait(due)
+                    else:
+                        self._cond.wait()
+                _, _, call = heapq.heappop(self._heap)
+                self._running += 1
+            try:
+                self._attempt(call, inline=False)
+            except Exception:
+                logger.exception(f"Retry callback for {call.key or call.target} failed")
+            finally:
+                with self._cond:
+                    self._running -= 1
+                    if call.key is not None and not any(c.key == call.key for _, _, c in self._heap):
+                        self._keys.discard(call.key)
+                    self._cond.notify_all()
+
+    def wait_idle(self, timeout=None):
+        """Block until no retries are queued or running (benchmarks, shutdown)."""
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._heap and not self._running, timeout)
+
+
+retry_scheduler = RetryScheduler()
@@ -0,0 +1,177 @@
+"""
+Local SMTP sink for offline email testing and benchmarks.
+
+A small asyncio SMTP server (in the spirit of aiosmtpd's Sink handler) that
+accepts any login and discards every message. It can inject artificial
+latency and random failures so retry and pooling behaviour of ``send_email``
+can be exercised without touching Gmail.
+
+Run standalone:
+    python smtp_sink.py --port 2525 --latency-ms 50 --failure-rate 0.05
+
+then point the app at it:
+    SMTP_SERVER=127.0.0.1 SMTP_PORT=2525 SMTP_STARTTLS=false
+
+or embed it with ``SMTPSink(...).start_in_thread()`` (see benchmarks/email_throughput.py).
+"""
+import argparse
+import asyncio
+import logging
+import random
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class SMTPSink:
+    """
+    :param latency_ms: delay added before answering the end of DATA (per message)
+    :param connect_latency_ms: delay added before the greeting (per connection)
+    :param failure_rate: probability a message is rejected with a 451 temporary failure
+    """
+
+    def __init__(self, host="127.0.0.1", port=2525, latency_ms=0, connect_latency_ms=0,
+                 failure_rate=0.0, seed=None):
+        self.host = host
+        self.port = port
+        self.latency = latency_ms / 1000
+        self.connect_latency = connect_latency_ms / 1000
+        self.failure_rate = failure_rate
+        self.random = random.Random(seed)
+        self.connections = 0
+        self.messages = 0
+        self.rejected = 0
+        self.bytes_received = 0
+        self._loop = None
+        self._server = None
+        self._thread = None
+
+    def stats(self):
+        return {
+            "connections": self.connections,
+            "messages": self.messages,
+            "rejected": self.rejected,
+            "bytes_received": self.bytes_received,
+        }
+
+    def reset_stats(self):
+        self.connections = self.messages = self.rejected = self.bytes_received = 0
+
+    # --------------------------------------------------------------------------
+    # SMTP session
+    # --------------------------------------------------------------------------
+    async def _handle(self, reader, writer):
+        self.connections += 1
+
+        async def reply(line):
+            writer.write(line.encode() + b"\r\n")
+            await writer.drain()
+
+        try:
+            if self.connect_latency:
+                await asyncio.sleep(self.connect_latency)
+            await reply("220 skillnova-sink ESMTP ready")
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                command = line.decode(errors="replace").strip()
+                verb = command.split(" ", 1)[0].upper()
+
+                if verb == "EHLO":
+                    writer.write(b"250-skillnova-sink\r\n250-AUTH PLAIN LOGIN\r\n250-8BITMIME\r\n")
+                    await reply("250 SIZE 52428800")
+                elif verb == "HELO":
+                    await reply("250 skillnova-sink")
+                elif verb == "AUTH":
+                    mechanism = command.split()[1].upper() if len(command.split()) > 1 else ""
+                    if mechanism == "LOGIN" and len(command.split()) == 2:
+                        # username and password prompts
+                        await reply("334 VXNlcm5hbWU6")
+                        await reader.readline()
+                        await reply("334 UGFzc3dvcmQ6")
+                        await reader.readline()
+                    elif mechanism == "PLAIN" and len(command.split()) == 2:
+                        await reply("334 ")
+                        await reader.readline()
+                    await reply("235 2.7.0 Authentication successful")
+                elif verb in ("MAIL", "RCPT", "RSET", "NOOP"):
+                    await reply("250 OK")
+                elif verb == "DATA":
+                    await reply("354 End data with <CR><LF>.<CR><LF>")
+                    size = 0
+                    while True:
+                        data_line = await reader.readline()
+                        if not data_line or data_line == b".\r\n":
+                            break
+                        size += len(data_line)
+                    if self.latency:
+                        await asyncio.sleep(self.latency)
+                    if self.failure_rate and self.random.random() < self.failure_rate:
+                        self.rejected += 1
+                        await reply("451 4.3.0 Temporary failure injected by sink")
+                    else:
+                        self.messages += 1
+                        self.bytes_received += size
+                        await reply("250 2.0.0 Message accepted")
+                elif verb == "QUIT":
+                    await reply("221 Bye")
+                    break
+                else:
+                    await reply("502 5.5.2 Command not implemented")
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    # --------------------------------------------------------------------------
+    # Lifecycle
+    # --------------------------------------------------------------------------
+    async def serve(self):
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        logger.info(f"SMTP sink listening on {self.host}:{self.port}")
+        return self._server
+
+    def start_in_thread(self):
+        """Run the sink on a background event loop. Returns (host, port)."""
+        started = threading.Event()
+
+        def run():
+            self._loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(self._loop)
+            self._loop.run_until_complete(self.serve())
+            started.set()
+            self._loop.run_forever()
+
+        self._thread = threading.Thread(target=run, name="smtp-sink", daemon=True)
+        self._thread.start()
+        started.wait()
+        return self.host, self.port
+
+    def stop(self):
+        if self._loop:
+            self._loop.call_soon_threadsafe(self._server.close)
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(timeout=5)
+
+
+async def _main(args):
+    sink = SMTPSink(args.host, args.port, args.latency_ms, args.connect_latency_ms, args.failure_rate)
+    server = await sink.serve()
+    async with server:
+        await server.serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local SMTP sink with injectable latency and failures")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=2525)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--connect-latency-ms", type=float, default=0)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    logging.basicConfig(level=logging.INFO)
+    try:
+        asyncio.run(_main(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
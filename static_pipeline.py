@@ -0,0 +1,307 @@
+"""
+Static asset pipeline: fingerprint, minify and precompress.
+
+``python static_pipeline.py`` reads the assets under ``public_html/`` (css/,
+js/, image/) and writes to ``public_html/dist/``:
+
+- ``css/style.<hash>.css`` -- minified copy named after its content hash,
+- ``css/style.<hash>.css.gz`` / ``.br`` -- gzip and brotli variants (brotli
+  only when the optional ``brotli`` package is installed),
+- ``manifest.json`` -- maps ``css/style.css`` to its fingerprinted name,
+- ``images.json`` -- responsive WebP/AVIF derivatives of each raster image
+  (image_pipeline.py), used by the ``picture()`` template helper.
+
+``init_app`` makes the Flask app use it: ``url_for('static', filename=...)``
+resolves to the fingerprinted file (so templates need no changes), and files
+under ``dist/`` are served with ``Cache-Control: immutable`` and the best
+precompressed variant the client accepts. Without a build the app falls back
+to the plain files, which keeps local development unchanged.
+
+The Django project reuses ``precompress``/``negotiate`` from here (see
+core/storage.py and core/static_views.py).
+"""
+import gzip
+import hashlib
+import json
+import logging
+import mimetypes
+import os
+import posixpath
+import re
+import shutil
+
+logger = logging.getLogger(__name__)
+
+mimetypes.add_type("image/webp", ".webp")
+mimetypes.add_type("image/avif", ".avif")
+
+BASE_DIR = os.path.abspath(os.path.dirname(__file__))
+SOURCE_DIR = os.path.join(BASE_DIR, "public_html")
+DIST_DIR = os.path.join(SOURCE_DIR, "dist")
+ASSET_DIRS = ("css", "js", "image")
+
+COMPRESSIBLE = {".css", ".js", ".svg", ".json", ".txt", ".map"}
+MIN_COMPRESS_SIZE = 512
+RASTER_IMAGES = {".png", ".jpg", ".jpeg"}
+IMMUTABLE = "public, max-age=31536000, immutable"
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))  # preference order
+
+
+# ------------------------------------------------------------------------------
+# Minification (conservative: whitespace and comments only)
+# ------------------------------------------------------------------------------
+def minify_css(text):
+    text = re.sub(r"/\*.*?\*/", "", text, flags=re.S)
+    text = re.sub(r"\s+", " ", text)
+    text = re.sub(r"\s*([{};,>])\s*", r"\1", text)
+    # Only inside declaration blocks: in a selector "a :hover" is a descendant
+    # combinator and "a:hover" something else.
+    text = re.sub(r"\{[^{}]*\}", lambda block: re.sub(r"\s*:\s*", ":", block.group(0)), text)
+    return text.replace(";}", "}").strip()
+
+
+def minify_js(text):
+    # Only drops full-line // comments, indentation and blank lines; anything
+    # smarter needs a real JS parser.
+    lines = []
+    for line in text.splitlines():
+        stripped = line.strip()
+        if stripped and not stripped.startswith("//"):
+            lines.append(stripped)
+    return "\n".join(lines)
+
+
+MINIFIERS = {".css": minify_css, ".js": minify_js}
+
+
+# ------------------------------------------------------------------------------
+# Compression
+# ------------------------------------------------------------------------------
+def _brotli():
+    try:
+        import brotli
+    except ImportError:
+        return None
+    return brotli
+
+
+def precompress(path):
+    """
+    Write ``path.gz`` (and ``path.br`` if brotli is available) next to ``path``
+    when the file type compresses and the variant is actually smaller.
+    Returns {encoding: size}.
+    """
+    if os.path.splitext(path)[1].lower() not in COMPRESSIBLE:
+        return {}
+    with open(path, "rb") as f:
+        data = f.read()
+    if len(data) < MIN_COMPRESS_SIZE:
+        return {}
+
+    sizes = {}
+    variants = [("gzip", ".gz", lambda d: gzip.compress(d, compresslevel=9, mtime=0))]
+    brotli = _brotli()
+    if brotli is not None:
+        variants.append(("br", ".br", lambda d: brotli.compress(d, quality=11)))
+    for encoding, suffix, compress in variants:
+        compressed = compress(data)
+        if len(compressed) < len(data):
+            with open(path + suffix, "wb") as f:
+                f.write(compressed)
+            sizes[encoding] = len(compressed)
+    return sizes
+
+
+def accepted_encodings(header):
+    """Encodings from an Accept-Encoding header with q > 0."""
+    accepted = set()
+    for item in (header or "").split(","):
+        parts = item.strip().split(";")
+        name = parts[0].strip().lower()
+        q = 1.0
+        for param in parts[1:]:
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if name and q > 0:
+            accepted.add(name)
+    return accepted
+
+
+def negotiate(root, relpath, accept_encoding):
+    """
+    Pick the file to send for ``relpath`` under ``root``.
+    Returns (path, content_encoding) with content_encoding None for identity,
+    or (None, None) if the file does not exist.
+    """
+    path = os.path.normpath(os.path.join(root, relpath))
+    if not path.startswith(os.path.abspath(root) + os.sep) or not os.path.isfile(path):
+        return None, None
+    accepted = accepted_encodings(accept_encoding)
+    for encoding, suffix in ENCODINGS:
+        if (encoding in accepted or "*" in accepted) and os.path.isfile(path + suffix):
+            return path + suffix, encoding
+    return path, None
+
+
+# ------------------------------------------------------------------------------
+# Build
+# ------------------------------------------------------------------------------
+def fingerprinted_name(relpath, data):
+    stem, ext = os.path.splitext(relpath)
+    return f"{stem}.{hashlib.sha256(data).hexdigest()[:12]}{ext}"
+
+
+def build(source_dir=SOURCE_DIR, dist_dir=DIST_DIR, asset_dirs=ASSET_DIRS):
+    """Rebuild ``dist_dir`` from ``source_dir`` and return the manifest."""
+    if os.path.isdir(dist_dir):
+        shutil.rmtree(dist_dir)
+    manifest = {}
+    images = {}
+    totals = {"original": 0, "minified": 0, "gzip": 0, "br": 0}
+
+    for asset_dir in asset_dirs:
+        for dirpath, _, filenames in os.walk(os.path.join(source_dir, asset_dir)):
+            for filename in sorted(filenames):
+                source = os.path.join(dirpath, filename)
+                relpath = os.path.relpath(source, source_dir).replace(os.sep, "/")
+                with open(source, "rb") as f:
+                    data = f.read()
+                totals["original"] += len(data)
+
+                minify = MINIFIERS.get(os.path.splitext(filename)[1].lower())
+                if minify is not None:
+                    data = minify(data.decode("utf-8")).encode("utf-8")
+                totals["minified"] += len(data)
+
+                hashed = fingerprinted_name(relpath, data)
+                target = os.path.join(dist_dir, hashed)
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                with open(target, "wb") as f:
+                    f.write(data)
+                sizes = precompress(target)
+                totals["gzip"] += sizes.get("gzip", len(data))
+                totals["br"] += sizes.get("br", sizes.get("gzip", len(data)))
+                manifest[relpath] = hashed
+
+                if os.path.splitext(filename)[1].lower() in RASTER_IMAGES:
+                    images[relpath] = _image_variants(target, hashed, len(data))
+
+    with open(os.path.join(dist_dir, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    with open(os.path.join(dist_dir, "images.json"), "w") as f:
+        json.dump(images, f, indent=2, sort_keys=True)
+    brotli_note = f"{totals['br']} brotli" if _brotli() else "brotli not installed"
+    logger.info(
+        f"Built {len(manifest)} assets: {totals['original']} bytes -> {totals['minified']} minified, "
+        f"{totals['gzip']} gzip, {brotli_note}"
+    )
+    return manifest
+
+
+def _image_variants(target, hashed, original_bytes):
+    from image_pipeline import responsive_variants
+
+    stem = os.path.splitext(os.path.basename(hashed))[0]
+    variants = responsive_variants(target, os.path.dirname(target), stem)
+    for variant in variants:
+        name = variant.pop("name")
+        variant["path"] = posixpath.join(posixpath.dirname(hashed), name) if name else hashed
+    smallest = min(v["bytes"] for v in variants)
+    logger.info(f"{hashed}: {len(variants)} derivatives, {original_bytes} bytes -> smallest {smallest}")
+    return variants
+
+
+def load_manifest(dist_dir=DIST_DIR, name="manifest.json"):
+    try:
+        with open(os.path.join(dist_dir, name)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def picture_markup(src, variants, url, alt="", sizes="100vw", **attrs):
+    """
+    ``<picture>`` markup for an image with responsive derivatives. ``url``
+    maps a dist-relative path to its public URL.
+    """
+    from html import escape
+
+    from image_pipeline import MIME_TYPES
+
+    by_format = {}
+    for variant in variants:
+        by_format.setdefault(variant["format"], []).append(variant)
+    fallback_format = next((v["format"] for v in variants if v["format"] in ("png", "jpeg")), None)
+
+    parts = ["<picture>"]
+    for fmt, items in by_format.items():
+        if fmt == fallback_format:
+            continue
+        srcset = ", ".join(f"{url(v['path'])} {v['width']}w" for v in items)
+        parts.append(f'<source type="{MIME_TYPES[fmt]}" srcset="{escape(srcset)}" sizes="{escape(sizes)}">')
+    img_attrs = {"src": src, "alt": alt, **{k.rstrip("_"): v for k, v in attrs.items()}}
+    if fallback_format:
+        img_attrs["srcset"] = ", ".join(f"{url(v['path'])} {v['width']}w" for v in by_format[fallback_format])
+        img_attrs["sizes"] = sizes
+    parts.append("<img " + " ".join(f'{k}="{escape(str(v))}"' for k, v in img_attrs.items()) + ">")
+    parts.append("</picture>")
+    return "".join(parts)
+
+
+# ------------------------------------------------------------------------------
+# Flask integration
+# ------------------------------------------------------------------------------
+def init_app(app, dist_dir=DIST_DIR):
+    from flask import abort, request, send_file, url_for
+    from markupsafe import Markup
+
+    manifest = load_manifest(dist_dir)
+    images = load_manifest(dist_dir, "images.json")
+    if not manifest:
+        logger.info("No built static assets found; serving public_html/ as-is")
+    dist_prefix = os.path.relpath(dist_dir, app.static_folder).replace(os.sep, "/") + "/"
+
+    @app.url_defaults
+    def _fingerprinted_static(endpoint, values):
+        if endpoint == "static" and "filename" in values:
+            hashed = manifest.get(values["filename"].lstrip("/"))
+            if hashed:
+                values["filename"] = dist_prefix + hashed
+
+    @app.template_global()
+    def picture(filename, alt="", sizes="100vw", **attrs):
+        """Responsive ``<picture>`` for a static image; a plain ``<img>`` without a build."""
+        filename = filename.lstrip("/")
+        return Markup(picture_markup(
+            url_for("static", filename=filename), images.get(filename, []),
+            lambda path: url_for("static", filename=dist_prefix + path),
+            alt=alt, sizes=sizes, **attrs))
+
+    plain_static = app.view_functions["static"]
+
+    def static(filename):
+        if not filename.startswith(dist_prefix):
+            return plain_static(filename=filename)
+        relpath = filename[len(dist_prefix):]
+        path, encoding = negotiate(dist_dir, relpath, request.headers.get("Accept-Encoding"))
+        if path is None:
+            abort(404)
+        mimetype = mimetypes.guess_type(relpath)[0] or "application/octet-stream"
+        response = send_file(path, mimetype=mimetype, download_name=os.path.basename(relpath),
+                             conditional=True, max_age=31536000)
+        if encoding:
+            response.headers["Content-Encoding"] = encoding
+        response.headers["Vary"] = "Accept-Encoding"
+        response.headers["Cache-Control"] = IMMUTABLE
+        return response
+
+    app.view_functions["static"] = static
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    build()
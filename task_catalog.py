@@ -0,0 +1,94 @@
+"""
+Weekly task catalog.
+
+The Google Form submission link for each (domain, week) lives in
+``data/weekly_tasks.csv`` (columns: domain, week, form_url) instead of a dict
+literal rebuilt on every scheduler run. The file is parsed once into a dict
+keyed by (domain, week); ``refresh()`` re-reads it only when its mtime changes,
+so edits are picked up by the next batch without a restart.
+
+Adding a week 5 (or a new domain) is a matter of adding rows to the file. A
+malformed row is logged with its line number and skipped.
+"""
+import csv
+import hashlib
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.abspath(os.path.dirname(__file__))
+DEFAULT_PATH = os.path.join(BASE_DIR, "data", "weekly_tasks.csv")
+
+
+class TaskCatalog:
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = path
+        self.version = None  # short content hash of the loaded file
+        self._tasks = {}
+        self._weeks = {}
+        self._mtime = None
+        self._lock = threading.Lock()
+
+    def refresh(self):
+        """
+        Reload the file if it changed since the last load. A file that fails to
+        parse is logged and the previously loaded catalog is kept.
+        """
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except OSError as e:
+            logger.error(f"Weekly task catalog unavailable: {str(e)}")
+            return self
+        if mtime == self._mtime:
+            return self
+
+        with self._lock:
+            if mtime == self._mtime:
+                return self
+            try:
+                tasks, weeks, version = self._load()
+            except (OSError, ValueError, KeyError) as e:
+                logger.error(f"Failed to load weekly task catalog {self.path}: {str(e)}")
+                return self
+            self._tasks, self._weeks, self.version, self._mtime = tasks, weeks, version, mtime
+        logger.info(f"Loaded weekly task catalog version {version} ({len(tasks)} entries)")
+        return self
+
+    def _load(self):
+        with open(self.path, "rb") as f:
+            raw = f.read()
+        tasks, weeks = {}, {}
+        reader = csv.DictReader(raw.decode("utf-8").splitlines())
+        missing = {"domain", "week"} - set(reader.fieldnames or ())
+        if missing:
+            raise ValueError(f"missing columns {sorted(missing)}")
+        for row in reader:
+            # A bad row only loses its own entry, not the whole catalog.
+            try:
+                domain = (row["domain"] or "").strip()
+                week = int(row["week"])
+                if not domain:
+                    raise ValueError("empty domain")
+            except (ValueError, TypeError) as e:
+                logger.error(f"Skipping line {reader.line_num} of {self.path}: {str(e)}: {row}")
+                continue
+            tasks[(domain, week)] = (row.get("form_url") or "").strip()
+            weeks[domain] = max(weeks.get(domain, 0), week)
+        return tasks, weeks, hashlib.sha256(raw).hexdigest()[:12]
+
+    def get(self, domain, week):
+        """Task link for ``domain`` in ``week``, or None if the catalog has no such entry."""
+        if self._mtime is None:
+            self.refresh()
+        return self._tasks.get((domain, week))
+
+    def weeks(self, domain):
+        """Number of weeks defined for ``domain`` (0 for an unknown domain)."""
+        if self._mtime is None:
+            self.refresh()
+        return self._weeks.get(domain, 0)
+
+
+weekly_tasks = TaskCatalog()
@@ -0,0 +1,216 @@
+"""
+Certificate and offer letter templates, described in a manifest.
+
+``certificate_templates/manifest.json`` maps a template name to its image,
+the ``kind`` of document it renders (``certificate``, ``offer_letter``), the
+optional ``domains`` it is meant for, and its text fields::
+
+    "certificate_data_science": {
+      "kind": "certificate",
+      "domains": ["Data Science"],
+      "image": "certificate_data_science.jpg",
+      "fields": {
+        "name": {"position": [643, 410], "anchor": "ms", "font": "DejaVuSans-Bold.ttf",
+                 "size": 50, "max_width": 620, "color": "black"},
+        ...
+      },
+      "qr": {"position": [1025, 125], "box_size": 3, "label_size": 11}
+    }
+
+``get(kind, domain)`` picks the template listing the domain, else the one of
+that kind without ``domains``. A field with ``max_width`` shrinks to fit it,
+down to a minimum size below which it is cut short with an ellipsis
+(text_layout.TextFit); ``anchor`` is Pillow's text anchor (default ``la``,
+top-left). Fonts are looked up in ``CERTIFICATE_FONT_DIR`` unless absolute.
+Adding a per-domain or partner design is a manifest entry plus an image.
+
+Each template image is decoded once into a raw RGBX file under
+``TEMPLATE_CACHE_DIR`` (keyed by the image's size and mtime) and mapped
+read-only with mmap. Every worker process renders from the same page-cache
+pages instead of holding its own decoded copy, and no process pays the JPEG
+decode per document; a render starts from a private RGB copy of the mapping.
+
+The manifest is re-read when its mtime changes, like the weekly task catalog.
+
+Environment:
+    CERTIFICATE_FONT_DIR  directory of the manifest's font files (default DejaVu's)
+    TEMPLATE_CACHE_DIR    decoded template buffers (default instance/template_cache)
+"""
+import hashlib
+import json
+import logging
+import mmap
+import os
+import tempfile
+import threading
+
+from PIL import Image, ImageDraw
+
+from text_layout import TextFit, glyph_advances
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.abspath(os.path.dirname(__file__))
+TEMPLATE_DIR = os.path.join(BASE_DIR, "certificate_templates")
+DEFAULT_MANIFEST = os.path.join(TEMPLATE_DIR, "manifest.json")
+FONT_DIR = os.getenv("CERTIFICATE_FONT_DIR", "/usr/share/fonts/truetype/dejavu")
+CACHE_DIR = os.getenv("TEMPLATE_CACHE_DIR", os.path.join(BASE_DIR, "instance", "template_cache"))
+
+
+class Field:
+    def __init__(self, name, spec):
+        self.name = name
+        self.position = tuple(spec["position"])
+        self.anchor = spec.get("anchor", "la")
+        self.color = spec.get("color", "black")
+        self.size = int(spec["size"])
+        font = spec["font"]
+        self.font_path = font if os.path.isabs(font) else os.path.join(FONT_DIR, font)
+        max_width = spec.get("max_width")
+        self.fit = TextFit(self.font_path, max_width, self.size) if max_width else None
+
+    def fit_size(self, text):
+        return self.fit.size(text) if self.fit else self.size
+
+    def fit_sizes(self, texts):
+        return self.fit.sizes(texts) if self.fit else [self.size] * len(texts)
+
+    def clip(self, text, size):
+        return self.fit.clip(text, size) if self.fit else text
+
+    def font(self, size=None):
+        return glyph_advances(self.font_path, size or self.size).font
+
+
+class Template:
+    def __init__(self, name, spec, cache_dir=CACHE_DIR):
+        self.name = name
+        self.kind = spec["kind"]
+        self.domains = frozenset(spec.get("domains", ()))
+        self.image_path = os.path.join(TEMPLATE_DIR, spec["image"])
+        self.fields = {field: Field(field, field_spec) for field, field_spec in spec["fields"].items()}
+        self.qr = spec.get("qr")
+        self.cache_dir = cache_dir
+        self._base = None
+        self._lock = threading.Lock()
+
+    def _decoded_path(self):
+        stat = os.stat(self.image_path)
+        key = hashlib.sha256(f"{self.image_path}:{stat.st_size}:{stat.st_mtime_ns}".encode()).hexdigest()[:12]
+        return os.path.join(self.cache_dir, f"{self.name}-{key}.rgbx")
+
+    def base(self):
+        """The decoded template as a read-only RGBX image backed by a shared mapping."""
+        if self._base is None:
+            with self._lock:
+                if self._base is None:
+                    self._base = self._map()
+        return self._base
+
+    def _map(self):
+        with Image.open(self.image_path) as source:
+            size = source.size
+            path = self._decoded_path()
+            if not os.path.exists(path):
+                os.makedirs(self.cache_dir, exist_ok=True)
+                # Written under a temporary name: workers starting together
+                # never map a half-written file.
+                fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+                with os.fdopen(fd, "wb") as f:
+                    f.write(source.convert("RGBX").tobytes())
+                os.replace(tmp_path, path)
+                logger.info(f"Decoded template {self.name} to {path}")
+        with open(path, "rb") as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        # RGBX is Pillow's in-memory layout for RGB, so this shares the mapping.
+        return Image.frombuffer("RGBX", size, buffer, "raw", "RGBX", 0, 1)
+
+    def render(self, values, certificate_id=None, sizes=None):
+        """
+        A filled-in RGB copy of the template. ``values`` maps field names to
+        text; ``sizes`` may carry font sizes already fitted for a batch.
+        """
+        img = self.base().convert("RGB")
+        draw = ImageDraw.Draw(img)
+        sizes = sizes or {}
+        for name, field in self.fields.items():
+            text = values.get(name)
+            if not text:
+                continue
+            size = sizes.get(name) or field.fit_size(text)
+            draw.text(field.position, field.clip(text, size), fill=field.color, font=field.font(size), anchor=field.anchor)
+        if self.qr and certificate_id:
+            self._stamp_verification(img, draw, certificate_id)
+        return img
+
+    def _stamp_verification(self, img, draw, certificate_id):
+        """The certificate ID and a QR code linking to its /verify page."""
+        import qrcode
+        from certificates import verify_url
+
+        qr = qrcode.QRCode(box_size=self.qr.get("box_size", 3), border=1,
+                           error_correction=qrcode.constants.ERROR_CORRECT_M)
+        qr.add_data(verify_url(certificate_id))
+        qr_img = qr.make_image(fill_color="black", back_color="white").get_image().convert("RGB")
+        x, y = self.qr["position"]
+        img.paste(qr_img, (x, y))
+        label_font = glyph_advances(os.path.join(FONT_DIR, "DejaVuSans.ttf"), self.qr.get("label_size", 11)).font
+        draw.text((x + qr_img.width // 2, y + qr_img.height + 4), certificate_id,
+                  fill="black", font=label_font, anchor="ma")
+
+
+class TemplateRegistry:
+    def __init__(self, path=DEFAULT_MANIFEST, cache_dir=CACHE_DIR):
+        self.path = path
+        self.cache_dir = cache_dir
+        self._templates = {}
+        self._mtime = None
+        self._lock = threading.Lock()
+
+    def refresh(self):
+        """
+        Reload the manifest if it changed. A manifest that fails to parse is
+        logged and the previously loaded templates are kept.
+        """
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except OSError as e:
+            logger.error(f"Template manifest unavailable: {str(e)}")
+            return self
+        if mtime == self._mtime:
+            return self
+
+        with self._lock:
+            if mtime == self._mtime:
+                return self
+            try:
+                with open(self.path, encoding="utf-8") as f:
+                    manifest = json.load(f)
+                templates = {name: Template(name, spec, self.cache_dir) for name, spec in manifest.items()}
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                logger.error(f"Failed to load template manifest {self.path}: {str(e)}")
+                return self
+            self._templates, self._mtime = templates, mtime
+        logger.info(f"Loaded {len(templates)} certificate templates")
+        return self
+
+    def __getitem__(self, name):
+        return self.refresh()._templates[name]
+
+    def get(self, kind, domain=None):
+        """The template of ``kind`` for ``domain``, falling back to the kind's default."""
+        templates = self.refresh()._templates.values()
+        default = None
+        for template in templates:
+            if template.kind != kind:
+                continue
+            if domain in template.domains:
+                return template
+            if not template.domains and default is None:
+                default = template
+        if default is None:
+            raise KeyError(f"No {kind} template in {self.path}")
+        return default
+
+
+templates = TemplateRegistry()
@@ -0,0 +1,48 @@
+"""
+Shared fixtures for the Flask app tests.
+
+``app`` reads DATABASE_URL when it is imported, so it is pointed at a scratch
+SQLite file before any test module imports it. Run with ``python -m pytest``
+from the repository root.
+"""
+import os
+import sys
+import tempfile
+
+import pytest
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT_DIR)
+
+_DB_PATH = os.path.join(tempfile.mkdtemp(prefix="skillnova-tests-"), "students.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{_DB_PATH}"
+os.environ.setdefault("CERTIFICATE_SECRET", "test-certificate-secret")
+
+
+@pytest.fixture
+def app_module():
+    import app as app_module
+
+    with app_module.app.app_context():
+        app_module.db.engine.dispose()
+        if os.path.exists(_DB_PATH):
+            os.remove(_DB_PATH)
+        yield app_module
+        app_module.db.session.remove()
+        app_module.db.engine.dispose()
+
+
+@pytest.fixture
+def migrate(app_module, monkeypatch):
+    """``migrate(through=None)``: apply migrations up to and including ``through`` (all by default)."""
+    import db_migrations
+
+    every = list(db_migrations.MIGRATIONS)
+
+    def apply(through=None):
+        versions = [version for version, _ in every]
+        selected = every if through is None else every[:versions.index(through) + 1]
+        monkeypatch.setattr(db_migrations, "MIGRATIONS", selected)
+        return db_migrations.upgrade(app_module.db.engine)
+
+    return apply
@@ -0,0 +1,84 @@
+"""
+Certificate IDs: signing, key rotation, issuance and GET /verify (certificates.py).
+"""
+import flask
+import pytest
+
+import certificates
+from certificates import CertificateRegistry, check_certificate_id, new_certificate_id
+
+
+def forged(certificate_id):
+    """The same serial with another (well-formed) tag."""
+    prefix, serial, tag = certificate_id.split("-")
+    return f"{prefix}-{serial}-{'A' if tag[0] != 'A' else 'B'}{tag[1:]}"
+
+
+def configured(monkeypatch, current=None, previous=None):
+    for name, value in (("CERTIFICATE_SECRET", current), ("CERTIFICATE_SECRET_PREVIOUS", previous)):
+        if value is None:
+            monkeypatch.delenv(name, raising=False)
+        else:
+            monkeypatch.setenv(name, value)
+    registry = CertificateRegistry()
+    registry.init_app(flask.Flask(__name__), db=None, model=None)
+    return registry
+
+
+def test_check_accepts_typed_variants_and_rejects_forgeries():
+    certificate_id = new_certificate_id(b"key")
+    assert check_certificate_id(f"  {certificate_id.lower()} ", [b"key"]) == certificate_id
+    assert check_certificate_id(forged(certificate_id), [b"key"]) is None
+    assert check_certificate_id(certificate_id, [b"other"]) is None
+    assert check_certificate_id("SN-123", [b"key"]) is None
+
+
+def test_rotated_key_still_verifies_old_ids(monkeypatch):
+    old_id = new_certificate_id(b"old-key")
+    registry = configured(monkeypatch, current="new-key", previous="older-key, old-key")
+    assert registry.secret == b"new-key"
+    assert check_certificate_id(old_id, registry.secrets) == old_id
+    assert check_certificate_id(new_certificate_id(b"new-key"), registry.secrets)
+    assert check_certificate_id(new_certificate_id(b"unknown"), registry.secrets) is None
+
+
+def test_retired_keys_verify_without_a_current_key(monkeypatch):
+    old_id = new_certificate_id(b"old-key")
+    registry = configured(monkeypatch, previous="old-key")
+    assert registry.secret is None
+    assert check_certificate_id(old_id, registry.secrets) == old_id
+
+
+@pytest.fixture
+def student(app_module, migrate):
+    migrate()
+    student = app_module.Student(name="Ada Lovelace", email="ada@example.com",
+                                 internship_function="Data Science", payment_id="pay_cert")
+    app_module.db.session.add(student)
+    app_module.db.session.commit()
+    return student
+
+
+def test_issue_is_idempotent(student):
+    certificate_id = certificates.registry.issue(student)
+    assert certificate_id
+    assert certificates.registry.issue(student) == certificate_id
+
+
+def test_issue_without_a_key_sends_no_id(student, monkeypatch):
+    monkeypatch.setattr(certificates.registry, "secret", None)
+    assert certificates.registry.issue(student) is None
+
+
+def test_verify_answers_genuine_ids_and_404s_forged_ones(app_module, student):
+    certificate_id = certificates.registry.issue(student)
+    client = app_module.app.test_client()
+
+    genuine = client.get(f"/verify/{certificate_id}?format=json")
+    assert genuine.status_code == 200
+    assert genuine.get_json()["certificate"]["name"] == "Ada Lovelace"
+
+    response = client.get(f"/verify/{forged(certificate_id)}?format=json")
+    assert response.status_code == 404
+    assert response.get_json() == {"valid": False, "certificate": None}
+    assert response.headers["Cache-Control"] == "no-store"
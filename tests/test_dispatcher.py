@@ -0,0 +1,113 @@
+"""
+DueDispatcher: which due students are handed to ``fire`` and how often.
+"""
+import threading
+import time
+from datetime import datetime, timedelta
+
+from dispatcher import DueDispatcher
+
+
+class FakeTable:
+    """``next_action_at`` by student id, with the dispatcher's load_due query."""
+
+    def __init__(self):
+        self.rows = {}
+        self.scans = 0
+
+    def load_due(self, until):
+        self.scans += 1
+        return [(student_id, due_at) for student_id, due_at in self.rows.items() if due_at < until]
+
+
+def loaded(window=60, rows=None):
+    """A dispatcher whose window has been scanned once, without its thread."""
+    table = FakeTable()
+    table.rows.update(rows or {})
+    dispatcher = DueDispatcher(table.load_due, lambda ids: None, window=window)
+    dispatcher._scan(datetime.now())
+    return dispatcher, table
+
+
+def test_schedule_before_start_is_ignored():
+    dispatcher = DueDispatcher(lambda until: [], lambda ids: None, window=60)
+    dispatcher.schedule(1, datetime.now())
+    assert dispatcher._heap == []
+
+
+def test_superseded_entry_is_dropped():
+    now = datetime.now()
+    dispatcher, _ = loaded()
+    dispatcher.schedule(1, now + timedelta(seconds=5))
+    dispatcher.schedule(1, now + timedelta(seconds=10))  # e.g. postponed
+    assert dispatcher._pop_due(now + timedelta(seconds=6)) == []
+    assert dispatcher._pop_due(now + timedelta(seconds=11)) == [1]
+    assert dispatcher._pop_due(now + timedelta(seconds=20)) == []
+
+
+def test_rescheduling_to_nothing_cancels():
+    now = datetime.now()
+    dispatcher, _ = loaded()
+    dispatcher.schedule(1, now + timedelta(seconds=5))
+    dispatcher.schedule(1, None)  # e.g. the email went out and the student is done
+    assert dispatcher._pop_due(now + timedelta(seconds=6)) == []
+
+
+def test_schedule_beyond_the_horizon_waits_for_a_scan():
+    now = datetime.now()
+    dispatcher, table = loaded(window=60)
+    dispatcher.schedule(1, now + timedelta(seconds=5))
+    dispatcher.schedule(1, now + timedelta(hours=2))  # moved out of the window
+    assert dispatcher._pop_due(now + timedelta(hours=3)) == []
+
+    table.rows[1] = now + timedelta(hours=2)
+    dispatcher._scan(now + timedelta(hours=2) - timedelta(seconds=30))
+    assert dispatcher._pop_due(now + timedelta(hours=2)) == [1]
+
+
+def test_scan_picks_up_overdue_rows_once():
+    now = datetime.now()
+    dispatcher, table = loaded(rows={1: now - timedelta(minutes=5), 2: now + timedelta(hours=1)})
+    dispatcher._scan(now)  # a later window scan sees the same row again
+    assert dispatcher._pop_due(now) == [1]
+    del table.rows[1]  # advanced by send_due_emails
+
+    # Written by another process after the last scan, already overdue.
+    table.rows[3] = now - timedelta(seconds=1)
+    dispatcher._scan(now)
+    assert dispatcher._pop_due(now) == [3]
+
+
+def test_running_dispatcher_fires_due_students_and_stops():
+    table = FakeTable()
+    fired = []
+    event = threading.Event()
+
+    def fire(ids):
+        fired.extend(ids)
+        for student_id in ids:
+            table.rows.pop(student_id, None)  # like send_due_emails advancing the student
+        event.set()
+
+    dispatcher = DueDispatcher(table.load_due, fire, window=1)
+    dispatcher.start()
+    try:
+        assert dispatcher.running
+        # Added behind the dispatcher's back: found by the next window scan.
+        table.rows[7] = datetime.now() - timedelta(seconds=1)
+        assert event.wait(3)
+        assert fired == [7]
+
+        event.clear()
+        dispatcher.schedule(8, datetime.now() + timedelta(milliseconds=100))
+        assert event.wait(1)
+        assert fired == [7, 8]
+    finally:
+        dispatcher.stop(timeout=2)
+    assert not dispatcher.running
+
+    scans = table.scans
+    table.rows[9] = datetime.now() - timedelta(seconds=1)
+    time.sleep(1.2)
+    assert fired == [7, 8]
+    assert table.scans == scans
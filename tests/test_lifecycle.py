@@ -0,0 +1,215 @@
+"""
+Student lifecycle: the 0005 backfill, the state transitions and how
+send_due_emails postpones a step it could not send.
+"""
+from datetime import datetime, timedelta
+
+from sqlalchemy import text
+
+import lifecycle
+
+SQLALCHEMY_FORMAT = "%Y-%m-%d %H:%M:%S.%f"  # how SQLAlchemy stores DateTime on SQLite
+
+
+def insert_student(engine, **values):
+    """Insert a row with the columns of the pre-0005 schema; returns its id."""
+    row = {
+        "name": "Student", "email": "student@example.com", "internship_function": "Web Development",
+        "payment_status": "paid", "payment_id": f"pay_{datetime.now().timestamp()}",
+        "internship_start_date": None, "internship_duration": 1, "internship_week": 1,
+        "completion_email_sent": False, "internship_details_email_sent": False,
+        "internship_loi_email_sent": False, "last_email_sent": None,
+    }
+    row.update(values)
+    columns = ", ".join(row)
+    with engine.begin() as conn:
+        return conn.execute(
+            text(f"INSERT INTO students ({columns}) VALUES ({', '.join(':' + c for c in row)}) RETURNING id"), row
+        ).scalar()
+
+
+def lifecycle_row(engine, student_id):
+    with engine.connect() as conn:
+        return conn.execute(
+            text("SELECT lifecycle_state, next_action_at, internship_week FROM students WHERE id = :id"),
+            {"id": student_id},
+        ).one()
+
+
+# ------------------------------------------------------------------------------
+# Migration 0005 backfill
+# ------------------------------------------------------------------------------
+def test_backfill_maps_email_flags_to_states(app_module, migrate):
+    engine = app_module.db.engine
+    migrate(through="0004_unique_payment_id")
+    start = datetime(2026, 9, 1, 9, 30, 15)
+    last_sent = datetime(2026, 9, 20, 18, 30, 0)
+    ids = {
+        "unpaid": insert_student(engine, payment_id="p1", payment_status="pending", internship_start_date=start),
+        "no_start": insert_student(engine, payment_id="p2"),
+        "done": insert_student(engine, payment_id="p3", internship_start_date=start, completion_email_sent=True,
+                               internship_loi_email_sent=True, internship_details_email_sent=True),
+        "offer_letter": insert_student(engine, payment_id="p4", internship_start_date=start),
+        "details": insert_student(engine, payment_id="p5", internship_start_date=start,
+                                  internship_loi_email_sent=True),
+        "weekly": insert_student(engine, payment_id="p6", internship_start_date=start, last_email_sent=last_sent,
+                                 internship_loi_email_sent=True, internship_details_email_sent=True),
+        "weekly_unsent": insert_student(engine, payment_id="p7", internship_start_date=start,
+                                        internship_loi_email_sent=True, internship_details_email_sent=True),
+    }
+    migrate()
+
+    expected = {
+        "unpaid": (lifecycle.PENDING, None),
+        "no_start": (lifecycle.PENDING, None),
+        "done": (lifecycle.DONE, None),
+        "offer_letter": (lifecycle.OFFER_LETTER, start + lifecycle.OFFER_LETTER_DELAY),
+        "details": (lifecycle.DETAILS, start + lifecycle.DETAILS_DELAY),
+        "weekly": (lifecycle.WEEKLY, last_sent + lifecycle.WEEKLY_INTERVAL),
+        "weekly_unsent": (lifecycle.WEEKLY, start),
+    }
+    for case, (state, due_at) in expected.items():
+        row = lifecycle_row(engine, ids[case])
+        assert row.lifecycle_state == state, case
+        # Stored as text exactly like an ORM-written timestamp.
+        assert row.next_action_at == (due_at.strftime(SQLALCHEMY_FORMAT) if due_at else None), case
+
+
+def test_backfill_is_idempotent(app_module, migrate):
+    engine = app_module.db.engine
+    migrate(through="0004_unique_payment_id")
+    student_id = insert_student(engine, payment_id="p1", internship_start_date=datetime(2026, 9, 1))
+    migrate()
+    before = lifecycle_row(engine, student_id)
+
+    import db_migrations
+    db_migrations.student_lifecycle(db_migrations.MigrationContext(engine))
+    assert lifecycle_row(engine, student_id) == before
+
+
+# ------------------------------------------------------------------------------
+# State transitions
+# ------------------------------------------------------------------------------
+def test_initial_state():
+    start = datetime(2026, 10, 1, 12, 0)
+    assert lifecycle.initial("pending", start) == {"lifecycle_state": lifecycle.PENDING, "next_action_at": None}
+    assert lifecycle.initial("paid", None)["lifecycle_state"] == lifecycle.PENDING
+    assert lifecycle.initial("paid", start) == {
+        "lifecycle_state": lifecycle.OFFER_LETTER, "next_action_at": start + lifecycle.OFFER_LETTER_DELAY,
+    }
+
+
+def test_offer_letter_then_details_then_weekly():
+    start = datetime(2026, 10, 1, 12, 0)
+    offer = lifecycle.after_offer_letter(start)
+    assert (offer["lifecycle_state"], offer["next_action_at"]) == (lifecycle.DETAILS, start + lifecycle.DETAILS_DELAY)
+    details = lifecycle.after_details(start)
+    assert details["lifecycle_state"] == lifecycle.WEEKLY
+    assert details["internship_details_email_sent"] is True
+
+
+def test_after_weekly_waits_an_interval_before_the_next_week():
+    start, sent_at = datetime(2026, 10, 1), datetime(2026, 10, 8, 18, 30)
+    assert lifecycle.after_weekly(start, 1, 2, 4, sent_at) == {
+        "lifecycle_state": lifecycle.WEEKLY, "next_action_at": sent_at + lifecycle.WEEKLY_INTERVAL,
+    }
+
+
+def test_after_weekly_at_the_last_week_moves_to_completion():
+    start, sent_at = datetime(2026, 10, 1), datetime(2026, 10, 22, 18, 30)
+    for week in (4, 5):
+        assert lifecycle.after_weekly(start, 2, week, 4, sent_at) == {
+            "lifecycle_state": lifecycle.COMPLETION,
+            "next_action_at": start + timedelta(days=2 * lifecycle.DAYS_PER_MONTH),
+        }
+
+
+def test_after_completion_clears_next_action():
+    assert lifecycle.after_completion() == {
+        "completion_email_sent": True, "lifecycle_state": lifecycle.DONE, "next_action_at": None,
+    }
+
+
+# ------------------------------------------------------------------------------
+# send_due_emails / postpone_student
+# ------------------------------------------------------------------------------
+def test_stalled_backfilled_row_is_postponed_once(app_module, migrate):
+    # A weekly student whose domain has no tasks cannot be sent anything; the
+    # step must be pushed back by STALLED_RETRY, not re-fired on every wake-up.
+    engine = app_module.db.engine
+    migrate(through="0004_unique_payment_id")
+    student_id = insert_student(
+        engine, payment_id="p1", internship_function="Basket Weaving",
+        internship_start_date=datetime.now() - timedelta(days=10),
+        last_email_sent=datetime.now() - timedelta(days=7),
+        internship_loi_email_sent=True, internship_details_email_sent=True,
+    )
+    migrate()
+
+    started = datetime.now()
+    app_module.send_due_emails()
+    state, next_action_at, _ = lifecycle_row(engine, student_id)
+    postponed = datetime.strptime(next_action_at, SQLALCHEMY_FORMAT)
+    assert state == lifecycle.WEEKLY
+    assert started + lifecycle.STALLED_RETRY <= postponed <= datetime.now() + lifecycle.STALLED_RETRY
+
+    app_module.send_due_emails()
+    assert lifecycle_row(engine, student_id).next_action_at == next_action_at
+
+
+def test_postpone_does_not_depend_on_the_stored_timestamp_text(app_module, migrate):
+    # Due times set by hand or by older SQL have no microseconds.
+    engine = app_module.db.engine
+    migrate()
+    student_id = insert_student(engine, payment_id="p1", internship_function="Basket Weaving",
+                                internship_start_date=datetime.now() - timedelta(days=10))
+    with engine.begin() as conn:
+        conn.execute(text("UPDATE students SET lifecycle_state = 'weekly', next_action_at = :due WHERE id = :id"),
+                     {"due": (datetime.now() - timedelta(hours=2)).strftime("%Y-%m-%d %H:%M:%S"), "id": student_id})
+
+    app_module.send_due_emails()
+    postponed = datetime.strptime(lifecycle_row(engine, student_id).next_action_at, SQLALCHEMY_FORMAT)
+    assert postponed > datetime.now()
+
+
+def test_postpone_leaves_students_that_moved_on(app_module, migrate):
+    migrate()
+    Student, db = app_module.Student, app_module.db
+    now = datetime.now()
+    later = Student(name="A", email="a@example.com", internship_function="Web Development", payment_id="p1",
+                    lifecycle_state=lifecycle.WEEKLY, next_action_at=now + timedelta(days=3))
+    advanced = Student(name="B", email="b@example.com", internship_function="Web Development", payment_id="p2",
+                       lifecycle_state=lifecycle.DETAILS, next_action_at=now - timedelta(minutes=1))
+    db.session.add_all([later, advanced])
+    db.session.commit()
+    before = {s.id: (s.lifecycle_state, s.next_action_at) for s in (later, advanced)}
+
+    # e.g. a deferred weekly email went out, or the offer letter did, since the step was read
+    app_module.postpone_student(later.id, lifecycle.WEEKLY, now)
+    app_module.postpone_student(advanced.id, lifecycle.OFFER_LETTER, now)
+
+    db.session.expire_all()
+    assert {s.id: (s.lifecycle_state, s.next_action_at) for s in Student.query.all()} == before
+
+
+def test_catalog_with_fewer_weeks_moves_student_to_completion(app_module, migrate):
+    from task_catalog import weekly_tasks
+
+    migrate()
+    start = datetime.now() - timedelta(days=10)
+    weeks = weekly_tasks.refresh().weeks("Web Development")
+    student = app_module.Student(
+        name="A", email="a@example.com", internship_function="Web Development", payment_id="p1",
+        payment_status="paid", internship_start_date=start, internship_duration=1,
+        internship_week=weeks + 1, lifecycle_state=lifecycle.WEEKLY,
+        next_action_at=datetime.now() - timedelta(hours=1),
+    )
+    app_module.db.session.add(student)
+    app_module.db.session.commit()
+
+    assert app_module.send_due_emails() == 0
+
+    state, next_action_at, week = lifecycle_row(app_module.db.engine, student.id)
+    assert state == lifecycle.COMPLETION
+    assert week == weeks + 1
+    assert datetime.strptime(next_action_at, SQLALCHEMY_FORMAT) == lifecycle.completion_due(start, 1)
@@ -0,0 +1,52 @@
+"""
+Data-rewriting migrations other than the lifecycle backfill (see test_lifecycle.py).
+"""
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
+
+
+def insert_payment(engine, payment_id):
+    with engine.begin() as conn:
+        return conn.execute(
+            text("INSERT INTO students (name, email, internship_function, payment_status, payment_id) "
+                 "VALUES ('Student', 'student@example.com', 'Web Development', 'paid', :payment_id) RETURNING id"),
+            {"payment_id": payment_id},
+        ).scalar()
+
+
+def payment_ids(engine):
+    with engine.connect() as conn:
+        return dict(conn.execute(text("SELECT id, payment_id FROM students")).all())
+
+
+def test_duplicate_payments_are_tagged_not_deleted(app_module, migrate):
+    engine = app_module.db.engine
+    migrate(through="0003_backfill_student_defaults")
+    first = insert_payment(engine, "pay_1")
+    unique = insert_payment(engine, "pay_2")
+    retried = insert_payment(engine, "pay_1")
+    retried_again = insert_payment(engine, "pay_1")
+    migrate(through="0004_unique_payment_id")
+
+    assert payment_ids(engine) == {
+        first: "pay_1",
+        unique: "pay_2",
+        retried: f"pay_1#dup{retried}",
+        retried_again: f"pay_1#dup{retried_again}",
+    }
+    with pytest.raises(IntegrityError):
+        insert_payment(engine, "pay_1")
+
+
+def test_tagged_payment_id_fits_the_column(app_module, migrate):
+    engine = app_module.db.engine
+    migrate(through="0003_backfill_student_defaults")
+    long_id = "p" * 100  # payment_id is VARCHAR(100)
+    insert_payment(engine, long_id)
+    duplicate = insert_payment(engine, long_id)
+    migrate(through="0004_unique_payment_id")
+
+    tagged = payment_ids(engine)[duplicate]
+    assert tagged == "p" * 80 + f"#dup{duplicate}"
+    assert len(tagged) <= 100
@@ -0,0 +1,127 @@
+"""
+Circuit breakers and the background retry scheduler (retrying.py).
+"""
+import asyncio
+import itertools
+
+import pytest
+
+from retrying import Backoff, CircuitBreaker, RetryScheduler, breaker
+
+_names = itertools.count()
+
+
+class PermanentError(Exception):
+    pass
+
+
+def tripped(failure_threshold=1, reset_timeout=60):
+    """A breaker that has just opened."""
+    circuit = CircuitBreaker(f"test-{next(_names)}", failure_threshold, reset_timeout)
+    for _ in range(failure_threshold):
+        circuit.record_failure()
+    assert circuit.state == "open"
+    return circuit
+
+
+def half_open(circuit):
+    circuit.opened_at -= circuit.reset_timeout
+    assert circuit.allow()
+    assert circuit.state == "half_open"
+    return circuit
+
+
+def test_opens_at_the_threshold():
+    circuit = CircuitBreaker(f"test-{next(_names)}", failure_threshold=3, reset_timeout=60)
+    circuit.record_failure()
+    circuit.record_failure()
+    assert circuit.state == "closed" and circuit.allow()
+    circuit.record_failure()
+    assert circuit.state == "open"
+    assert not circuit.allow()
+    assert 59 < circuit.retry_after() <= 60
+
+
+def test_success_resets_the_failure_count():
+    circuit = CircuitBreaker(f"test-{next(_names)}", failure_threshold=2, reset_timeout=60)
+    circuit.record_failure()
+    circuit.record_success()
+    circuit.record_failure()
+    assert circuit.state == "closed"
+
+
+def test_failed_probe_reopens():
+    circuit = half_open(tripped(failure_threshold=3))
+    circuit.record_failure()
+    assert circuit.state == "open"
+    assert circuit.retry_after() > 0
+
+
+def test_half_open_lets_one_probe_through():
+    circuit = half_open(tripped())
+    assert not circuit.allow()
+    circuit.record_success()
+    assert circuit.state == "closed"
+    assert circuit.allow()
+
+
+def test_permanent_error_on_probe_releases_it():
+    scheduler = RetryScheduler(workers=1)
+    target = f"test-{next(_names)}"
+    circuit = breaker(target)
+    for _ in range(circuit.failure_threshold):
+        circuit.record_failure()
+    circuit.opened_at -= circuit.reset_timeout
+
+    def rejected():
+        raise PermanentError("550 no such user")
+
+    with pytest.raises(PermanentError):
+        scheduler.run(rejected, target=target)
+    # The target answered: the next call probes again instead of being refused forever.
+    assert scheduler.run(lambda: "ok", target=target)
+    assert circuit.state == "closed"
+
+
+def test_permanent_error_on_async_outbox_probe_releases_it(monkeypatch):
+    import async_app
+    from app import smtp_target
+
+    circuit = breaker("smtp:%s:%s" % smtp_target())
+    for _ in range(circuit.failure_threshold):
+        circuit.record_failure()
+    circuit.opened_at -= circuit.reset_timeout
+
+    async def rejected(self, mail, smtp_server, smtp_port):
+        raise PermanentError("550 no such user")
+
+    async def accepted(self, mail, smtp_server, smtp_port):
+        return None
+
+    async def deliver(send):
+        monkeypatch.setattr(async_app.MailOutbox, "_send", send)
+        await async_app.MailOutbox(workers=0)._attempt(async_app.OutboxMail("a@example.com", "confirmation", {}))
+
+    with pytest.raises(PermanentError):
+        asyncio.run(deliver(rejected))
+    asyncio.run(deliver(accepted))
+    assert circuit.state == "closed"
+
+
+def test_open_breaker_defers_without_calling():
+    scheduler = RetryScheduler(workers=1)
+    target = f"test-{next(_names)}"
+    circuit = breaker(target)
+    for _ in range(circuit.failure_threshold):
+        circuit.record_failure()
+    calls = []
+
+    assert scheduler.run(lambda: calls.append(1), key="k", target=target) is False
+    assert calls == []
+    assert scheduler.pending("k")
+
+
+def test_backoff_grows_and_is_capped():
+    backoff = Backoff(max_attempts=10, base=2, cap=10)
+    for attempt, ceiling in [(1, 2), (2, 4), (3, 8), (4, 10), (9, 10)]:
+        assert ceiling / 2 <= backoff.delay(attempt) <= ceiling
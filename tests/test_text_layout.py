@@ -0,0 +1,45 @@
+"""
+Fitting certificate text into its box (text_layout.py).
+"""
+import os
+
+import pytest
+
+from template_registry import FONT_DIR
+from text_layout import ELLIPSIS, TextFit
+
+FONT = os.path.join(FONT_DIR, "DejaVuSans-Bold.ttf")
+
+pytestmark = pytest.mark.skipif(not os.path.exists(FONT), reason="DejaVu fonts not installed")
+
+
+def width(fit, text, size):
+    return fit.font(size).getlength(text)
+
+
+def test_short_text_keeps_the_maximum_size():
+    fit = TextFit(FONT, max_width=280, max_size=18)
+    assert fit.size("Data Science") == 18
+    assert fit.clip("Data Science", 18) == "Data Science"
+
+
+def test_long_text_shrinks_to_fit():
+    fit = TextFit(FONT, max_width=280, max_size=18)
+    text = "Full Stack Web Development"
+    size = fit.size(text)
+    assert fit.min_size < size < 18
+    assert width(fit, text, size) <= 280
+    assert fit.clip(text, size) == text
+
+
+def test_text_overflowing_at_the_minimum_size_is_clipped():
+    fit = TextFit(FONT, max_width=280, max_size=18)
+    text = "Artificial Intelligence and Machine Learning Engineering with Cloud Deployment"
+    size = fit.size(text)
+    assert size == fit.min_size
+    clipped = fit.clip(text, size)
+    assert clipped.endswith(ELLIPSIS)
+    assert text.startswith(clipped[:-1])
+    assert width(fit, clipped, size) <= 280
+    # As much of the text as fits: one more character would not.
+    assert width(fit, text[:len(clipped)] + ELLIPSIS, size) > 280
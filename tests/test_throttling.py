@@ -0,0 +1,103 @@
+"""
+Rate-limit counters and load shedding for /submit (throttling.py).
+"""
+import time
+
+import pytest
+
+import throttling
+from throttling import AdaptiveLimit, LoadShedder, SQLiteStorage, client_address
+
+
+@pytest.fixture
+def storage(tmp_path):
+    return SQLiteStorage(f"sqlite:///{tmp_path / 'ratelimit.db'}")
+
+
+def test_counts_within_the_window(storage):
+    assert storage.incr("ip:1", expiry=60) == 1
+    assert storage.incr("ip:1", expiry=60) == 2
+    assert storage.incr("ip:2", expiry=60) == 1
+    assert storage.get("ip:1") == 2
+    assert storage.get_expiry("ip:1") > time.time() + 59
+
+
+def test_expired_window_starts_over(storage):
+    storage.incr("ip:1", expiry=60, amount=5)
+    storage._connection().execute("UPDATE rate_limits SET expires_at = ?", (time.time() - 1,))
+    assert storage.get("ip:1") == 0
+    assert storage.incr("ip:1", expiry=60) == 1
+    assert storage.get_expiry("ip:1") > time.time() + 59
+
+
+def test_counters_are_shared_through_the_file(storage):
+    other_worker = SQLiteStorage(f"sqlite:///{storage.path}")
+    storage.incr("ip:1", expiry=60)
+    assert other_worker.incr("ip:1", expiry=60) == 2
+
+
+def test_clear_and_reset(storage):
+    storage.incr("ip:1", expiry=60)
+    storage.incr("ip:2", expiry=60)
+    storage.clear("ip:1")
+    assert storage.get("ip:1") == 0
+    assert storage.reset() == 1
+
+
+def test_relative_path_is_under_the_repository(tmp_path, monkeypatch):
+    monkeypatch.setattr(throttling, "BASE_DIR", str(tmp_path))
+    assert SQLiteStorage("sqlite:///instance/ratelimit.db").path == str(tmp_path / "instance" / "ratelimit.db")
+
+
+def test_slow_requests_halve_the_limit():
+    limit = AdaptiveLimit(maximum=8, target=1.0)
+    assert limit.try_acquire()
+    limit.release(elapsed=2.0)
+    assert limit.limit == 4
+    for _ in range(5):
+        limit.try_acquire()
+        limit.release(elapsed=5.0)
+    assert limit.limit == 1  # never below one request at a time
+
+
+def test_fast_requests_grow_the_limit_back():
+    limit = AdaptiveLimit(maximum=8, target=1.0)
+    limit.limit = 2.0
+    for _ in range(2):
+        limit.try_acquire()
+        limit.release(elapsed=0.1)
+    assert 2.8 < limit.limit < 3  # about one per full window of requests
+    for _ in range(100):
+        limit.try_acquire()
+        limit.release(elapsed=0.1)
+    assert limit.limit == 8
+
+
+def test_acquire_stops_at_the_limit():
+    limit = AdaptiveLimit(maximum=2, target=1.0)
+    assert limit.try_acquire() and limit.try_acquire()
+    assert not limit.try_acquire()
+    limit.release(elapsed=0.1)
+    assert limit.try_acquire()
+
+
+def test_guard_sheds_when_no_capacity_is_left():
+    shedder = LoadShedder(limit=AdaptiveLimit(maximum=1, target=1.0))
+    calls = []
+
+    def view():
+        calls.append(1)
+        # A second request arriving while this one runs is refused.
+        return guarded_again()
+
+    guarded = shedder.guard(view, lambda reason: reason)
+    guarded_again = shedder.guard(lambda: "ran", lambda reason: reason)
+    assert guarded() == "concurrency"
+    assert guarded_again() == "ran"  # released afterwards
+    assert calls == [1]
+
+
+def test_client_address_trusts_only_the_configured_hops():
+    assert client_address("10.0.0.1", "1.2.3.4", hops=0) == "10.0.0.1"
+    assert client_address("10.0.0.1", "6.6.6.6, 1.2.3.4", hops=1) == "1.2.3.4"
+    assert client_address("10.0.0.1", "1.2.3.4", hops=2) == "10.0.0.1"
@@ -0,0 +1,95 @@
+"""
+Text fitting for rendered certificates.
+
+Names are drawn into a fixed box, and a long one has to be drawn smaller.
+Finding the size by trial and error (``textbbox`` at 50pt, 49pt, ... until it
+fits) rasterizes the string once per attempt. Instead, ``GlyphAdvances``
+measures each character of a font/size once and caches the advance widths,
+so the width of any string is a sum of table lookups. ``TextFit`` estimates
+the fitting size from the width at the maximum size (advances scale
+linearly with the size) and checks that estimate, and one size above it,
+against the table for that size -- usually two sums per name, with no
+rendering.
+
+A line too long even at ``min_size`` is cut short with an ellipsis
+(``TextFit.clip``) rather than drawn past the box.
+
+Pillow's basic layout (no libraqm) places glyphs at their advances without
+kerning, so the sum matches ``font.getlength`` to within rounding.
+"""
+import functools
+
+from PIL import ImageFont
+
+MIN_SIZE = 12
+ELLIPSIS = "\u2026"
+
+
+class GlyphAdvances:
+    """Advance widths of one font at one size, measured once per character."""
+
+    def __init__(self, path, size):
+        self.font = ImageFont.truetype(path, size)
+        self._advances = {}
+
+    def width(self, text):
+        return sum(self.advances(text))
+
+    def advances(self, text):
+        advances = self._advances
+        missing = [c for c in set(text) if c not in advances]
+        for c in missing:
+            advances[c] = self.font.getlength(c)
+        return [advances[c] for c in text]
+
+
+@functools.lru_cache(maxsize=256)
+def glyph_advances(path, size):
+    return GlyphAdvances(path, size)
+
+
+class TextFit:
+    """Largest font size (up to ``max_size``) at which a line fits in ``max_width`` pixels."""
+
+    def __init__(self, path, max_width, max_size, min_size=MIN_SIZE):
+        self.path = path
+        self.max_width = max_width
+        self.max_size = max_size
+        self.min_size = min_size
+
+    def _fits(self, text, size):
+        return glyph_advances(self.path, size).width(text) <= self.max_width
+
+    def size(self, text):
+        widest = glyph_advances(self.path, self.max_size).width(text)
+        if widest <= self.max_width:
+            return self.max_size
+        size = max(self.min_size, int(self.max_size * self.max_width / widest))
+        # Hinting makes widths only roughly proportional: nudge the estimate.
+        if size + 1 < self.max_size and self._fits(text, size + 1):
+            return size + 1
+        while size > self.min_size and not self._fits(text, size):
+            size -= 1
+        return size
+
+    def clip(self, text, size):
+        """``text`` as drawn at ``size``: cut short with an ellipsis if it still overflows."""
+        advances = glyph_advances(self.path, size)
+        widths = advances.advances(text)
+        if sum(widths) <= self.max_width:
+            return text
+        room = self.max_width - advances.width(ELLIPSIS)
+        used = end = 0
+        for end, width in enumerate(widths):
+            if used + width > room:
+                break
+            used += width
+        return text[:end].rstrip() + ELLIPSIS
+
+    def sizes(self, texts):
+        """Sizes for a batch of lines; repeated lines are measured once."""
+        cache = {}
+        return [cache[t] if t in cache else cache.setdefault(t, self.size(t)) for t in texts]
+
+    def font(self, size):
+        return glyph_advances(self.path, size).font
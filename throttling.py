@@ -0,0 +1,298 @@
+"""
+Rate limiting and load shedding for ``POST /submit``.
+
+Two layers protect the registration endpoint, which does a DB insert and
+SMTP work per request:
+
+- Rate limits (Flask-Limiter / ``limits``): a per-IP limit and a global one,
+  answered with 429 + Retry-After. Counters live in process memory by
+  default; ``RATELIMIT_STORAGE_URI=sqlite:///instance/ratelimit.db`` shares
+  them between the gunicorn workers on a host through ``SQLiteStorage``.
+- Load shedding: a request is refused up front with 503 + Retry-After when
+  this process already has too many registrations in flight, the DB pool has
+  no free connection, or too many SMTP deliveries are in progress. The
+  in-flight limit adapts (AIMD): it shrinks while requests are slower than
+  ``SUBMIT_TARGET_LATENCY`` and grows back once they are fast again, so an
+  overloaded dependency turns into quick 503s instead of blocked workers.
+
+Environment:
+    SUBMIT_RATE_LIMIT          per client IP (default "10/minute")
+    SUBMIT_GLOBAL_RATE_LIMIT   all clients together (default "600/minute")
+    RATELIMIT_STORAGE_URI      "memory://" (default) or "sqlite:///<path>"
+    SUBMIT_MAX_INFLIGHT        upper bound of concurrent registrations per process (default 16)
+    SUBMIT_TARGET_LATENCY      seconds; slower requests shrink the limit (default 2.0)
+    SMTP_MAX_INFLIGHT          concurrent SMTP deliveries per process before shedding (default 8)
+    SHED_RETRY_AFTER           Retry-After seconds on 503 (default 5)
+    TRUSTED_PROXY_HOPS         reverse proxies in front of the app whose X-Forwarded-For
+                               is trusted for the client IP (default 0: the socket peer).
+                               Set it to the number of proxies when deployed behind one;
+                               without a proxy any client could pick its own IP.
+"""
+import functools
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+
+from limits.storage import Storage
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.abspath(os.path.dirname(__file__))
+
+SUBMIT_RATE_LIMIT = os.getenv("SUBMIT_RATE_LIMIT", "10/minute")
+SUBMIT_GLOBAL_RATE_LIMIT = os.getenv("SUBMIT_GLOBAL_RATE_LIMIT", "600/minute")
+SUBMIT_MAX_INFLIGHT = int(os.getenv("SUBMIT_MAX_INFLIGHT", 16))
+SUBMIT_TARGET_LATENCY = float(os.getenv("SUBMIT_TARGET_LATENCY", 2.0))
+SMTP_MAX_INFLIGHT = int(os.getenv("SMTP_MAX_INFLIGHT", 8))
+SHED_RETRY_AFTER = int(os.getenv("SHED_RETRY_AFTER", 5))
+TRUSTED_PROXY_HOPS = int(os.getenv("TRUSTED_PROXY_HOPS", 0))
+
+
+def client_address(remote_addr, forwarded_for=None, hops=TRUSTED_PROXY_HOPS):
+    """
+    The client IP as werkzeug's ProxyFix(x_for=hops) sees it: the ``hops``-th
+    X-Forwarded-For entry from the right, else the socket peer. Used by the
+    ASGI app so both /submit endpoints key their limits the same way.
+    """
+    if hops and forwarded_for:
+        values = [value.strip() for value in forwarded_for.split(",")]
+        if len(values) >= hops:
+            return values[-hops]
+    return remote_addr
+
+
+def storage_uri():
+    return os.getenv("RATELIMIT_STORAGE_URI", "memory://")
+
+
+# ------------------------------------------------------------------------------
+# SQLite counter store
+# ------------------------------------------------------------------------------
+class SQLiteStorage(Storage):
+    """
+    Fixed-window counters in a local SQLite file, shared by every process on
+    the host. Registered with ``limits`` for ``sqlite:///`` URIs (relative
+    paths are resolved against the repository root, like DATABASE_URL).
+    """
+
+    STORAGE_SCHEME = ["sqlite"]
+
+    def __init__(self, uri=None, wrap_exceptions=False, **options):
+        path = (uri or "sqlite:///instance/ratelimit.db").split(":///", 1)[1]
+        self.path = path if os.path.isabs(path) else os.path.join(BASE_DIR, path)
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._local = threading.local()
+        super().__init__(uri, wrap_exceptions=wrap_exceptions, **options)
+        self._connection().execute(
+            "CREATE TABLE IF NOT EXISTS rate_limits "
+            "(key TEXT PRIMARY KEY, count INTEGER NOT NULL, expires_at REAL NOT NULL)"
+        )
+
+    @property
+    def base_exceptions(self):
+        return sqlite3.Error
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def incr(self, key, expiry, amount=1):
+        now = time.time()
+        conn = self._connection()
+        if random.random() < 0.01:
+            conn.execute("DELETE FROM rate_limits WHERE expires_at <= ?", (now,))
+        # One statement, so concurrent workers cannot lose an increment.
+        row = conn.execute(
+            "INSERT INTO rate_limits (key, count, expires_at) VALUES (?, ?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET "
+            "count = CASE WHEN expires_at <= ? THEN excluded.count ELSE count + excluded.count END, "
+            "expires_at = CASE WHEN expires_at <= ? THEN excluded.expires_at ELSE expires_at END "
+            "RETURNING count",
+            (key, amount, now + expiry, now, now),
+        ).fetchone()
+        return row[0]
+
+    def get(self, key):
+        row = self._connection().execute(
+            "SELECT count FROM rate_limits WHERE key = ? AND expires_at > ?", (key, time.time())
+        ).fetchone()
+        return row[0] if row else 0
+
+    def get_expiry(self, key):
+        row = self._connection().execute(
+            "SELECT expires_at FROM rate_limits WHERE key = ?", (key,)
+        ).fetchone()
+        return row[0] if row else time.time()
+
+    def check(self):
+        self._connection().execute("SELECT 1")
+        return True
+
+    def reset(self):
+        return self._connection().execute("DELETE FROM rate_limits").rowcount
+
+    def clear(self, key):
+        self._connection().execute("DELETE FROM rate_limits WHERE key = ?", (key,))
+
+
+# ------------------------------------------------------------------------------
+# Load shedding
+# ------------------------------------------------------------------------------
+class InFlight:
+    """Thread-safe count of work in progress, usable as a context manager."""
+
+    def __init__(self):
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        with self._lock:
+            self.count += 1
+        return self
+
+    def __exit__(self, *exc):
+        with self._lock:
+            self.count -= 1
+        return False
+
+
+smtp_inflight = InFlight()
+
+
+class AdaptiveLimit:
+    """
+    AIMD concurrency limit: +1 after a fast request (up to ``maximum``),
+    halved after a request slower than ``target`` seconds (down to 1).
+    """
+
+    def __init__(self, maximum=SUBMIT_MAX_INFLIGHT, target=SUBMIT_TARGET_LATENCY):
+        self.maximum = maximum
+        self.target = target
+        self.limit = float(maximum)
+        self.inflight = 0
+        self._lock = threading.Lock()
+
+    def try_acquire(self):
+        with self._lock:
+            if self.inflight >= int(self.limit):
+                return False
+            self.inflight += 1
+            return True
+
+    def release(self, elapsed):
+        with self._lock:
+            self.inflight -= 1
+            if elapsed > self.target:
+                self.limit = max(1.0, self.limit / 2)
+            else:
+                self.limit = min(float(self.maximum), self.limit + 1.0 / max(self.limit, 1.0))
+
+
+def pool_saturated(pool):
+    """True if a SQLAlchemy QueuePool has every connection (incl. overflow) checked out."""
+    if not hasattr(pool, "checkedout") or not hasattr(pool, "size"):
+        return False
+    max_overflow = getattr(pool, "_max_overflow", 0)
+    if max_overflow < 0:  # unlimited overflow
+        return False
+    return pool.checkedout() >= pool.size() + max_overflow
+
+
+class LoadShedder:
+    def __init__(self, pool=None, limit=None, smtp_max_inflight=SMTP_MAX_INFLIGHT):
+        self.pool = pool
+        self.limit = limit or AdaptiveLimit()
+        self.smtp_max_inflight = smtp_max_inflight
+
+    def overload_reason(self):
+        """Why a new request should be refused right now, or None."""
+        if self.pool is not None and pool_saturated(self.pool()):
+            return "db_pool"
+        if smtp_inflight.count >= self.smtp_max_inflight:
+            return "smtp"
+        return None
+
+    def guard(self, view, overloaded_response):
+        """
+        Wrap ``view`` so it only runs while there is capacity; otherwise
+        ``overloaded_response(reason)`` is returned immediately.
+        """
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            reason = self.overload_reason()
+            if reason is None and not self.limit.try_acquire():
+                reason = "concurrency"
+            if reason is not None:
+                metrics.load_shed.inc(reason=reason)
+                logger.warning(f"Shedding {view.__name__} request: {reason} saturated")
+                return overloaded_response(reason)
+            started = time.perf_counter()
+            try:
+                return view(*args, **kwargs)
+            finally:
+                self.limit.release(time.perf_counter() - started)
+        return wrapper
+
+
+# ------------------------------------------------------------------------------
+# Flask integration
+# ------------------------------------------------------------------------------
+def _json_error(message, status, retry_after):
+    from flask import jsonify
+
+    response = jsonify({"status": "error", "message": message})
+    response.status_code = status
+    response.headers["Retry-After"] = str(retry_after)
+    return response
+
+
+def init_app(app, db, endpoint="submit"):
+    """Rate-limit and guard the ``endpoint`` view (registered before this call)."""
+    from flask_limiter import Limiter, RateLimitExceeded
+    from flask_limiter.util import get_remote_address
+
+    if TRUSTED_PROXY_HOPS:
+        # Behind the reverse proxy every request comes from the proxy's
+        # address; without this the per-IP limit would be one site-wide bucket.
+        from werkzeug.middleware.proxy_fix import ProxyFix
+
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=TRUSTED_PROXY_HOPS)
+
+    limiter = Limiter(
+        get_remote_address,
+        app=app,
+        storage_uri=storage_uri(),
+        strategy="fixed-window",
+        # Retry-After is set by the handlers below; Flask-Limiter's header
+        # injection would overwrite the 503's value with the rate-limit reset.
+        headers_enabled=False,
+    )
+
+    shedder = LoadShedder(pool=lambda: db.engine.pool)
+    view = shedder.guard(
+        app.view_functions[endpoint],
+        lambda reason: _json_error("Server busy, please retry shortly", 503, SHED_RETRY_AFTER),
+    )
+    view = limiter.limit(SUBMIT_RATE_LIMIT)(view)
+    view = limiter.shared_limit(SUBMIT_GLOBAL_RATE_LIMIT, scope="submit-global", key_func=lambda: "global")(view)
+    app.view_functions[endpoint] = view
+
+    @app.errorhandler(RateLimitExceeded)
+    def _rate_limited(error):
+        metrics.rate_limited.inc(limit=str(error.limit.limit))
+        if limiter.current_limit:
+            retry_after = max(1, int(limiter.current_limit.reset_at - time.time()))
+        else:
+            retry_after = error.limit.limit.get_expiry()  # at most one window of the matched limit
+        return _json_error("Too many requests, please retry later", 429, retry_after)
+
+    return limiter